@@ -1,5 +1,10 @@
+import numpy as np
 import pandas as pd
 
+from signals import SIGNAL_BUY, SIGNAL_SELL, encode_signals
+from results import TradeLog, EquityCurve, SparseEquityCurve
+from utils.profiling import profiled
+
 
 def enter_trade(capital, price, trading_fee_pct, stop_loss_pct, take_profit_pct, current_time):
     fee_cost = capital * trading_fee_pct
@@ -29,6 +34,11 @@ def exit_trade(position, entry_price, price, trading_fee_pct, current_time, trad
     net_capital = gross_capital - fee_cost
     profit_pct = (net_capital - (position * entry_price)) / (position * entry_price) * 100
 
+    # TradeLog معامله باز را با ایندکس نگه می‌دارد و نیازی به جستجو ندارد
+    if isinstance(trade_log, TradeLog):
+        trade_log.close(current_time, price, profit_pct, reason, fee_cost)
+        return net_capital, fee_cost
+
     # Update the last open trade
     for trade in reversed(trade_log):
         if trade["exit_time"] is None:
@@ -44,13 +54,39 @@ def exit_trade(position, entry_price, price, trading_fee_pct, current_time, trad
     return net_capital, fee_cost
 
 
+@profiled("backtest")
 def run_backtest(
     df,
     initial_capital=1000.0,
     stop_loss_pct=None,
     take_profit_pct=None,
-    trading_fee_pct=0.0
+    trading_fee_pct=0.0,
+    compact=False,
+    sparse_equity=False
 ):
+    """
+    بک‌تست کندل به کندل روی DataFrame دارای ستون 'Signal'
+
+    پارامترها:
+    - compact: اگر True باشد خروجی به جای لیست دیکشنری‌ها و لیست تاپل‌ها
+      (TradeLog, EquityCurve) از results.py است (با موتور آرایه‌ای و نتیجه یکسان)
+    - sparse_equity: اگر True باشد capital_over_time یک SparseEquityCurve است
+      (فقط کندل‌هایی که سرمایه تغییر کرده)
+
+    خروجی:
+    (final_capital, trade_log, capital_over_time, total_fees)
+    """
+    if compact or sparse_equity:
+        return run_backtest_fast(
+            df,
+            initial_capital=initial_capital,
+            stop_loss_pct=stop_loss_pct,
+            take_profit_pct=take_profit_pct,
+            trading_fee_pct=trading_fee_pct,
+            compact=compact,
+            sparse_equity=sparse_equity
+        )
+
     capital = initial_capital
     position = 0.0
     entry_price = 0.0
@@ -65,14 +101,15 @@ def run_backtest(
         df.index = pd.to_datetime(df.index, errors='coerce')
         df = df.dropna(subset=["Close"])
 
-    for i in range(len(df)):
-        sig = df['Signal'].iloc[i]
-        price = float(df['Close'].iloc[i])
-        low = float(df['Low'].iloc[i])
-        high = float(df['High'].iloc[i])
-        current_time = df.index[i]
+    # کد سیگنال و قیمت‌ها یک بار به آرایه NumPy تبدیل می‌شوند (بدون مقایسه رشته و iloc در هر کندل)
+    signal_codes = encode_signals(df['Signal'])
+    closes = df['Close'].to_numpy(dtype=np.float64)
+    lows = df['Low'].to_numpy(dtype=np.float64)
+    highs = df['High'].to_numpy(dtype=np.float64)
 
-        if sig == 'buy' and position == 0.0:
+    # پیمایش هم‌زمان آرایه‌ها و ایندکس: Timestamp هر کندل فقط هنگام رسیدن به آن ساخته می‌شود
+    for sig, price, low, high, current_time in zip(signal_codes, closes, lows, highs, df.index):
+        if sig == SIGNAL_BUY and position == 0.0:
             (
                 position,
                 entry_price,
@@ -90,7 +127,7 @@ def run_backtest(
         elif position > 0.0:
             stop_hit = stop_loss_price is not None and low <= stop_loss_price
             take_hit = take_profit_price is not None and high >= take_profit_price
-            close_signal = sig == 'sell'
+            close_signal = sig == SIGNAL_SELL
 
             if stop_hit or take_hit or close_signal:
                 if stop_hit:
@@ -128,4 +165,556 @@ def run_backtest(
         total_fees += fee_cost
         capital = net_capital
 
-    return capital, trade_log, capital_over_time, total_fees
\ No newline at end of file
+    return capital, trade_log, capital_over_time, total_fees
+
+
+# ==========================
+# ⚡ Array-based engine
+# ==========================
+
+REASON_OPEN = "buy"
+REASON_STOP_LOSS = "Stop Loss"
+REASON_TAKE_PROFIT = "Take Profit"
+REASON_SIGNAL_SELL = "Signal Sell"
+REASON_FINAL_SELL = "Final Sell"
+
+# اندازه اولین پنجره جستجوی خروج؛ هر بار که خروجی پیدا نشود دو برابر می‌شود
+_EXIT_SEARCH_WINDOW = 64
+
+
+def _find_exit(start, low, high, is_sell, stop_loss_price, take_profit_price):
+    """
+    اولین ایندکس >= start که در آن حد ضرر، حد سود یا سیگنال فروش فعال شود.
+    جستجو در پنجره‌های با طول دوبرابرشونده انجام می‌شود تا هزینه هر معامله
+    متناسب با طول همان معامله باشد و نه طول کل داده.
+    اگر خروجی پیدا نشود -1 برمی‌گرداند.
+    """
+    n = len(low)
+    window = _EXIT_SEARCH_WINDOW
+    while start < n:
+        stop = min(n, start + window)
+        hit = is_sell[start:stop].copy()
+        if stop_loss_price is not None:
+            hit |= low[start:stop] <= stop_loss_price
+        if take_profit_price is not None:
+            hit |= high[start:stop] >= take_profit_price
+        if hit.any():
+            return start + int(hit.argmax())
+        start = stop
+        window *= 2
+    return -1
+
+
+def backtest_kernel(
+    close,
+    high,
+    low,
+    signal,
+    initial_capital=1000.0,
+    stop_loss_pct=None,
+    take_profit_pct=None,
+    trading_fee_pct=0.0
+):
+    """
+    هسته آرایه‌ای بک‌تست با همان ماشین حالت run_backtest
+    (ورود، حد ضرر، حد سود، فروش با سیگنال و فروش نهایی).
+
+    به‌جای پیمایش تک‌تک کندل‌ها، مستقیم از هر ورود به خروج بعدی و از هر خروج
+    به سیگنال خرید بعدی می‌پرد و منحنی سرمایه را به صورت برداری پر می‌کند.
+
+    پارامترها:
+    - close, high, low: آرایه‌های float64 هم‌طول
+    - signal: آرایه int8 با کدهای signals.SIGNAL_*
+
+    خروجی:
+    (final_capital, trades, equity, total_fees)
+    - trades: لیست تاپل‌های
+      (entry_idx, exit_idx, entry_price, exit_price, volume, profit_pct, reason, fee_cost_entry, fee_cost_exit)
+      که برای معامله باز exit_idx برابر -1 است
+    - equity: آرایه float64 سرمایه در هر کندل
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    signal = np.asarray(signal)
+
+    n = len(close)
+    equity = np.empty(n, dtype=np.float64)
+    trades = []
+    capital = initial_capital
+    total_fees = 0.0
+
+    buy_idx = np.flatnonzero(signal == SIGNAL_BUY)
+    is_sell = signal == SIGNAL_SELL
+
+    i = 0
+    while i < n:
+        k = np.searchsorted(buy_idx, i)
+        if k == len(buy_idx):
+            break
+        entry = int(buy_idx[k])
+        equity[i:entry] = capital + 0.0
+
+        # همان محاسبات enter_trade
+        price = float(close[entry])
+        fee_cost = capital * trading_fee_pct
+        capital = capital - fee_cost
+        position = capital / price
+        stop_loss_price = price * (1 - stop_loss_pct) if stop_loss_pct else None
+        take_profit_price = price * (1 + take_profit_pct) if take_profit_pct else None
+        total_fees += fee_cost
+        trade = [entry, -1, price, None, position, None, REASON_OPEN, fee_cost, None]
+        trades.append(trade)
+
+        if position == 0.0:
+            # مثل run_backtest: پوزیشن صفر یعنی عملاً معامله‌ای باز نیست
+            equity[entry] = capital + 0.0
+            i = entry + 1
+            continue
+        if not position > 0.0:
+            # پوزیشن منفی یا NaN: run_backtest نه خارج می‌شود و نه دوباره وارد
+            i = entry
+            break
+
+        equity[entry] = capital + position * price
+
+        exit_idx = _find_exit(entry + 1, low, high, is_sell, stop_loss_price, take_profit_price)
+        if exit_idx == -1:
+            equity[entry + 1:] = capital + position * close[entry + 1:]
+            i = n
+            exit_idx = n - 1
+            exit_price = float(close[-1])
+            reason = REASON_FINAL_SELL
+        else:
+            equity[entry + 1:exit_idx] = capital + position * close[entry + 1:exit_idx]
+            if stop_loss_price is not None and low[exit_idx] <= stop_loss_price:
+                exit_price = stop_loss_price
+                reason = REASON_STOP_LOSS
+            elif take_profit_price is not None and high[exit_idx] >= take_profit_price:
+                exit_price = take_profit_price
+                reason = REASON_TAKE_PROFIT
+            else:
+                exit_price = float(close[exit_idx])
+                reason = REASON_SIGNAL_SELL
+            i = exit_idx + 1
+
+        # همان محاسبات exit_trade
+        gross_capital = position * exit_price
+        fee_cost = gross_capital * trading_fee_pct
+        capital = gross_capital - fee_cost
+        profit_pct = (capital - (position * price)) / (position * price) * 100
+        total_fees += fee_cost
+        trade[1] = exit_idx
+        trade[3] = exit_price
+        trade[5] = profit_pct
+        trade[6] = reason
+        trade[8] = fee_cost
+
+        if reason != REASON_FINAL_SELL:
+            equity[exit_idx] = capital + 0.0
+
+    equity[i:] = capital + 0.0
+
+    return capital, [tuple(t) for t in trades], equity, total_fees
+
+
+def _format_time(current_time):
+    return current_time.isoformat() if hasattr(current_time, "isoformat") else str(current_time)
+
+
+def _time_labels(timestamps, indices):
+    # فقط زمان کندل‌هایی که معامله دارند به رشته تبدیل می‌شوند
+    used = np.unique(np.asarray(indices, dtype=np.int64))
+    used = used[used != -1]
+    return dict(zip(used.tolist(), map(_format_time, timestamps[used])))
+
+
+def trades_to_log(trades, timestamps, time_labels=None):
+    """
+    تبدیل خروجی backtest_kernel به همان لیست دیکشنری‌های run_backtest
+    """
+    iso = time_labels
+    if iso is None:
+        iso = _time_labels(timestamps, [t[0] for t in trades] + [t[1] for t in trades])
+
+    trade_log = []
+    for entry_idx, exit_idx, entry_price, exit_price, volume, profit_pct, reason, fee_entry, fee_exit in trades:
+        trade = {
+            "entry_time": iso[entry_idx],
+            "exit_time": None,
+            "entry_price": entry_price,
+            "exit_price": None,
+            "volume": volume,
+            "profit_pct": None,
+            "reason": REASON_OPEN,
+            "fee_cost_entry": fee_entry
+        }
+        if exit_idx != -1:
+            trade.update({
+                "exit_time": iso[exit_idx],
+                "exit_price": exit_price,
+                "profit_pct": profit_pct,
+                "reason": reason,
+                "fee_cost_exit": fee_exit
+            })
+        trade_log.append(trade)
+    return trade_log
+
+
+def run_backtest_arrays(
+    close,
+    high,
+    low,
+    signal,
+    timestamps,
+    initial_capital=1000.0,
+    stop_loss_pct=None,
+    take_profit_pct=None,
+    trading_fee_pct=0.0,
+    compact=False,
+    sparse_equity=False
+):
+    """
+    بک‌تست روی آرایه‌های NumPy با همان خروجی run_backtest:
+    (final_capital, trade_log, capital_over_time, total_fees)
+
+    پارامترها:
+    - close, high, low: آرایه‌های قیمت
+    - signal: آرایه کدهای int8 (یا برچسب‌های متنی که encode می‌شوند)
+    - timestamps: DatetimeIndex یا آرایه int64 نانوثانیه
+    - compact: اگر True باشد trade_log یک TradeLog و capital_over_time یک EquityCurve است
+    - sparse_equity: اگر True باشد capital_over_time یک SparseEquityCurve است
+    """
+    timestamps = pd.DatetimeIndex(timestamps)
+
+    capital, trades, equity, total_fees = backtest_kernel(
+        close,
+        high,
+        low,
+        encode_signals(signal),
+        initial_capital=initial_capital,
+        stop_loss_pct=stop_loss_pct,
+        take_profit_pct=take_profit_pct,
+        trading_fee_pct=trading_fee_pct
+    )
+
+    if sparse_equity:
+        capital_over_time = SparseEquityCurve.from_dense(timestamps, equity)
+    elif compact:
+        capital_over_time = EquityCurve(timestamps, equity)
+    if compact:
+        return capital, TradeLog.from_trades(trades, timestamps), capital_over_time, total_fees
+
+    trade_log = trades_to_log(trades, timestamps)
+    if sparse_equity:
+        return capital, trade_log, capital_over_time, total_fees
+    # ساخت datetime پایتونی حدود سه برابر سریع‌تر از pd.Timestamp است و روی
+    # داده‌های بزرگ بیشترین زمان همین مرحله است؛ برای مصرف‌کننده‌ها تفاوتی ندارد
+    capital_over_time = list(zip(timestamps.to_pydatetime(), equity.tolist()))
+
+    return capital, trade_log, capital_over_time, total_fees
+
+
+@profiled("backtest")
+def run_backtest_fast(
+    df,
+    initial_capital=1000.0,
+    stop_loss_pct=None,
+    take_profit_pct=None,
+    trading_fee_pct=0.0,
+    compact=False,
+    sparse_equity=False
+):
+    """
+    جایگزین مستقیم run_backtest که روی ستون‌های DataFrame موتور آرایه‌ای را اجرا می‌کند
+    """
+    if not isinstance(df.index, pd.DatetimeIndex):
+        df = df.set_axis(pd.to_datetime(df.index, errors='coerce'))
+        df = df.dropna(subset=["Close"])
+
+    return run_backtest_arrays(
+        df['Close'].to_numpy(dtype=np.float64),
+        df['High'].to_numpy(dtype=np.float64),
+        df['Low'].to_numpy(dtype=np.float64),
+        df['Signal'],
+        df.index,
+        initial_capital=initial_capital,
+        stop_loss_pct=stop_loss_pct,
+        take_profit_pct=take_profit_pct,
+        trading_fee_pct=trading_fee_pct,
+        compact=compact,
+        sparse_equity=sparse_equity
+    )
+
+
+# ==========================
+# 🧮 Batched engine (many signal columns, one pass)
+# ==========================
+
+_BATCH_REASONS = (REASON_OPEN, REASON_STOP_LOSS, REASON_TAKE_PROFIT, REASON_SIGNAL_SELL, REASON_FINAL_SELL)
+
+
+def _signal_matrix(signals):
+    """
+    تبدیل ماتریس سیگنال (DataFrame یا آرایه دوبعدی) به آرایه int8 با شکل (bars, columns)
+    """
+    if isinstance(signals, pd.DataFrame):
+        return np.column_stack([encode_signals(signals[col]) for col in signals.columns])
+
+    signals = np.asarray(signals)
+    if signals.ndim == 1:
+        signals = signals[:, None]
+    if signals.dtype.kind in 'iu':
+        return signals.astype(np.int8, copy=False)
+    return np.column_stack([encode_signals(signals[:, j]) for j in range(signals.shape[1])])
+
+
+def backtest_batch_kernel(
+    close,
+    high,
+    low,
+    signals,
+    initial_capital=1000.0,
+    stop_loss_pct=None,
+    take_profit_pct=None,
+    trading_fee_pct=0.0,
+    record_equity=True
+):
+    """
+    بک‌تست هم‌زمان چند ستون سیگنال روی یک سری قیمت در یک پیمایش.
+
+    در هر کندل وضعیت همه ستون‌ها (سرمایه، حجم پوزیشن، حد ضرر/سود) با عملیات
+    برداری جلو می‌رود؛ محاسبات هر ستون دقیقاً همان محاسبات run_backtest است.
+
+    پارامترها:
+    - close, high, low: آرایه‌های float64 با طول bars
+    - signals: آرایه int8 با شکل (bars, columns)
+    - record_equity: اگر False باشد منحنی سرمایه (bars × columns) ساخته نمی‌شود
+
+    خروجی:
+    (final_capital, trades, equity, total_fees)
+    - final_capital, total_fees: آرایه‌های طول columns
+    - trades: دیکشنری آرایه‌ها با یک ردیف برای هر معامله (ستون 'column' شماره ستون سیگنال است)
+    - equity: آرایه (bars, columns) یا None
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    signals = np.asarray(signals)
+
+    n, m = signals.shape
+    capital = np.full(m, initial_capital, dtype=np.float64)
+    position = np.zeros(m, dtype=np.float64)
+    entry_price = np.zeros(m, dtype=np.float64)
+    stop_loss_price = np.full(m, np.nan)
+    take_profit_price = np.full(m, np.nan)
+    total_fees = np.zeros(m, dtype=np.float64)
+    open_trade = np.full(m, -1, dtype=np.int64)
+    equity = np.empty((n, m), dtype=np.float64) if record_equity else None
+
+    entries = []
+    exits = []
+    trade_count = 0
+
+    for i in range(n):
+        sig = signals[i]
+        price = close[i]
+        is_open = position > 0.0
+
+        enter = (position == 0.0) & (sig == SIGNAL_BUY)
+
+        exit_mask = is_open & (sig == SIGNAL_SELL)
+        stop_hit = None
+        take_hit = None
+        if stop_loss_pct:
+            stop_hit = is_open & (low[i] <= stop_loss_price)
+            exit_mask |= stop_hit
+        if take_profit_pct:
+            take_hit = is_open & (high[i] >= take_profit_price)
+            exit_mask |= take_hit
+
+        if enter.any():
+            cols = np.flatnonzero(enter)
+            fee_cost = capital[cols] * trading_fee_pct
+            net_capital = capital[cols] - fee_cost
+            volume = net_capital / price
+            capital[cols] = net_capital
+            position[cols] = volume
+            entry_price[cols] = price
+            if stop_loss_pct:
+                stop_loss_price[cols] = price * (1 - stop_loss_pct)
+            if take_profit_pct:
+                take_profit_price[cols] = price * (1 + take_profit_pct)
+            total_fees[cols] += fee_cost
+            open_trade[cols] = np.arange(trade_count, trade_count + len(cols))
+            trade_count += len(cols)
+            entries.append((cols, np.full(len(cols), i), np.full(len(cols), price), volume, fee_cost))
+
+        if exit_mask.any():
+            cols = np.flatnonzero(exit_mask)
+            reason = np.full(len(cols), 3, dtype=np.int8)
+            exit_price = np.full(len(cols), price)
+            if take_hit is not None:
+                hit = take_hit[cols]
+                reason[hit] = 2
+                exit_price[hit] = take_profit_price[cols][hit]
+            if stop_hit is not None:
+                hit = stop_hit[cols]
+                reason[hit] = 1
+                exit_price[hit] = stop_loss_price[cols][hit]
+            _batch_exit(cols, i, exit_price, reason, position, entry_price, capital, total_fees,
+                        open_trade, trading_fee_pct, exits)
+
+        if record_equity:
+            equity[i] = capital + np.where(position > 0.0, position * price, 0.0)
+
+    still_open = np.flatnonzero(position > 0.0)
+    if n and len(still_open):
+        _batch_exit(still_open, n - 1, np.full(len(still_open), close[-1]), np.full(len(still_open), 4, dtype=np.int8),
+                    position, entry_price, capital, total_fees, open_trade, trading_fee_pct, exits)
+
+    trades = batch_trade_table(entries, exits, trade_count)
+    return capital, trades, equity, total_fees
+
+
+def _batch_exit(cols, i, exit_price, reason, position, entry_price, capital, total_fees,
+                open_trade, trading_fee_pct, exits):
+    volume = position[cols]
+    gross_capital = volume * exit_price
+    fee_cost = gross_capital * trading_fee_pct
+    net_capital = gross_capital - fee_cost
+    cost = volume * entry_price[cols]
+    profit_pct = (net_capital - cost) / cost * 100
+
+    capital[cols] = net_capital
+    total_fees[cols] += fee_cost
+    exits.append((open_trade[cols], np.full(len(cols), i), exit_price, profit_pct, reason, fee_cost))
+
+    position[cols] = 0.0
+    entry_price[cols] = 0.0
+    open_trade[cols] = -1
+
+
+def batch_trade_table(entries, exits, trade_count):
+    """
+    ساخت جدول ستونی معاملات دسته‌ای (column, entry_idx, exit_idx, ...) از تکه‌های ورود و خروج
+
+    پارامترها:
+    - entries: لیست تاپل‌های آرایه‌ای (column, entry_idx, entry_price, volume, fee_cost_entry)
+    - exits: لیست تاپل‌های آرایه‌ای (trade_id, exit_idx, exit_price, profit_pct, reason, fee_cost_exit)
+    - trade_count: تعداد کل معاملات باز شده
+
+    خروجی:
+    دیکشنری آرایه‌ها؛ معاملات بسته‌نشده exit_idx=-1 و مقادیر خروج NaN دارند
+    """
+    table = {
+        "column": np.empty(trade_count, dtype=np.int64),
+        "entry_idx": np.empty(trade_count, dtype=np.int64),
+        "exit_idx": np.full(trade_count, -1, dtype=np.int64),
+        "entry_price": np.empty(trade_count, dtype=np.float64),
+        "exit_price": np.full(trade_count, np.nan),
+        "volume": np.empty(trade_count, dtype=np.float64),
+        "profit_pct": np.full(trade_count, np.nan),
+        "reason": np.zeros(trade_count, dtype=np.int8),
+        "fee_cost_entry": np.empty(trade_count, dtype=np.float64),
+        "fee_cost_exit": np.full(trade_count, np.nan),
+    }
+    if entries:
+        for key, values in zip(("column", "entry_idx", "entry_price", "volume", "fee_cost_entry"),
+                               map(np.concatenate, zip(*entries))):
+            table[key][:] = values
+    if exits:
+        trade_ids, *columns = map(np.concatenate, zip(*exits))
+        for key, values in zip(("exit_idx", "exit_price", "profit_pct", "reason", "fee_cost_exit"), columns):
+            table[key][trade_ids] = values
+    return table
+
+
+def batch_trades_by_column(trades, n_columns):
+    """
+    تفکیک جدول معاملات backtest_batch_kernel به لیست معاملات هر ستون
+    در همان قالب تاپل‌های backtest_kernel
+    """
+    per_column = [[] for _ in range(n_columns)]
+    fields = [trades[key].tolist() for key in (
+        "column", "entry_idx", "exit_idx", "entry_price", "exit_price",
+        "volume", "profit_pct", "reason", "fee_cost_entry", "fee_cost_exit"
+    )]
+    for column, entry_idx, exit_idx, entry_price, exit_price, volume, profit_pct, reason, fee_entry, fee_exit in zip(*fields):
+        closed = exit_idx != -1
+        per_column[column].append((
+            entry_idx,
+            exit_idx,
+            entry_price,
+            exit_price if closed else None,
+            volume,
+            profit_pct if closed else None,
+            _BATCH_REASONS[reason],
+            fee_entry,
+            fee_exit if closed else None,
+        ))
+    return per_column
+
+
+@profiled("backtest")
+def run_backtest_batch(
+    close,
+    high,
+    low,
+    signals,
+    timestamps,
+    initial_capital=1000.0,
+    stop_loss_pct=None,
+    take_profit_pct=None,
+    trading_fee_pct=0.0,
+    record_equity=True,
+    build_trade_logs=True
+):
+    """
+    بک‌تست دسته‌ای: یک سری OHLC و ماتریس سیگنال (bars × strategies/params)
+
+    پارامترها:
+    - signals: DataFrame (هر ستون یک مجموعه سیگنال) یا آرایه دوبعدی کد/برچسب
+    - timestamps: DatetimeIndex یا آرایه int64 نانوثانیه
+    - record_equity: ساخت منحنی سرمایه برای همه ستون‌ها
+    - build_trade_logs: ساخت لیست دیکشنری معاملات (مثل run_backtest) برای هر ستون
+
+    خروجی:
+    دیکشنری با کلیدهای:
+    - "columns": نام ستون‌ها (برای DataFrame) یا شماره آن‌ها
+    - "final_capital", "total_fees": آرایه برای هر ستون
+    - "equity": آرایه (bars, columns) یا None
+    - "trades": جدول آرایه‌ای همه معاملات
+    - "trade_logs": لیست trade_log هر ستون یا None
+    """
+    columns = list(signals.columns) if isinstance(signals, pd.DataFrame) else None
+    signal_matrix = _signal_matrix(signals)
+    if columns is None:
+        columns = list(range(signal_matrix.shape[1]))
+
+    capital, trades, equity, total_fees = backtest_batch_kernel(
+        close,
+        high,
+        low,
+        signal_matrix,
+        initial_capital=initial_capital,
+        stop_loss_pct=stop_loss_pct,
+        take_profit_pct=take_profit_pct,
+        trading_fee_pct=trading_fee_pct,
+        record_equity=record_equity
+    )
+
+    trade_logs = None
+    if build_trade_logs:
+        timestamps = pd.DatetimeIndex(timestamps)
+        labels = _time_labels(timestamps, np.concatenate([trades["entry_idx"], trades["exit_idx"]]))
+        trade_logs = [trades_to_log(t, timestamps, labels) for t in batch_trades_by_column(trades, len(columns))]
+
+    return {
+        "columns": columns,
+        "final_capital": capital,
+        "total_fees": total_fees,
+        "equity": equity,
+        "trades": trades,
+        "trade_logs": trade_logs,
+    }
@@ -0,0 +1,310 @@
+# benchmarks/suite.py
+#
+# بنچمارک کامل مسیر داده تا گزارش روی داده مصنوعی (benchmarks/synthetic.py):
+# زمان اجرا، throughput (کندل بر ثانیه) و اوج حافظه هر مرحله، و مقایسه با baseline ذخیره‌شده.
+# اجرا از ریشه پروژه:
+#     python -m benchmarks.suite                                  # اندازه‌های پیش‌فرض
+#     python -m benchmarks.suite --sizes 10000,100000,1000000,10000000 --only calculate_rsi,run_backtest
+#     python -m benchmarks.suite --update-baseline                # ذخیره نتایج به عنوان baseline جدید
+#     python -m benchmarks.suite --threshold 15                   # شکست با بیش از 15٪ افت
+#     python -m benchmarks.suite --min-time 0.5                   # حداقل زمان هر اندازه‌گیری (پیش‌فرض 0.2 ثانیه)
+#
+# اگر throughput یک بنچمارک بیش از threshold درصد کمتر (یا اوج حافظه‌اش بیش از threshold درصد بیشتر)
+# از baseline باشد، برنامه با کد خروج 1 تمام می‌شود. هر تکرار اندازه‌گیری دست‌کم --min-time ثانیه
+# اجرا می‌شود و بنچمارک‌های زیر 10 میلی‌ثانیه آستانه سرعت --short-threshold (پیش‌فرض 50٪) دارند.
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from backtest import run_backtest, run_backtest_fast
+from indicators import calculate_rsi, calculate_supertrend
+from metrics import calculate_metrics
+from param_tuner import param_tuner
+from strategies.advanced_strategies import advanced_strategy
+from strategies.supertrend_rsi_strategies import supertrend_rsi_strategy
+from walkforward import walk_forward_validation
+
+from benchmarks.synthetic import generate_ohlcv
+
+SIZES = (10_000, 100_000, 1_000_000, 10_000_000)
+DEFAULT_SIZES = (10_000, 100_000)
+DEFAULT_THRESHOLD_PCT = 25.0
+# هر تکرار اندازه‌گیری حداقل این مدت اجرا می‌شود؛ بهترین زمان بنچمارک‌های چند میلی‌ثانیه‌ای (10k کندل)
+# از ده‌ها نمونه به جای سه نمونه گرفته می‌شود تا نویز زمان‌بندی از threshold بیشتر نشود
+MIN_MEASURE_SECONDS = 0.2
+# بنچمارک‌هایی که در baseline کمتر از SHORT_BENCHMARK_SECONDS طول می‌کشند آستانه افت سرعت بازتری دارند
+SHORT_BENCHMARK_SECONDS = 0.01
+SHORT_THRESHOLD_PCT = 50.0
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+TIMEFRAME_MINUTES = 5
+BACKTEST_KWARGS = dict(initial_capital=1000.0, stop_loss_pct=0.02, take_profit_pct=0.04, trading_fee_pct=0.001)
+STRATEGY_PARAMS = dict(rsi_period=14, rsi_buy_threshold=40, rsi_sell_threshold=60,
+                       supertrend_period=10, supertrend_multiplier=3)
+PARAM_GRID = {
+    "rsi_period": [7, 14],
+    "rsi_buy_threshold": [30, 40],
+    "rsi_sell_threshold": [60, 70],
+    "supertrend_period": [7, 10],
+    "supertrend_multiplier": [2, 3],
+}
+
+
+def _bench_rsi(df):
+    return lambda: calculate_rsi(df, window=14)
+
+
+def _bench_supertrend(df):
+    return lambda: calculate_supertrend(df, period=10, multiplier=3)
+
+
+def _bench_supertrend_rsi(df):
+    return lambda: supertrend_rsi_strategy(df, **STRATEGY_PARAMS)
+
+
+def _bench_advanced(df):
+    return lambda: advanced_strategy(df)
+
+
+def _bench_backtest(df):
+    signals = supertrend_rsi_strategy(df, **STRATEGY_PARAMS)
+    return lambda: run_backtest(signals, **BACKTEST_KWARGS)
+
+
+def _bench_backtest_fast(df):
+    signals = supertrend_rsi_strategy(df, **STRATEGY_PARAMS)
+    return lambda: run_backtest_fast(signals, **BACKTEST_KWARGS)
+
+
+def _bench_metrics(df):
+    # همان trade_log و capital_over_time فهرستی run_backtest، با موتور آرایه‌ای
+    signals = supertrend_rsi_strategy(df, **STRATEGY_PARAMS)
+    _, trade_log, capital_over_time, _ = run_backtest_fast(signals, **BACKTEST_KWARGS)
+    return lambda: calculate_metrics(capital_over_time, trade_log, BACKTEST_KWARGS["initial_capital"], TIMEFRAME_MINUTES)
+
+
+def _bench_param_tuner(df):
+    return lambda: param_tuner(df, supertrend_rsi_strategy, PARAM_GRID, timeframe_minutes=TIMEFRAME_MINUTES,
+                               verbose=False, **BACKTEST_KWARGS)
+
+
+def _bench_walk_forward(df):
+    grid = {key: values[:1] for key, values in PARAM_GRID.items()}
+    grid["supertrend_multiplier"] = PARAM_GRID["supertrend_multiplier"]
+    return lambda: walk_forward_validation(df, supertrend_rsi_strategy, grid, n_splits=3,
+                                           timeframe_minutes=TIMEFRAME_MINUTES, verbose=False,
+                                           save_results_to_file=False, **BACKTEST_KWARGS)
+
+
+# نام بنچمارک: (تابع آماده‌سازی که یک callable بدون آرگومان برمی‌گرداند، بیشترین تعداد کندل)
+# آماده‌سازی (مثلاً محاسبه سیگنال برای run_backtest) جزو زمان اندازه‌گیری‌شده نیست.
+# جستجوهای چندترکیبی (param_tuner و walk-forward) برای 10M کندل ده‌ها دقیقه طول می‌کشند.
+BENCHMARKS = {
+    "calculate_rsi": (_bench_rsi, None),
+    "calculate_supertrend": (_bench_supertrend, None),
+    "supertrend_rsi_strategy": (_bench_supertrend_rsi, None),
+    "advanced_strategy": (_bench_advanced, None),
+    "run_backtest": (_bench_backtest, None),
+    "run_backtest_fast": (_bench_backtest_fast, None),
+    "calculate_metrics": (_bench_metrics, None),
+    "param_tuner": (_bench_param_tuner, 1_000_000),
+    "walk_forward_validation": (_bench_walk_forward, 1_000_000),
+}
+
+
+def measure(func, repeat=3, memory=True, min_seconds=MIN_MEASURE_SECONDS):
+    """
+    اندازه‌گیری یک callable
+
+    پارامترها:
+    - min_seconds: هر تکرار func را آن‌قدر پشت هم اجرا می‌کند که دست‌کم این مدت طول بکشد
+      (بنچمارک‌های کوتاه به جای یک اجرا، ده‌ها نمونه دارند)
+
+    خروجی:
+    (seconds, peak_mb) — بهترین زمان یک اجرا بین همه نمونه‌های repeat تکرار، و اوج حافظه
+    تخصیص‌یافته (tracemalloc) در یک اجرای جداگانه تا سربار tracemalloc روی زمان اثر نگذارد
+    (None اگر memory=False)
+    """
+    seconds = float("inf")
+    gc_enabled = gc.isenabled()
+    gc.disable()  # مثل timeit؛ جمع‌آوری زباله‌های اجراهای قبلی در زمان اجرای بعدی حساب نمی‌شود
+    try:
+        for _ in range(max(int(repeat), 1)):
+            repeat_start = time.perf_counter()
+            while True:
+                start = time.perf_counter()
+                func()
+                end = time.perf_counter()
+                seconds = min(seconds, end - start)
+                if end - repeat_start >= min_seconds:
+                    break
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return seconds, peak_mb
+
+
+def run_suite(sizes=DEFAULT_SIZES, names=None, repeat=3, memory=True, seed=0, verbose=True,
+              min_seconds=MIN_MEASURE_SECONDS):
+    """
+    اجرای بنچمارک‌ها روی داده مصنوعی با اندازه‌های sizes
+
+    پارامترها:
+    - names: زیرمجموعه‌ای از BENCHMARKS (پیش‌فرض همه)
+    - repeat: تعداد تکرار برای بهترین زمان، به نوبت بین بنچمارک‌ها (از یک میلیون کندل به بالا فقط یک بار)
+    - min_seconds: حداقل مدت هر تکرار (measure)
+
+    خروجی:
+    دیکشنری {"<name>@<bars>": {"benchmark", "bars", "seconds", "bars_per_sec", "peak_mb"}}
+    """
+    names = list(BENCHMARKS) if names is None else list(names)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"❌ Error: unknown benchmarks {unknown}")
+
+    results = {}
+    for bars in sizes:
+        df = generate_ohlcv(bars, seed=seed)
+        selected = [name for name in names if BENCHMARKS[name][1] is None or bars <= BENCHMARKS[name][1]]
+        rounds = max(int(repeat), 1) if bars < 1_000_000 else 1
+        # تکرارها به نوبت بین بنچمارک‌ها اجرا می‌شوند تا بهترین زمان هر کدام از چند لحظه متفاوت بیاید،
+        # نه از یک بازه کند ماشین؛ callable هر بنچمارک تا تکرار آخر نگه داشته می‌شود
+        funcs = {}
+        best = {}
+        for round_index in range(rounds):
+            last = round_index == rounds - 1
+            for name in selected:
+                func = funcs.pop(name) if name in funcs else BENCHMARKS[name][0](df)
+                seconds, peak_mb = measure(func, repeat=1, memory=memory and last, min_seconds=min_seconds)
+                seconds = min(seconds, best.get(name, seconds))
+                best[name] = seconds
+                if not last:
+                    funcs[name] = func
+                    continue
+
+                results[f"{name}@{bars}"] = {
+                    "benchmark": name,
+                    "bars": bars,
+                    "seconds": seconds,
+                    "bars_per_sec": bars / seconds,
+                    "peak_mb": peak_mb,
+                }
+                if verbose:
+                    memory_text = f" | peak {peak_mb:9.1f} MB" if peak_mb is not None else ""
+                    print(f"⏱️ {name:<24} {bars:>11,} bars | {seconds:9.3f}s | {bars / seconds:>14,.0f} bars/s{memory_text}")
+    return results
+
+
+def load_baseline(path=BASELINE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_FILE):
+    """ادغام نتایج با baseline موجود (کلیدهای اجرا نشده دست نمی‌خورند)"""
+    baseline = load_baseline(path)
+    baseline.update({
+        key: {"bars_per_sec": round(r["bars_per_sec"], 1),
+              "peak_mb": None if r["peak_mb"] is None else round(r["peak_mb"], 2)}
+        for key, r in results.items()
+    })
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(baseline.items())), f, indent=2)
+        f.write("\n")
+
+
+def compare_to_baseline(results, baseline, threshold_pct=DEFAULT_THRESHOLD_PCT, short_threshold_pct=SHORT_THRESHOLD_PCT):
+    """
+    مقایسه نتایج با baseline
+
+    پارامترها:
+    - short_threshold_pct: آستانه افت سرعت برای بنچمارک‌های زیر SHORT_BENCHMARK_SECONDS
+      (اگر از threshold_pct بیشتر باشد)
+
+    خروجی:
+    لیست پیام‌های regression؛ کلیدهایی که در baseline نیستند نادیده گرفته می‌شوند
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+
+        speed_threshold = threshold_pct
+        if result["bars"] / base["bars_per_sec"] < SHORT_BENCHMARK_SECONDS:
+            speed_threshold = max(threshold_pct, short_threshold_pct)
+        min_speed = base["bars_per_sec"] * (1 - speed_threshold / 100)
+        if result["bars_per_sec"] < min_speed:
+            drop = (1 - result["bars_per_sec"] / base["bars_per_sec"]) * 100
+            regressions.append(
+                f"{key}: {result['bars_per_sec']:,.0f} bars/s vs baseline {base['bars_per_sec']:,.0f} (-{drop:.1f}%)"
+            )
+
+        if result.get("peak_mb") is not None and base.get("peak_mb"):
+            max_memory = base["peak_mb"] * (1 + threshold_pct / 100)
+            if result["peak_mb"] > max_memory:
+                growth = (result["peak_mb"] / base["peak_mb"] - 1) * 100
+                regressions.append(
+                    f"{key}: peak {result['peak_mb']:.1f} MB vs baseline {base['peak_mb']:.1f} MB (+{growth:.1f}%)"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="benchmark suite with baseline regression check")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help=f"comma separated bar counts (full suite: {','.join(str(s) for s in SIZES)})")
+    parser.add_argument("--only", default=None, help="comma separated benchmark names")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--min-time", type=float, default=MIN_MEASURE_SECONDS,
+                        help="minimum seconds per timed repeat (short benchmarks loop until reached)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak memory run")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_PCT,
+                        help="allowed regression in percent before failing")
+    parser.add_argument("--short-threshold", type=float, default=SHORT_THRESHOLD_PCT,
+                        help=f"allowed speed regression in percent for benchmarks under {SHORT_BENCHMARK_SECONDS:g}s")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = run_suite(
+        sizes=[int(s) for s in args.sizes.split(",")],
+        names=args.only.split(",") if args.only else None,
+        repeat=args.repeat,
+        memory=not args.no_memory,
+        min_seconds=args.min_time
+    )
+
+    if args.update_baseline:
+        save_baseline(results, args.baseline)
+        print(f"💾 Baseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare_to_baseline(results, load_baseline(args.baseline), args.threshold, args.short_threshold)
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) over {args.threshold:g}%:")
+        for message in regressions:
+            print(f"   - {message}")
+        return 1
+    print("✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
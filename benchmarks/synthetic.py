@@ -0,0 +1,77 @@
+# benchmarks/synthetic.py
+#
+# تولید داده OHLCV مصنوعی و تکرارپذیر برای بنچمارک‌ها:
+# حرکت براونی هندسی (GBM) که drift و نوسانش با تغییر رژیم بازار (صعودی، نزولی، رنج، پرنوسان) عوض می‌شود.
+
+import numpy as np
+import pandas as pd
+
+# (drift, volatility) لگاریتمی هر کندل برای هر رژیم
+REGIMES = {
+    "bull": (3e-4, 0.004),
+    "bear": (-3e-4, 0.006),
+    "range": (0.0, 0.002),
+    "volatile": (0.0, 0.012),
+}
+
+
+def regime_path(bars, seed=0, mean_regime_bars=1_000):
+    """
+    دنباله شماره رژیم هر کندل (اندیس در REGIMES)
+
+    طول هر رژیم از توزیع هندسی با میانگین mean_regime_bars می‌آید و
+    رژیم بعدی همیشه با رژیم قبلی فرق دارد.
+    """
+    rng = np.random.default_rng([seed, 1])
+    n_regimes = len(REGIMES)
+    count = bars // max(mean_regime_bars, 1) + 16
+
+    durations = rng.geometric(1 / max(mean_regime_bars, 1), size=count)
+    while durations.sum() < bars:
+        durations = np.concatenate([durations, rng.geometric(1 / max(mean_regime_bars, 1), size=count)])
+
+    steps = rng.integers(1, n_regimes, size=len(durations))
+    steps[0] = rng.integers(0, n_regimes)
+    ids = np.cumsum(steps) % n_regimes
+    return np.repeat(ids.astype(np.int8), durations)[:bars]
+
+
+def generate_ohlcv(bars, seed=0, start="2020-01-01", freq="5min", start_price=100.0, mean_regime_bars=1_000):
+    """
+    ساخت DataFrame مصنوعی OHLCV با GBM و تغییر رژیم
+
+    پارامترها:
+    - bars: تعداد کندل‌ها
+    - seed: برای seed یکسان خروجی دقیقاً یکسان است
+    - freq: فاصله کندل‌ها (ایندکس UTC)
+    - mean_regime_bars: میانگین طول هر رژیم بازار
+
+    خروجی:
+    DataFrame با ستون‌های Open, High, Low, Close, Volume
+    """
+    if bars <= 0:
+        raise ValueError("❌ Error: bars must be positive")
+
+    regimes = regime_path(bars, seed, mean_regime_bars)
+    drift, vol = (np.array(v)[regimes] for v in zip(*REGIMES.values()))
+
+    rng = np.random.default_rng([seed, 2])
+    log_returns = drift - 0.5 * vol ** 2 + vol * rng.standard_normal(bars)
+    close = start_price * np.exp(np.cumsum(log_returns))
+
+    # Open نزدیک Close قبلی (با یک gap کوچک) و سایه‌ها متناسب با نوسان رژیم
+    open_ = np.empty(bars)
+    open_[0] = start_price
+    open_[1:] = close[:-1]
+    open_ *= np.exp(0.1 * vol * rng.standard_normal(bars))
+    high = np.maximum(open_, close) * np.exp(0.5 * vol * np.abs(rng.standard_normal(bars)))
+    low = np.minimum(open_, close) * np.exp(-0.5 * vol * np.abs(rng.standard_normal(bars)))
+    volume = rng.lognormal(mean=np.log(1_000.0), sigma=0.5, size=bars) * (vol / 0.004)
+
+    return pd.DataFrame({
+        "Open": open_,
+        "High": high,
+        "Low": low,
+        "Close": close,
+        "Volume": volume,
+    }, index=pd.date_range(start, periods=bars, freq=freq, tz="UTC", unit="ns"))
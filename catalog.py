@@ -0,0 +1,253 @@
+# catalog.py
+
+import json
+import os
+import re
+from datetime import datetime
+
+import pandas as pd
+
+from database import get_connection
+from utils.profiling import profiled
+
+RESULTS_DIR = "results"
+
+# نام فولدرهای create_output_folder: <Strategy>_<TF>_<sample>_<YYYYMMDD_HHMMSS> (sample اختیاری)
+RUN_FOLDER_PATTERN = re.compile(
+    r"^(?P<strategy>.+?)_(?P<timeframe>\d+[A-Za-z]+)(?:_(?P<sample>[^_]+))?_(?P<stamp>\d{8}_\d{6})$"
+)
+
+# ستون متریک‌های اصلی در کاتالوگ ← کلید آن در metrics json
+METRIC_COLUMNS = {
+    "total_return": "Total Return (%)",
+    "annualized_return": "Annualized Return (%)",
+    "max_drawdown": "Max Drawdown (%)",
+    "sharpe_ratio": "Sharpe Ratio",
+    "sortino_ratio": "Sortino Ratio",
+    "calmar_ratio": "Calmar Ratio",
+    "win_rate": "Win Rate (%)",
+    "profit_factor": "Profit Factor",
+    "avg_trade_return": "Average Trade Return (%)",
+    "final_capital": "Final Capital",
+}
+
+CATALOG_COLUMNS = [
+    "folder", "strategy", "timeframe", "sample", "run_time", "symbol", "params", "data_hash",
+    "trade_count", *METRIC_COLUMNS, "metrics", "indexed_mtime",
+]
+
+
+def _create_catalog(conn):
+    with conn:
+        conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS catalog (
+            folder TEXT PRIMARY KEY,
+            strategy TEXT,
+            timeframe TEXT,
+            sample TEXT,
+            run_time TEXT,
+            symbol TEXT,
+            params TEXT,
+            data_hash TEXT,
+            trade_count INTEGER,
+            {", ".join(f"{column} REAL" for column in METRIC_COLUMNS)},
+            metrics TEXT,
+            indexed_mtime REAL
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_catalog_lookup ON catalog (timeframe, sample, run_time)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_catalog_strategy ON catalog (strategy, run_time)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_catalog_data_hash ON catalog (data_hash)")
+
+
+def _catalog_connection(db_file=None):
+    conn = get_connection(db_file)
+    _create_catalog(conn)
+    return conn
+
+
+def parse_run_folder(name):
+    """
+    استخراج strategy، timeframe، sample و run_time از نام فولدر نتایج
+
+    خروجی:
+    دیکشنری یا None اگر نام با الگوی فولدرهای اجرا نخواند
+    """
+    match = RUN_FOLDER_PATTERN.match(os.path.basename(os.path.normpath(name)))
+    if match is None:
+        return None
+    return {
+        "strategy": match.group("strategy"),
+        "timeframe": match.group("timeframe"),
+        "sample": match.group("sample"),
+        "run_time": datetime.strptime(match.group("stamp"), "%Y%m%d_%H%M%S").isoformat(),
+    }
+
+
+def _find_file(folder, prefix, suffix):
+    for name in os.listdir(folder):
+        if name.startswith(prefix) and name.endswith(suffix):
+            return os.path.join(folder, name)
+    return None
+
+
+@profiled("database")
+def record_run(output_dir, metrics, params=None, symbol=None, data_hash=None, trade_count=None, db_file=None):
+    """
+    ثبت (یا به‌روزرسانی) یک اجرا در کاتالوگ هم‌زمان با نوشتن نتایج آن
+
+    پارامترها:
+    - output_dir: فولدر نتایج اجرا (خروجی create_output_folder)
+    - metrics: دیکشنری متریک‌ها (مثل خروجی calculate_metrics به همراه Final Capital)
+    - params: پارامترهای استراتژی؛ data_hash: خروجی database.data_fingerprint
+    """
+    info = parse_run_folder(output_dir) or {
+        "strategy": os.path.basename(os.path.normpath(output_dir)),
+        "timeframe": None,
+        "sample": None,
+        "run_time": datetime.now().isoformat(timespec="seconds"),
+    }
+    metrics_file = _find_file(output_dir, "metrics_", ".json") if os.path.isdir(output_dir) else None
+
+    row = {
+        "folder": os.path.basename(os.path.normpath(output_dir)),
+        **info,
+        "symbol": symbol,
+        "params": json.dumps(params, sort_keys=True, default=str) if params is not None else None,
+        "data_hash": data_hash,
+        "trade_count": trade_count,
+        **{column: metrics.get(key) for column, key in METRIC_COLUMNS.items()},
+        "metrics": json.dumps(metrics, default=str),
+        "indexed_mtime": os.path.getmtime(metrics_file) if metrics_file else None,
+    }
+
+    conn = _catalog_connection(db_file)
+    with conn:
+        conn.execute(f"""
+        INSERT OR REPLACE INTO catalog ({", ".join(CATALOG_COLUMNS)})
+        VALUES ({", ".join("?" * len(CATALOG_COLUMNS))})
+        """, [row[column] for column in CATALOG_COLUMNS])
+
+
+def backfill(results_dir=RESULTS_DIR, db_file=None, force=False, verbose=True):
+    """
+    ایندکس فولدرهای موجود در results_dir؛ فولدرهایی که metrics آن‌ها از آخرین ایندکس تغییر نکرده رد می‌شوند
+
+    خروجی:
+    تعداد فولدرهای ایندکس‌شده
+    """
+    if not os.path.isdir(results_dir):
+        return 0
+
+    conn = _catalog_connection(db_file)
+    indexed = dict(conn.execute("SELECT folder, indexed_mtime FROM catalog").fetchall())
+
+    count = 0
+    for name in sorted(os.listdir(results_dir)):
+        folder = os.path.join(results_dir, name)
+        if not os.path.isdir(folder) or parse_run_folder(name) is None:
+            continue
+        metrics_file = _find_file(folder, "metrics_", ".json")
+        if metrics_file is None:
+            continue
+        if not force and indexed.get(name) == os.path.getmtime(metrics_file):
+            continue
+
+        with open(metrics_file) as f:
+            metrics = json.load(f)
+
+        # config json (اگر save_results آن را نوشته باشد) پارامترها و هش داده را دارد
+        config = {}
+        config_file = _find_file(folder, "config_", ".json")
+        if config_file:
+            with open(config_file) as f:
+                config = json.load(f)
+
+        trade_count = None
+        trade_log_file = _find_file(folder, "trade_log_", ".csv")
+        if trade_log_file:
+            with open(trade_log_file) as f:
+                trade_count = max(sum(1 for _ in f) - 1, 0)
+
+        record_run(
+            folder,
+            metrics,
+            params=config.get("params"),
+            symbol=config.get("symbol"),
+            data_hash=config.get("data_hash"),
+            trade_count=trade_count,
+            db_file=db_file
+        )
+        count += 1
+
+    if verbose:
+        print(f"🗂️ Catalog: indexed {count} run folder(s) from '{results_dir}'.")
+    return count
+
+
+def query_runs(
+    strategy=None,
+    timeframe=None,
+    sample=None,
+    symbol=None,
+    since=None,
+    until=None,
+    order_by="sharpe_ratio",
+    descending=True,
+    limit=None,
+    db_file=None
+):
+    """
+    جستجوی اجراها در کاتالوگ (بدون باز کردن فایل‌های نتایج)
+
+    پارامترها:
+    - since / until: محدوده run_time (datetime یا رشته ISO)
+    - order_by: یکی از ستون‌های کاتالوگ (مثل sharpe_ratio یا run_time)
+
+    خروجی:
+    DataFrame اجراها با ستون‌های کاتالوگ
+    """
+    if order_by not in CATALOG_COLUMNS:
+        raise ValueError(f"❌ Error: unknown catalog column '{order_by}'")
+
+    conditions, values = [], []
+    for column, value in (("strategy", strategy), ("timeframe", timeframe), ("sample", sample), ("symbol", symbol)):
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            values.append(value)
+    if since is not None:
+        conditions.append("run_time >= ?")
+        values.append(pd.Timestamp(since).isoformat())
+    if until is not None:
+        conditions.append("run_time < ?")
+        values.append(pd.Timestamp(until).isoformat())
+
+    query = f"SELECT {', '.join(CATALOG_COLUMNS)} FROM catalog"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    # اجراهای بدون مقدار برای ستون مرتب‌سازی آخر می‌آیند
+    query += f" ORDER BY {order_by} IS NULL, {order_by} {'DESC' if descending else 'ASC'}"
+    if limit is not None:
+        query += f" LIMIT {int(limit)}"
+
+    conn = _catalog_connection(db_file)
+    return pd.DataFrame(conn.execute(query, values).fetchall(), columns=CATALOG_COLUMNS)
+
+
+def best_run(metric="sharpe_ratio", **filters):
+    """
+    بهترین اجرا بر اساس یک متریک، مثلاً:
+    best_run("sharpe_ratio", timeframe="15T", sample="Out-of-Sample", since="2025-08-01")
+
+    خروجی:
+    دیکشنری سطر کاتالوگ یا None
+    """
+    runs = query_runs(order_by=metric, limit=1, **filters)
+    if runs.empty:
+        return None
+    return runs.iloc[0].to_dict()
+
+
+if __name__ == "__main__":
+    backfill()
+    print(query_runs(limit=10)[["folder", "sharpe_ratio", "total_return", "max_drawdown"]].to_string(index=False))
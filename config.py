@@ -8,6 +8,10 @@ SYMBOL = "BTC-USD"         # نماد دارایی (مثل BTC-USD)
 INTERVAL = "1h"            # تایم‌فریم (مثلاً: "5T", "15T", "1H", "1D")
 PERIOD = "30d"             # بازه زمانی دریافت داده (مثل "30d" یعنی ۳۰ روز اخیر)
 
+USE_DATA_STORE = True          # اگر True باشد get_data اول از انبار محلی کندل‌ها می‌خواند
+DATA_STORE_DIR = "data_store"  # پوشه انبار محلی (store.BarStore)
+DATA_OFFLINE = False           # اگر True باشد فقط از انبار خوانده می‌شود (بدون yfinance)
+
 
 # ==========================
 # 💰 Capital & Risk Settings
@@ -45,4 +49,14 @@ ADV_SUPERTREND_MULTIPLIER = 2
 SAVE_PLOTS = True      # اگر True باشد، نمودارها ذخیره می‌شوند
 SHOW_PLOTS = False     # اگر True باشد، نمودارها نمایش داده می‌شوند (plt.show)
 
-SAVE_RESULTS = True    # اگر True باشد، نتایج در فایل ذخیره می‌شوند (CSV/JSON)
\ No newline at end of file
+SAVE_RESULTS = True    # اگر True باشد، نتایج در فایل ذخیره می‌شوند (CSV/JSON)
+
+
+# ==========================
+# ⚙️ Performance
+# ==========================
+
+MAX_WORKERS = 4        # حداکثر پروسه‌های هم‌زمان برای jobهای (timeframe, sample) در main
+
+PROFILE_STAGES = False # اگر True باشد زمان هر مرحله اجرا (utils/profiling.py) ثبت و profile_<name>.json کنار نتایج ذخیره می‌شود
+PROFILE_MEMORY = False # ثبت اوج حافظه هر مرحله با tracemalloc (کندتر؛ فقط همراه PROFILE_STAGES)
@@ -1,24 +1,138 @@
+import numpy as np
 import yfinance as yf
 import pandas as pd
 
+from utils.profiling import profiled
 from utils.time import convert_interval_to_pandas_freq  # ایمپورت تابع از utils/time.py
+from store import BarStore, BAR_COLUMNS
+from config import USE_DATA_STORE, DATA_OFFLINE
 
-def get_data(ticker='BTC-USD', interval='5m', period='20d'):
+# طول دوره‌های yfinance بر حسب روز ("max" یعنی بدون محدودیت)
+_PERIOD_UNITS = {'d': 1, 'wk': 7, 'mo': 30, 'y': 365}
+
+
+def _download(ticker, interval, **kwargs):
     """
-    دریافت داده‌ها از yfinance با پارامترهای تیکر، تایم‌فریم و دوره
+    دریافت مستقیم از yfinance؛ kwargs همان period یا start/end است
     """
-    df = yf.download(ticker, interval=interval, period=period, auto_adjust=False)
+    df = yf.download(ticker, interval=interval, auto_adjust=False, **kwargs)
 
     # اگر MultiIndex هست، ستون‌ها رو به تک‌لایه تبدیل کنیم
     if isinstance(df.columns, pd.MultiIndex):
         df.columns = df.columns.get_level_values(0)
 
+    if df.empty:
+        return pd.DataFrame(columns=list(BAR_COLUMNS))
+
     # فقط ستون‌های مورد نیاز را نگه می‌داریم
-    df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
+    df = df[list(BAR_COLUMNS)]
     df.dropna(inplace=True)
     return df
 
 
+def period_to_timedelta(period):
+    """
+    تبدیل دوره yfinance (مثل '30d'، '6mo'، '2y') به Timedelta؛ برای 'max' خروجی None است
+    """
+    period = period.lower()
+    if period == 'max':
+        return None
+    for unit, days in _PERIOD_UNITS.items():
+        if period.endswith(unit) and period[:-len(unit)].isdigit():
+            return pd.Timedelta(days=int(period[:-len(unit)]) * days)
+    raise ValueError(f"❌ Error: unsupported period '{period}'")
+
+
+def _interval_to_timedelta(interval):
+    """تبدیل تایم‌فریم ('5m'، '15T'، '1h'، '1d'، '1wk') به Timedelta"""
+    if interval.endswith('m'):
+        interval = interval[:-1] + 'T'
+    try:
+        return pd.Timedelta(convert_interval_to_pandas_freq(interval))
+    except ValueError:
+        return period_to_timedelta(interval)
+
+
+def _now(tz):
+    """زمان فعلی هم‌نوع با ایندکس انبار (naive یا در منطقه زمانی tz)"""
+    now = pd.Timestamp.now(tz='UTC')
+    return now.tz_localize(None) if tz is None else now.tz_convert(tz)
+
+
+@profiled("data")
+def get_data(ticker='BTC-USD', interval='5m', period='20d', store=None, offline=None):
+    """
+    دریافت داده‌ها با پارامترهای تیکر، تایم‌فریم و دوره
+
+    اگر انبار محلی فعال باشد (USE_DATA_STORE یا پارامتر store) اول از انبار خوانده می‌شود،
+    فقط بازه‌های ناموجود (ابتدا یا انتهای دوره) از yfinance گرفته و به انبار اضافه می‌شوند.
+    بازه‌های درخواست‌شده در meta.json انبار ثبت می‌شوند تا بازه‌ای که منبع برایش داده
+    نداشته (مثلاً 'max' یا ابتدای دوره در تعطیلی بازار) در هر فراخوانی دوباره دانلود نشود.
+
+    پارامترها:
+    - store: یک BarStore (اختیاری)؛ پیش‌فرض BarStore() وقتی USE_DATA_STORE فعال است
+    - offline: اگر True باشد شبکه استفاده نمی‌شود و دوره نسبت به آخرین کندل انبار حساب می‌شود
+      (پیش‌فرض DATA_OFFLINE)
+    """
+    if offline is None:
+        offline = DATA_OFFLINE
+    if store is None and (USE_DATA_STORE or offline):
+        store = BarStore()
+    if store is None:
+        return _download(ticker, interval, period=period)
+
+    span = period_to_timedelta(period)
+    coverage = store.coverage(ticker, interval)
+
+    if offline:
+        if coverage is None:
+            print(f"⚠️ No stored data for {ticker} {interval} (offline mode).")
+            return pd.DataFrame(columns=list(BAR_COLUMNS))
+        start = None if span is None else coverage[1] - span
+        return store.read(ticker, interval, start=start)
+
+    if coverage is None:
+        df = _download(ticker, interval, period=period)
+        store.write(ticker, interval, df)
+        if not df.empty:
+            now = _now(store.tz(ticker, interval))
+            store.mark_requested(ticker, interval, start='max' if span is None else now - span, end=now)
+        return df
+
+    first, last = coverage
+    now = _now(last.tz)
+    start = None if span is None else now - span
+    step = _interval_to_timedelta(interval)
+
+    # بازه‌هایی که قبلاً درخواست شده‌اند (حتی اگر منبع کندلی برایشان نداشته) دوباره دانلود نمی‌شوند
+    requested_start, requested_end = store.requested_range(ticker, interval)
+    head_done = requested_start == 'max' or (
+        start is not None and requested_start is not None and requested_start <= start
+    )
+    tail_done = requested_end is not None and now - requested_end <= step
+
+    # هر بازه ناموجود: (آرگومان‌های دانلود، بازه ثبت‌شده در meta.json بعد از دانلود موفق)
+    gaps = []
+    if not head_done and (start is None or start < first - step):
+        if start is None:
+            gaps.append((dict(period=period), dict(start='max')))
+        else:
+            gaps.append((dict(start=start, end=first), dict(start=start)))
+    if not tail_done and now - last > step:
+        gaps.append((dict(start=last, end=now), dict(end=now)))
+
+    for gap, requested in gaps:
+        try:
+            store.write(ticker, interval, _download(ticker, interval, **gap))
+        except Exception as e:
+            print(f"⚠️ Could not fetch missing range for {ticker} {interval}: {e}")
+            continue
+        store.mark_requested(ticker, interval, **requested)
+
+    return store.read(ticker, interval, start=start)
+
+
+@profiled("resample")
 def resample_data(df, new_interval):
     """
     تبدیل داده‌ها به تایم‌فریم جدید با resampling پانداس
@@ -43,4 +157,190 @@ def resample_data(df, new_interval):
     df_resampled['Volume'] = df['Volume'].resample(pandas_freq).sum()
 
     df_resampled.dropna(inplace=True)
-    return df_resampled
\ No newline at end of file
+    return df_resampled
+
+def _bucket_bars(times, columns, freq_ns, origin_ns):
+    """
+    تجمیع کندل‌ها در سطل‌های freq_ns با کد عددی سطل و reduceat (بدون resample پانداس)
+
+    پارامترها:
+    - times: int64 نانوثانیه مرتب‌شده
+    - columns: دیکشنری آرایه‌های Open/High/Low/Close/Volume
+
+    خروجی:
+    (زمان شروع هر سطل، دیکشنری ستون‌های تجمیع‌شده)
+    """
+    codes = (times - origin_ns) // freq_ns
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], len(codes)] - 1
+    return origin_ns + codes[starts] * freq_ns, {
+        'Open': columns['Open'][starts],
+        'High': np.maximum.reduceat(columns['High'], starts),
+        'Low': np.minimum.reduceat(columns['Low'], starts),
+        'Close': columns['Close'][ends],
+        'Volume': np.add.reduceat(columns['Volume'], starts),
+    }
+
+
+class BarPyramid:
+    """
+    هرم تایم‌فریم‌ها: همه تایم‌فریم‌های درخواستی از کندل‌های پایه در یک پیمایش ساخته و کش می‌شوند
+
+    هر سطح با کد عددی سطل (مثل origin='start_day' در resample پانداس) و reduceat ساخته می‌شود؛
+    اگر تایم‌فریم درشت‌تر مضربی از سطح ریزتر کش‌شده باشد از همان سطح ساخته می‌شود (نه از کل داده پایه).
+    خروجی هر سطح همان resample_data است؛ برای داده‌های دارای NaN یا ایندکس نامرتب
+    و منطقه‌های زمانی غیر UTC از خود resample_data استفاده می‌شود.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._levels = {}
+        self._fast = (
+            df is not None
+            and not df.empty
+            and isinstance(df.index, pd.DatetimeIndex)
+            and df.index.is_monotonic_increasing
+            and str(df.index.tz or 'UTC') == 'UTC'
+            and all(col in df.columns for col in BAR_COLUMNS)
+            and not df[list(BAR_COLUMNS)].isna().to_numpy().any()
+        )
+        if self._fast:
+            times = df.index.as_unit('ns').asi8
+            # مبدأ سطل‌ها نیمه‌شب روز اولین کندل است (origin='start_day')
+            self._origin = int(df.index[0].normalize().as_unit('ns').value)
+            self._base = (times, {col: df[col].to_numpy(dtype=np.float64) for col in BAR_COLUMNS})
+
+    @profiled("resample")
+    def build(self, intervals):
+        """ساخت همه تایم‌فریم‌ها (از ریز به درشت) و برگرداندن دیکشنری {interval: DataFrame}"""
+        ordered = sorted(intervals, key=lambda tf: pd.Timedelta(convert_interval_to_pandas_freq(tf)))
+        return {tf: self[tf] for tf in ordered}
+
+    def __getitem__(self, interval):
+        if interval in self._levels:
+            return self._levels[interval]
+        if not self._fast:
+            level = resample_data(self.df.copy(), interval)
+            self._levels[interval] = level
+            return level
+
+        freq_ns = pd.Timedelta(convert_interval_to_pandas_freq(interval)).value
+        # ریزترین سطح کش‌شده‌ای که این تایم‌فریم مضرب آن است (در غیر این صورت کندل‌های پایه)
+        times, columns = self._base
+        source_freq = 0
+        for cached_freq, (cached_times, cached_columns) in self._arrays().items():
+            if freq_ns % cached_freq == 0 and cached_freq > source_freq:
+                source_freq, times, columns = cached_freq, cached_times, cached_columns
+
+        starts, values = _bucket_bars(times, columns, freq_ns, self._origin)
+        index = pd.DatetimeIndex(starts.view('M8[ns]'))
+        if self.df.index.tz is not None:
+            index = index.tz_localize('UTC')
+        level = pd.DataFrame(values, index=index.as_unit(self.df.index.unit))
+        self._levels[interval] = level
+        return level
+
+    def _arrays(self):
+        arrays = {}
+        for tf, level in self._levels.items():
+            freq_ns = pd.Timedelta(convert_interval_to_pandas_freq(tf)).value
+            arrays[freq_ns] = (level.index.as_unit('ns').asi8, {col: level[col].to_numpy() for col in BAR_COLUMNS})
+        return arrays
+
+
+_DAY_NS = pd.Timedelta(days=1).value
+
+
+class IncrementalResampler:
+    """
+    resample_data افزایشی برای کندل‌هایی که به انتهای داده اضافه می‌شوند
+
+    آخرین سطل ناتمام تایم‌فریم نگه داشته می‌شود؛ هر update فقط کندل‌های پایه جدید را در سطل‌ها
+    جمع می‌کند و کندل‌های تمام‌شده یا به‌روزشده تایم‌فریم بالاتر را برمی‌گرداند
+    (آخرین سطر خروجی همیشه سطل باز فعلی است و ممکن است در update بعدی دوباره بیاید).
+
+    پارامترها:
+    - interval: تایم‌فریم مقصد مثل '15T'، '1H'، '1D'
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.freq_ns = pd.Timedelta(convert_interval_to_pandas_freq(interval)).value
+        self.tz = None
+        self.unit = 'ns'
+        self.origin = None
+        self.last_time = None
+        # سطل باز: {'start': ..., 'Open': ..., 'High': ..., 'Low': ..., 'Close': ..., 'Volume': ...}
+        self.partial = None
+
+    def _wall_clock(self):
+        # سطل‌های روزانه در منطقه زمانی غیر UTC روزهای تقویمی محلی هستند (مثل resample پانداس)
+        return self.tz not in (None, 'UTC') and self.freq_ns % _DAY_NS == 0
+
+    def _times(self, index):
+        if self._wall_clock():
+            index = index.tz_localize(None)
+        return index.as_unit('ns').asi8
+
+    def _labels(self, starts):
+        index = pd.DatetimeIndex(np.asarray(starts, dtype=np.int64).view('M8[ns]'))
+        if self.tz is not None:
+            index = index.tz_localize(self.tz) if self._wall_clock() else index.tz_localize('UTC').tz_convert(self.tz)
+        return index.as_unit(self.unit)
+
+    def update(self, df):
+        """
+        افزودن کندل‌های پایه جدید (مرتب زمانی؛ کندل‌های قدیمی‌تر از آخرین کندل دیده‌شده نادیده گرفته می‌شوند)
+
+        خروجی:
+        DataFrame کندل‌های تایم‌فریم مقصد که تمام یا به‌روز شده‌اند
+        """
+        if df is None or df.empty:
+            return pd.DataFrame(columns=list(BAR_COLUMNS))
+
+        df = df[list(BAR_COLUMNS)].dropna()
+        if self.last_time is not None:
+            df = df[df.index > self.last_time]
+        if df.empty:
+            return pd.DataFrame(columns=list(BAR_COLUMNS))
+
+        if self.origin is None:
+            self.tz = None if df.index.tz is None else str(df.index.tz)
+            self.unit = df.index.unit
+            # مبدأ سطل‌ها نیمه‌شب روز اولین کندل (origin='start_day')
+            self.origin = int(self._times(pd.DatetimeIndex([df.index[0].normalize()]))[0])
+
+        times = self._times(df.index)
+        columns = {col: df[col].to_numpy(dtype=np.float64) for col in BAR_COLUMNS}
+        starts, values = _bucket_bars(times, columns, self.freq_ns, self.origin)
+
+        if self.partial is not None and starts[0] == self.partial['start']:
+            values['Open'][0] = self.partial['Open']
+            values['High'][0] = max(self.partial['High'], values['High'][0])
+            values['Low'][0] = min(self.partial['Low'], values['Low'][0])
+            values['Volume'][0] = self.partial['Volume'] + values['Volume'][0]
+
+        self.partial = {'start': int(starts[-1]), **{col: float(values[col][-1]) for col in BAR_COLUMNS}}
+        self.last_time = df.index[-1]
+        return pd.DataFrame(values, index=self._labels(starts))
+
+    def get_state(self):
+        """وضعیت قابل ذخیره (JSON) برای ادامه بعد از راه‌اندازی مجدد"""
+        return {
+            "interval": self.interval,
+            "tz": self.tz,
+            "unit": self.unit,
+            "origin": self.origin,
+            "last_time": None if self.last_time is None else self.last_time.isoformat(),
+            "partial": self.partial,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        resampler = cls(state["interval"])
+        resampler.tz = state["tz"]
+        resampler.unit = state["unit"]
+        resampler.origin = state["origin"]
+        resampler.last_time = None if state["last_time"] is None else pd.Timestamp(state["last_time"])
+        resampler.partial = state["partial"]
+        return resampler
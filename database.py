@@ -1,18 +1,106 @@
 import sqlite3
-from contextlib import closing
+import hashlib
+import json
 import os
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from results import TradeLog
+from utils.profiling import profiled
 
 DB_FILE = "results/trading_bot.db"
 
-def init_db():
-    os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
-    with closing(sqlite3.connect(DB_FILE)) as conn:
+# هر پروسه/نخ یک اتصال ماندگار برای هر فایل دیتابیس نگه می‌دارد (worker‌های tuner جدا از هم)
+_CONNECTIONS = {}
+_CONNECTIONS_LOCK = threading.Lock()
+
+# زمان انتظار برای قفل نوشتن وقتی چند worker هم‌زمان می‌نویسند (میلی‌ثانیه)
+BUSY_TIMEOUT_MS = 30000
+
+_TRADE_COLUMNS = (
+    "entry_time", "exit_time", "entry_price", "exit_price",
+    "volume", "profit_pct", "reason", "fee_cost_entry", "fee_cost_exit"
+)
+
+_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_runs_lookup ON runs (strategy, symbol, timeframe)",
+    "CREATE INDEX IF NOT EXISTS idx_runs_data_hash ON runs (data_hash)",
+    "CREATE INDEX IF NOT EXISTS idx_trades_run ON trades (run_id)",
+    "CREATE INDEX IF NOT EXISTS idx_metrics_run ON metrics (run_id)",
+)
+
+
+def _connect(db_file):
+    """
+    اتصال جدید با WAL (خواننده‌ها نویسنده را قفل نمی‌کنند) و busy_timeout برای نوشتن هم‌زمان
+    """
+    folder = os.path.dirname(db_file)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(db_file, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
+
+
+def get_connection(db_file=None):
+    """
+    اتصال ماندگار (pooled) به دیتابیس؛ برای هر پروسه و نخ یک بار باز می‌شود و جدول‌ها را می‌سازد
+
+    پارامترها:
+    - db_file: مسیر دیتابیس (پیش‌فرض DB_FILE)
+    """
+    db_file = db_file or DB_FILE
+    key = (os.getpid(), threading.get_ident(), os.path.abspath(db_file))
+    with _CONNECTIONS_LOCK:
+        conn = _CONNECTIONS.get(key)
+        if conn is None:
+            conn = _connect(db_file)
+            _create_tables(conn)
+            _CONNECTIONS[key] = conn
+    return conn
+
+
+def close_connections():
+    """بستن همه اتصال‌های ماندگار این پروسه"""
+    with _CONNECTIONS_LOCK:
+        for key in [key for key in _CONNECTIONS if key[0] == os.getpid()]:
+            _CONNECTIONS.pop(key).close()
+
+
+def _add_column(conn, table, column, definition):
+    # مهاجرت دیتابیس‌های قدیمی که ستون run_id ندارند
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _create_tables(conn):
+    with conn:
         c = conn.cursor()
-        
+
+        # جدول اجراها: هر بک‌تست / ترکیب پارامتر یک سطر
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_time TEXT,
+            strategy TEXT,
+            params TEXT,
+            symbol TEXT,
+            timeframe TEXT,
+            data_hash TEXT
+        )
+        """)
+
         # جدول معاملات
         c.execute("""
         CREATE TABLE IF NOT EXISTS trades (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id INTEGER REFERENCES runs (id),
             entry_time TEXT,
             exit_time TEXT,
             entry_price REAL,
@@ -29,6 +117,7 @@ def init_db():
         c.execute("""
         CREATE TABLE IF NOT EXISTS metrics (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id INTEGER REFERENCES runs (id),
             run_time TEXT,
             total_return REAL,
             annualized_return REAL,
@@ -39,39 +128,192 @@ def init_db():
             avg_trade_return REAL
         )
         """)
-        conn.commit()
+        _add_column(conn, "trades", "run_id", "INTEGER REFERENCES runs (id)")
+        _add_column(conn, "metrics", "run_id", "INTEGER REFERENCES runs (id)")
+        init_paper_tables(conn)
 
-def save_trade(trade):
-    with closing(sqlite3.connect(DB_FILE)) as conn:
-        c = conn.cursor()
-        c.execute("""
-        INSERT INTO trades (
-            entry_time, exit_time, entry_price, exit_price,
-            volume, profit_pct, reason, fee_cost_entry, fee_cost_exit
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        for statement in _INDEXES:
+            c.execute(statement)
+
+
+def init_db(db_file=None):
+    get_connection(db_file)
+
+
+def init_paper_tables(conn):
+    """
+    ساخت جدول‌های معاملات کاغذی (fillها و منحنی سرمایه) روی یک اتصال باز
+
+    run_id این جدول‌ها یک شناسه متنی مستقل (مثل paper_20250101_120000_<uuid>) است و
+    به runs.id (عددی) ارجاع نمی‌دهد: اجراهای کاغذی در جدول runs ثبت نمی‌شوند.
+    """
+    c = conn.cursor()
+
+    # جدول fillهای معاملات کاغذی
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS paper_fills (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id TEXT,
+        time TEXT,
+        side TEXT,
+        price REAL,
+        volume REAL,
+        fee REAL,
+        reason TEXT,
+        capital REAL
+    )
+    """)
+
+    # جدول منحنی سرمایه معاملات کاغذی
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS paper_equity (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id TEXT,
+        time TEXT,
+        equity REAL
+    )
+    """)
+
+    c.execute("CREATE INDEX IF NOT EXISTS idx_paper_fills_run ON paper_fills (run_id, time)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_paper_equity_run ON paper_equity (run_id, time)")
+
+def connect_paper_db(db_file=None):
+    """
+    باز کردن یک اتصال ماندگار برای حلقه معاملات کاغذی (به جای اتصال جدید برای هر رکورد)
+    """
+    conn = _connect(db_file or DB_FILE)
+    init_paper_tables(conn)
+    conn.commit()
+    return conn
+
+def save_paper_fills(conn, run_id, fills):
+    """
+    ذخیره دسته‌ای fillها: هر fill تاپل (time, side, price, volume, fee, reason, capital)
+    """
+    conn.executemany("""
+    INSERT INTO paper_fills (run_id, time, side, price, volume, fee, reason, capital)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(run_id,) + tuple(fill) for fill in fills])
+    conn.commit()
+
+def save_paper_equity(conn, run_id, points):
+    """
+    ذخیره دسته‌ای نقاط منحنی سرمایه: هر نقطه تاپل (time, equity)
+    """
+    conn.executemany("""
+    INSERT INTO paper_equity (run_id, time, equity) VALUES (?, ?, ?)
+    """, [(run_id,) + tuple(point) for point in points])
+    conn.commit()
+
+def load_paper_equity(conn, run_id):
+    """
+    خواندن منحنی سرمایه ذخیره‌شده یک اجرای کاغذی
+
+    خروجی:
+    لیست (Timestamp, equity) به ترتیب ثبت
+    """
+    rows = conn.execute("""
+    SELECT time, equity FROM paper_equity WHERE run_id = ? ORDER BY id
+    """, (run_id,)).fetchall()
+    return [(pd.Timestamp(t), equity) for t, equity in rows]
+
+def data_fingerprint(df):
+    """
+    هش محتوای داده ورودی (ایندکس و ستون‌های عددی) برای ستون data_hash جدول runs؛
+    دو اجرا روی داده یکسان هش یکسان دارند.
+    """
+    if df is None:
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    index = pd.DatetimeIndex(df.index) if isinstance(df.index, pd.DatetimeIndex) else None
+    if index is not None:
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        digest.update(index.as_unit('ns').asi8.tobytes())
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values):
+            digest.update(str(column).encode())
+            digest.update(np.ascontiguousarray(values.to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()
+
+@profiled("database")
+def create_run(strategy, params=None, symbol=None, timeframe=None, data_hash=None, run_time=None, db_file=None):
+    """
+    ثبت یک اجرا در جدول runs
+
+    پارامترها:
+    - params: دیکشنری پارامترهای استراتژی (به صورت JSON ذخیره می‌شود)
+    - data_hash: خروجی data_fingerprint داده ورودی
+
+    خروجی:
+    run_id (شناسه سطر در runs) برای save_trades / save_metrics
+    """
+    conn = get_connection(db_file)
+    with conn:
+        cursor = conn.execute("""
+        INSERT INTO runs (run_time, strategy, params, symbol, timeframe, data_hash)
+        VALUES (?, ?, ?, ?, ?, ?)
         """, (
-            trade.get("entry_time"),
-            trade.get("exit_time"),
-            trade.get("entry_price"),
-            trade.get("exit_price"),
-            trade.get("volume"),
-            trade.get("profit_pct"),
-            trade.get("reason"),
-            trade.get("fee_cost_entry", 0),
-            trade.get("fee_cost_exit", 0)
+            run_time or datetime.now().isoformat(),
+            strategy,
+            json.dumps(params, sort_keys=True, default=str) if params is not None else None,
+            symbol,
+            timeframe,
+            data_hash
         ))
-        conn.commit()
+    return cursor.lastrowid
 
-def save_metrics(metrics, run_time):
-    with closing(sqlite3.connect(DB_FILE)) as conn:
-        c = conn.cursor()
-        c.execute("""
+def _trade_row(trade):
+    return (
+        trade.get("entry_time"),
+        trade.get("exit_time"),
+        trade.get("entry_price"),
+        trade.get("exit_price"),
+        trade.get("volume"),
+        trade.get("profit_pct"),
+        trade.get("reason"),
+        trade.get("fee_cost_entry", 0),
+        trade.get("fee_cost_exit", 0)
+    )
+
+_INSERT_TRADE = f"""
+INSERT INTO trades (run_id, {", ".join(_TRADE_COLUMNS)})
+VALUES ({", ".join("?" * (len(_TRADE_COLUMNS) + 1))})
+"""
+
+def save_trade(trade, run_id=None, db_file=None):
+    conn = get_connection(db_file)
+    with conn:
+        conn.execute(_INSERT_TRADE, (run_id,) + _trade_row(trade))
+
+@profiled("database")
+def save_trades(trade_log, run_id=None, db_file=None):
+    """
+    ذخیره همه معاملات یک بک‌تست در یک تراکنش با executemany
+    (trade_log لیست دیکشنری‌ها یا results.TradeLog که مستقیم از آرایه‌هایش سطر می‌سازد)
+
+    خروجی:
+    تعداد سطرهای ذخیره‌شده
+    """
+    rows = trade_log.to_rows() if isinstance(trade_log, TradeLog) else map(_trade_row, trade_log)
+    conn = get_connection(db_file)
+    with conn:
+        cursor = conn.executemany(_INSERT_TRADE, ((run_id,) + tuple(row) for row in rows))
+    return cursor.rowcount
+
+@profiled("database")
+def save_metrics(metrics, run_time, run_id=None, db_file=None):
+    conn = get_connection(db_file)
+    with conn:
+        conn.execute("""
         INSERT INTO metrics (
-            run_time, total_return, annualized_return,
+            run_id, run_time, total_return, annualized_return,
             max_drawdown, sharpe_ratio, win_rate,
             profit_factor, avg_trade_return
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
+            run_id,
             run_time,
             metrics.get("Total Return (%)"),
             metrics.get("Annualized Return (%)"),
@@ -81,4 +323,3 @@ def save_metrics(metrics, run_time):
             metrics.get("Profit Factor"),
             metrics.get("Average Trade Return (%)")
         ))
-        conn.commit()
\ No newline at end of file
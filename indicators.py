@@ -1,6 +1,10 @@
+import numpy as np
 import pandas as pd
 import ta
 
+from utils.profiling import profiled
+
+@profiled("indicators")
 def calculate_rsi(df, window=14):
     """
     محاسبه RSI و اضافه کردن آن به DataFrame
@@ -29,13 +33,92 @@ def calculate_rsi(df, window=14):
     return df
 
 
-def calculate_supertrend(df, period=10, multiplier=3):
+def compute_atr(high, low, close, period=14):
+    """
+    محاسبه ATR با روش Wilder روی آرایه‌های NumPy
+    (همان خروجی ta.volatility.AverageTrueRange، بدون دسترسی iloc در هر کندل)
+
+    خروجی:
+    آرایه float64؛ period-1 مقدار اول صفر هستند
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+
+    prev_close = np.empty_like(close)
+    prev_close[0] = np.nan
+    prev_close[1:] = close[:-1]
+
+    true_range = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+    atr = np.zeros(len(close))
+    atr[period - 1] = true_range[0:period].mean()
+
+    # بازگشت Wilder ذاتاً ترتیبی است؛ روی float پایتونی سریع‌ترین حالت است
+    values = atr.tolist()
+    prev = values[period - 1]
+    for i, tr in enumerate(true_range[period:].tolist(), start=period):
+        prev = (prev * (period - 1) + tr) / float(period)
+        values[i] = prev
+
+    return np.array(values)
+
+
+def supertrend_trend(close, upperband, lowerband):
+    """
+    ماشین حالت Supertrend به صورت برداری:
+    - اگر Close از باند بالای کندل قبل بالاتر برود روند صعودی (True)
+    - اگر از باند پایین کندل قبل پایین‌تر برود روند نزولی (False)
+    - در غیر این صورت روند کندل قبل ادامه پیدا می‌کند (کندل اول True)
+
+    خروجی:
+    آرایه bool
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+
+    # -1 یعنی تغییری رخ نداده و مقدار قبلی باید ادامه پیدا کند
+    state = np.full(n, -1, dtype=np.int8)
+    if n == 0:
+        return state.astype(bool)
+    state[0] = 1
+    state[1:][close[1:] < lowerband[:-1]] = 0
+    state[1:][close[1:] > upperband[:-1]] = 1
+
+    last_set = np.where(state >= 0, np.arange(n), 0)
+    np.maximum.accumulate(last_set, out=last_set)
+    return state[last_set] == 1
+
+
+def compute_supertrend(high, low, close, period=10, multiplier=3):
+    """
+    محاسبه Supertrend روی آرایه‌های NumPy
+
+    خروجی:
+    (trend, upperband, lowerband) که trend آرایه bool است
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+
+    atr = compute_atr(high, low, close, period)
+
+    hl2 = (high + low) / 2
+    upperband = hl2 + multiplier * atr
+    lowerband = hl2 - multiplier * atr
+
+    return supertrend_trend(close, upperband, lowerband), upperband, lowerband
+
+
+@profiled("indicators")
+def calculate_supertrend(df, period=10, multiplier=3, bands=False):
     """
     محاسبه Supertrend و اضافه کردن آن به DataFrame
     پارامترها:
     - df: DataFrame ورودی با ستون‌های 'High', 'Low', 'Close'
     - period: طول دوره ATR (پیش‌فرض 10)
     - multiplier: ضریب ضرب ATR برای باندهای بالا و پایین (پیش‌فرض 3)
+    - bands: اگر True باشد مقادیر واقعی باندها هم اضافه می‌شوند
+      ('Supertrend_Upper', 'Supertrend_Lower' و خط فعال 'Supertrend_Line')
     
     خروجی:
     DataFrame با ستون جدید 'Supertrend' (bool)
@@ -53,28 +136,26 @@ def calculate_supertrend(df, period=10, multiplier=3):
     # اگر طول دیتافریم کمتر از period بود، ستون Supertrend بساز و مقدار True برگردون
     if len(df) < period:
         df['Supertrend'] = True
+        if bands:
+            df['Supertrend_Upper'] = np.nan
+            df['Supertrend_Lower'] = np.nan
+            df['Supertrend_Line'] = np.nan
         return df
 
-    atr = ta.volatility.AverageTrueRange(
-        high=df['High'],
-        low=df['Low'],
-        close=df['Close'],
-        window=period
-    ).average_true_range()
+    trend, upperband, lowerband = compute_supertrend(
+        df['High'].to_numpy(dtype=np.float64),
+        df['Low'].to_numpy(dtype=np.float64),
+        df['Close'].to_numpy(dtype=np.float64),
+        period=period,
+        multiplier=multiplier
+    )
 
-    hl2 = (df['High'] + df['Low']) / 2
-    upperband = hl2 + multiplier * atr
-    lowerband = hl2 - multiplier * atr
+    df['Supertrend'] = trend
 
-    supertrend = [True]
-    for i in range(1, len(df)):
-        if df['Close'].iloc[i] > upperband.iloc[i - 1]:
-            supertrend.append(True)
-        elif df['Close'].iloc[i] < lowerband.iloc[i - 1]:
-            supertrend.append(False)
-        else:
-            supertrend.append(supertrend[-1])
+    if bands:
+        df['Supertrend_Upper'] = upperband
+        df['Supertrend_Lower'] = lowerband
+        # در روند صعودی باند پایین نقش حمایت و در روند نزولی باند بالا نقش مقاومت دارد
+        df['Supertrend_Line'] = np.where(trend, lowerband, upperband)
 
-    df['Supertrend'] = supertrend
-
-    return df
\ No newline at end of file
+    return df
@@ -1,27 +1,34 @@
 import pandas as pd
 import os
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from functools import partial
 
-from data import get_data, resample_data
+from data import get_data, BarPyramid
 from strategies.supertrend_rsi_strategies import supertrend_rsi_strategy
 from strategies.advanced_strategies import advanced_strategy
 from backtest import run_backtest
 from metrics import calculate_metrics
-from database import init_db
+from database import init_db, data_fingerprint, create_run, save_trades, save_metrics
 from param_tuner import param_tuner
 from walkforward import walk_forward_validation
+from catalog import record_run
+from paper_trading import ReplayFeed, run_paper_trading
 
 from config import (
     SYMBOL, INTERVAL, PERIOD, INITIAL_CAPITAL,
     STOP_LOSS_PCT, TAKE_PROFIT_PCT,
     SUPERTREND_PERIOD, SUPERTREND_MULTIPLIER,
     ADV_SUPERTREND_PERIOD, ADV_SUPERTREND_MULTIPLIER,
-    TRADING_FEE_PCT
+    TRADING_FEE_PCT, MAX_WORKERS, PROFILE_STAGES, PROFILE_MEMORY
 )
 
 from utils.time import convert_interval_to_minutes
 from utils.report import print_trade_log, print_metrics, save_results
 from utils.plot import plot_price_chart_with_indicators, plot_equity_curve
 from utils.file import create_output_folder, get_filepath
+from utils.profiling import profiling, print_profile_summary
 
 
 def split_data_for_out_of_sample(df, split_ratio=0.8):
@@ -31,7 +38,40 @@ def split_data_for_out_of_sample(df, split_ratio=0.8):
     return df.iloc[:split_index].copy(), df.iloc[split_index:].copy()
 
 
-def run_backtest_and_report(df, strategy_func, strategy_name, timeframe, suffix=""):
+def profile_run(name, enabled=PROFILE_STAGES):
+    """
+    context manager پروفایل مراحل یک اجرا؛ اگر پروفایل خاموش باشد None برمی‌گرداند
+
+    نمونه:
+        with profile_run("param_tuner") as profiler:
+            ...
+        if profiler is not None:
+            print_profile_summary(profiler)
+    """
+    return profiling(name, memory=PROFILE_MEMORY) if enabled else nullcontext()
+
+
+def run_backtest_and_report(df, strategy_func, strategy_name, timeframe, suffix="", params=None, profile=PROFILE_STAGES):
+    """
+    اجرای استراتژی، بک‌تست، متریک‌ها، ذخیره نتایج و نمودارها برای یک (timeframe, sample)
+
+    پارامترها:
+    - profile: ثبت زمان (و با PROFILE_MEMORY اوج حافظه) هر مرحله و ذخیره profile_<name>.json در فولدر نتایج
+
+    خروجی:
+    مسیر فولدر نتایج یا None اگر اجرا انجام نشد
+    """
+    run_name = f"{strategy_name}_{timeframe}_{suffix}".strip('_')
+    with profile_run(run_name, enabled=profile) as profiler:
+        output_folder = _backtest_and_report(df, strategy_func, strategy_name, timeframe, suffix, params)
+
+    if profiler is not None and output_folder is not None:
+        print_profile_summary(profiler, name=run_name)
+        profiler.save(output_folder, run_name)
+    return output_folder
+
+
+def _backtest_and_report(df, strategy_func, strategy_name, timeframe, suffix, params):
     if df is None or df.empty:
         print(f"⚠️ No data for {strategy_name} {timeframe} {suffix}")
         return
@@ -41,6 +81,7 @@ def run_backtest_and_report(df, strategy_func, strategy_name, timeframe, suffix=
         print(f"⚠️ Data too short for {strategy_name} {timeframe} {suffix}. Skipping.")
         return
 
+    data_hash = data_fingerprint(df)
     try:
         df = strategy_func(df)
     except Exception as e:
@@ -58,7 +99,9 @@ def run_backtest_and_report(df, strategy_func, strategy_name, timeframe, suffix=
         initial_capital=INITIAL_CAPITAL,
         stop_loss_pct=STOP_LOSS_PCT,
         take_profit_pct=TAKE_PROFIT_PCT,
-        trading_fee_pct=TRADING_FEE_PCT
+        trading_fee_pct=TRADING_FEE_PCT,
+        compact=True,
+        sparse_equity=True
     )
 
     metrics = calculate_metrics(
@@ -73,15 +116,28 @@ def run_backtest_and_report(df, strategy_func, strategy_name, timeframe, suffix=
     print_metrics(metrics, name=f"{strategy_name} {timeframe} {suffix}")
     print(f"💸 Total Trading Fees: {total_fees:.4f} USD\n")
 
+    run_id = create_run(
+        f"{strategy_name} {suffix}".strip(),
+        params=params,
+        symbol=SYMBOL,
+        timeframe=timeframe,
+        data_hash=data_hash
+    )
+    save_trades(trade_log, run_id)
+    save_metrics(metrics, datetime.now().isoformat(), run_id)
+
     output_folder = create_output_folder(strategy_name=f"{strategy_name}_{timeframe}_{suffix}".strip('_'))
 
+    run_config = {"params": params, "symbol": SYMBOL, "data_hash": data_hash}
     save_results(
         strategy_name=f"{strategy_name}_{timeframe}_{suffix}".strip('_'),
         trade_log=trade_log,
         metrics=metrics,
         capital_over_time=capital_over_time,
-        output_dir=output_folder
+        output_dir=output_folder,
+        config=run_config
     )
+    record_run(output_folder, metrics, trade_count=len(trade_log), **run_config)
 
     try:
         plot_price_chart_with_indicators(
@@ -101,6 +157,42 @@ def run_backtest_and_report(df, strategy_func, strategy_name, timeframe, suffix=
         print(f"⚠️ Plotting error: {e}")
 
     print("\n" + "=" * 50 + "\n")
+    return output_folder
+
+
+def run_jobs(run_job, jobs, max_workers=MAX_WORKERS):
+    """
+    اجرای jobهای مستقل (timeframe, sample) با یک pool محدود از پروسه‌ها
+
+    پارامترها:
+    - run_job: تابع قابل pickle (مثل functools.partial روی run_backtest_and_report)
+    - jobs: لیست (df, timeframe, suffix)
+    - max_workers: حداکثر پروسه‌های هم‌زمان (1 یعنی اجرای ترتیبی)
+
+    مثل اجرای ترتیبی، خطای یک job به فراخواننده می‌رسد؛ در حالت pool بقیه jobها
+    تمام می‌شوند و بعد اولین خطا دوباره raise می‌شود.
+    """
+    workers = min(max_workers, len(jobs), os.cpu_count() or 1)
+    if workers <= 1:
+        for df, tf, suffix in jobs:
+            print(f"\n{'=' * 50}\nBacktest for timeframe: {tf} ({suffix})\n{'=' * 50}\n")
+            run_job(df, timeframe=tf, suffix=suffix)
+        return
+
+    failures = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_job, df, timeframe=tf, suffix=suffix): (tf, suffix) for df, tf, suffix in jobs}
+        for future in as_completed(futures):
+            tf, suffix = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"❌ Error in backtest job {tf} {suffix}: {e}")
+                failures.append(e)
+
+    if failures:
+        print(f"❌ {len(failures)} of {len(jobs)} backtest jobs failed.")
+        raise failures[0]
 
 
 def main():
@@ -110,7 +202,10 @@ def main():
     print("Database initialized.")
     print("=" * 50 + "\n")
 
-    df_original = get_data(SYMBOL, interval=INTERVAL, period=PERIOD)
+    with profile_run("data") as data_profiler:
+        df_original = get_data(SYMBOL, interval=INTERVAL, period=PERIOD)
+    if data_profiler is not None:
+        print_profile_summary(data_profiler, name="data")
 
     if df_original is None or df_original.empty or len(df_original) < 20:
         print("⚠️ Data not available or too short.")
@@ -120,9 +215,10 @@ def main():
     print("1: Run a single strategy")
     print("2: Parameter tuning (Grid Search) for Supertrend + RSI")
     print("3: Walk-forward validation")
+    print("4: Paper trading (replay of downloaded bars)")
 
     try:
-        mode = input("Enter mode (1, 2 or 3): ").strip()
+        mode = input("Enter mode (1, 2, 3 or 4): ").strip()
     except EOFError:
         mode = '1'
 
@@ -135,16 +231,20 @@ def main():
             "supertrend_multiplier": [2, 3]
         }
 
-        best, all_results = param_tuner(
-            df_original,
-            supertrend_rsi_strategy,
-            param_grid,
-            initial_capital=INITIAL_CAPITAL,
-            stop_loss_pct=STOP_LOSS_PCT,
-            take_profit_pct=TAKE_PROFIT_PCT,
-            trading_fee_pct=TRADING_FEE_PCT,
-            timeframe_minutes=convert_interval_to_minutes(INTERVAL)
-        )
+        with profile_run("param_tuner") as profiler:
+            best, all_results = param_tuner(
+                df_original,
+                supertrend_rsi_strategy,
+                param_grid,
+                initial_capital=INITIAL_CAPITAL,
+                stop_loss_pct=STOP_LOSS_PCT,
+                take_profit_pct=TAKE_PROFIT_PCT,
+                trading_fee_pct=TRADING_FEE_PCT,
+                timeframe_minutes=convert_interval_to_minutes(INTERVAL)
+            )
+        if profiler is not None:
+            print_profile_summary(profiler, name="param_tuner")
+            profiler.save(create_output_folder(strategy_name="param_tuner_profile"))
 
         if best:
             print("\n=== Best Parameter Set ===")
@@ -161,57 +261,83 @@ def main():
             "supertrend_multiplier": [2, 3]
         }
 
-        results = walk_forward_validation(
-            df_original,
-            supertrend_rsi_strategy,
-            param_grid=param_grid,
-            n_splits=5,
-            initial_capital=INITIAL_CAPITAL,
-            stop_loss_pct=STOP_LOSS_PCT,
-            take_profit_pct=TAKE_PROFIT_PCT,
-            trading_fee_pct=TRADING_FEE_PCT,
-            timeframe_minutes=convert_interval_to_minutes(INTERVAL),
-            verbose=True
-        )
+        with profile_run("walkforward") as profiler:
+            results = walk_forward_validation(
+                df_original,
+                supertrend_rsi_strategy,
+                param_grid=param_grid,
+                n_splits=5,
+                initial_capital=INITIAL_CAPITAL,
+                stop_loss_pct=STOP_LOSS_PCT,
+                take_profit_pct=TAKE_PROFIT_PCT,
+                trading_fee_pct=TRADING_FEE_PCT,
+                timeframe_minutes=convert_interval_to_minutes(INTERVAL),
+                verbose=True
+            )
+        if profiler is not None:
+            print_profile_summary(profiler, name="walkforward")
+            profiler.save(create_output_folder(strategy_name="walkforward_profile"))
 
         print("\n=== Walk-Forward Validation Results ===")
         for res in results:
             print(res)
         return
 
+    if mode == '4':
+        final_capital, trade_log, capital_over_time, _ = run_paper_trading(
+            ReplayFeed(df_original),
+            initial_capital=INITIAL_CAPITAL,
+            stop_loss_pct=STOP_LOSS_PCT,
+            take_profit_pct=TAKE_PROFIT_PCT,
+            trading_fee_pct=TRADING_FEE_PCT
+        )
+        metrics = calculate_metrics(
+            capital_over_time,
+            trade_log,
+            initial_capital=INITIAL_CAPITAL,
+            timeframe_minutes=convert_interval_to_minutes(INTERVAL)
+        )
+        print_metrics(metrics, name="Paper Trading")
+        return
+
     try:
         strategy_choice = input("Choose strategy (1: Supertrend+RSI, 2: Advanced): ").strip()
     except EOFError:
         strategy_choice = '1'
 
     if strategy_choice == '2':
-        strategy_func = lambda df: advanced_strategy(
-            df,
+        strategy_params = dict(
             rsi_window=7,
             supertrend_period=ADV_SUPERTREND_PERIOD,
             supertrend_multiplier=ADV_SUPERTREND_MULTIPLIER
         )
+        strategy_func = partial(advanced_strategy, **strategy_params)
         strategy_name = "Advanced Strategy"
     else:
-        strategy_func = lambda df: supertrend_rsi_strategy(
-            df,
+        strategy_params = dict(
             rsi_period=14,
             rsi_buy_threshold=30,
             rsi_sell_threshold=70,
             supertrend_period=SUPERTREND_PERIOD,
             supertrend_multiplier=SUPERTREND_MULTIPLIER
         )
+        strategy_func = partial(supertrend_rsi_strategy, **strategy_params)
         strategy_name = "Supertrend + RSI"
 
     timeframes = ['5T', '15T', '1H', '1D']
+    # همه تایم‌فریم‌ها یک بار از کندل‌های پایه ساخته می‌شوند
+    pyramid = BarPyramid(df_original)
+    levels = pyramid.build(timeframes)
+
+    jobs = []
     for tf in timeframes:
-        print(f"\n{'=' * 50}\nBacktest for timeframe: {tf}\n{'=' * 50}\n")
-        df_tf = df_original.copy() if tf == INTERVAL else resample_data(df_original, tf)
-        df_in_sample, df_out_sample = split_data_for_out_of_sample(df_tf)
-        print(f"Data split — In: {len(df_in_sample)}, Out: {len(df_out_sample)}")
+        df_in_sample, df_out_sample = split_data_for_out_of_sample(levels[tf])
+        print(f"Data split ({tf}) — In: {len(df_in_sample)}, Out: {len(df_out_sample)}")
+        jobs.append((df_in_sample, tf, "In-Sample"))
+        jobs.append((df_out_sample, tf, "Out-of-Sample"))
 
-        run_backtest_and_report(df_in_sample, strategy_func, strategy_name, tf, suffix="In-Sample")
-        run_backtest_and_report(df_out_sample, strategy_func, strategy_name, tf, suffix="Out-of-Sample")
+    run_job = partial(run_backtest_and_report, strategy_func=strategy_func, strategy_name=strategy_name, params=strategy_params)
+    run_jobs(run_job, jobs)
 
     print("✅ All backtests completed.")
 
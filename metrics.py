@@ -1,105 +1,113 @@
 import numpy as np
 import pandas as pd
 
-def calculate_metrics(capital_over_time, trade_log, initial_capital=1000, timeframe_minutes=5):
-    df = pd.DataFrame(capital_over_time, columns=['Time', 'Capital'])
-    df['Time'] = pd.to_datetime(df['Time'])
-    df.set_index('Time', inplace=True)
-    df = df.sort_index()
-
-    if df.empty:
-        return {k: 0 for k in [
-            "Total Return (%)", "Annualized Return (%)", "Max Drawdown (%)", "Sharpe Ratio",
-            "Sortino Ratio", "Calmar Ratio", "Expectancy", "Std Dev of Returns",
-            "Avg Win / Avg Loss", "Max Consecutive Wins", "Max Consecutive Losses",
-            "Win Rate (%)", "Profit Factor", "Average Trade Return (%)"
-        ]}
+from results import TradeLog, EquityCurve, SparseEquityCurve
+from utils.profiling import profiled
+
+# ترتیب کلیدهای خروجی calculate_metrics
+METRIC_KEYS = [
+    "Total Return (%)", "Annualized Return (%)", "Max Drawdown (%)", "Sharpe Ratio",
+    "Sortino Ratio", "Calmar Ratio", "Expectancy", "Std Dev of Returns",
+    "Avg Win / Avg Loss", "Max Consecutive Wins", "Max Consecutive Losses",
+    "Win Rate (%)", "Profit Factor", "Average Trade Return (%)",
+]
+
+_NS_PER_US = 1000
+
+
+def _empty_metrics():
+    return {k: 0 for k in METRIC_KEYS}
+
+
+def _to_ns(value):
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    ts = pd.Timestamp(value)
+    if ts.tz is not None:
+        ts = ts.tz_convert('UTC').tz_localize(None)
+    return ts.as_unit('ns').value
+
+
+def _std(values, axis_sum, count, mask=None):
+    """
+    انحراف معیار نمونه‌ای (ddof=1) هر سطر با همان ترتیب عملیات pandas؛ برای count <= 1 مقدار NaN
+
+    mask (اختیاری) خانه‌های شمرده‌شده هر سطر است؛ بقیه در جمع انحراف‌ها صفر حساب می‌شوند
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg = axis_sum / count
+        # یک ماتریس موقت (درجا) به جای سه کپی (curves, bars)
+        deviation = np.subtract(avg[:, None], values)
+        np.square(deviation, out=deviation)
+        if mask is not None:
+            np.copyto(deviation, 0.0, where=~mask)
+        var = deviation.sum(axis=1) / (count - 1)
+    return np.where(count > 1, np.sqrt(np.where(count > 1, var, 0.0)), np.nan)
+
 
+def _equity_metrics(equity, start_ns, end_ns, initial_capital, timeframe_minutes, returns=None):
+    """
+    متریک‌های منحنی سرمایه برای ماتریس (curves, bars)؛ هر سطر یک منحنی
+
+    returns (اختیاری) بازده‌های کندل به کندل هر سطر است؛ برای SparseEquityCurve، equity فقط
+    نقاط تغییر است (سرمایه نهایی و Max Drawdown روی آن‌ها همان مقدار منحنی کامل است) و
+    بازده‌ها از SparseEquityCurve.returns می‌آیند
+    """
     # 📈 Total Return
-    final_capital = df['Capital'].iloc[-1]
+    final_capital = equity[:, -1]
     total_return = (final_capital / initial_capital - 1) * 100
 
-    # 🕒 Annualized Return
-    days = (df.index[-1] - df.index[0]).total_seconds() / (3600 * 24)
+    # 🕒 Annualized Return (مثل Timedelta.total_seconds با دقت میکروثانیه)
+    days = ((end_ns - start_ns) // _NS_PER_US / 1e6) / (3600 * 24)
     years = days / 365.25
 
-    annualized_return = 0
+    annualized_return = np.zeros(len(equity))
     if years > 0:
-        with np.errstate(over='ignore'):
+        with np.errstate(over='ignore', invalid='ignore'):
             val = (final_capital / initial_capital) ** (1 / years) - 1
-            if np.isfinite(val):
-                annualized_return = val * 100
-            else:
-                annualized_return = float('inf')
+        annualized_return = np.where(np.isfinite(val), val * 100, float('inf'))
 
-    # 📉 Max Drawdown
-    roll_max = df['Capital'].cummax()
-    drawdown = (df['Capital'] - roll_max) / roll_max
-    max_drawdown = drawdown.min() * 100
+    # 📉 Max Drawdown (NaNها مثل cummax پانداس نادیده گرفته می‌شوند)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        roll_max = np.fmax.accumulate(equity, axis=1)
+        roll_max[np.isnan(equity)] = np.nan
+        drawdown = (equity - roll_max) / roll_max
+    missing = np.isnan(drawdown)
+    max_drawdown = np.where(missing.all(axis=1), np.nan, np.where(missing, np.inf, drawdown).min(axis=1)) * 100
+    del roll_max, drawdown, missing  # ماتریس‌های (curves, bars) تا پایان تابع نگه داشته نشوند
 
     # 📊 Sharpe Ratio
-    returns = df['Capital'].pct_change().dropna()
+    if returns is None:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            returns = equity[:, 1:] / equity[:, :-1] - 1
+    valid = ~np.isnan(returns)
+    if valid.all():
+        mask = None
+        count = np.full(len(equity), returns.shape[1])
+    else:
+        # مثل dropna: بازده‌های نامعتبر با ماسک از جمع‌ها کنار گذاشته می‌شوند (بدون حلقه روی منحنی‌ها)
+        mask = valid
+        count = valid.sum(axis=1)
+        returns = np.where(valid, returns, 0.0)
+    returns_sum = returns.sum(axis=1)
+    std = _std(returns, returns_sum, count, mask)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = returns_sum / count
+
     periods_per_year = (60 / timeframe_minutes) * 24 * 252  # 252 روز معاملاتی در سال
-    sharpe_ratio = (returns.mean() / returns.std()) * np.sqrt(periods_per_year) if returns.std() != 0 else 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe_ratio = np.where(std != 0, (mean / std) * np.sqrt(periods_per_year), 0)
 
     # Sortino Ratio (فقط از بازده‌های منفی برای محاسبه واریانس استفاده می‌کنیم)
-    negative_returns = returns[returns < 0]
-    downside_std = negative_returns.std()
-    sortino_ratio = (returns.mean() / downside_std) * np.sqrt(periods_per_year) if downside_std != 0 else 0
+    negative = returns < 0
+    negative_returns = np.where(negative, returns, 0.0)
+    downside_std = _std(negative_returns, negative_returns.sum(axis=1), negative.sum(axis=1), negative)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sortino_ratio = np.where(downside_std != 0, (mean / downside_std) * np.sqrt(periods_per_year), 0)
 
     # Calmar Ratio = Annualized Return / -Max Drawdown (اگر Max Drawdown صفر یا مثبت باشه 0)
-    calmar_ratio = annualized_return / (-max_drawdown) if max_drawdown < 0 else 0
-
-    # Std Deviation of Returns
-    std_dev_returns = returns.std()
-
-    # محاسبه Expectancy = (Avg Win * Win Rate) - (Avg Loss * Loss Rate)
-    wins, losses = 0, 0
-    gross_profit = 0
-    gross_loss = 0
-    profit_sum = 0
-    trade_count = 0
-
-    consecutive_wins = 0
-    max_consecutive_wins = 0
-    consecutive_losses = 0
-    max_consecutive_losses = 0
-
-    for trade in trade_log:
-        if not isinstance(trade, dict):
-            continue
-        profit_pct = trade.get('profit_pct')
-        if profit_pct is None:
-            continue
-
-        trade_count += 1
-        profit_sum += profit_pct
-
-        if profit_pct > 0:
-            wins += 1
-            gross_profit += profit_pct
-            consecutive_wins += 1
-            consecutive_losses = 0
-            if consecutive_wins > max_consecutive_wins:
-                max_consecutive_wins = consecutive_wins
-        else:
-            losses += 1
-            gross_loss += abs(profit_pct)
-            consecutive_losses += 1
-            consecutive_wins = 0
-            if consecutive_losses > max_consecutive_losses:
-                max_consecutive_losses = consecutive_losses
-
-    win_rate = (wins / trade_count) if trade_count > 0 else 0
-    loss_rate = 1 - win_rate
-
-    avg_win = (gross_profit / wins) if wins > 0 else 0
-    avg_loss = (gross_loss / losses) if losses > 0 else 0
-
-    expectancy = (avg_win * win_rate) - (avg_loss * loss_rate)
-
-    profit_factor = (gross_profit / gross_loss) if gross_loss > 0 else float('inf')
-    avg_trade_return = (profit_sum / trade_count) if trade_count > 0 else 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        calmar_ratio = np.where(max_drawdown < 0, annualized_return / -max_drawdown, 0)
 
     return {
         "Total Return (%)": total_return,
@@ -108,12 +116,168 @@ def calculate_metrics(capital_over_time, trade_log, initial_capital=1000, timefr
         "Sharpe Ratio": sharpe_ratio,
         "Sortino Ratio": sortino_ratio,
         "Calmar Ratio": calmar_ratio,
+        "Std Dev of Returns": std,
+    }
+
+
+def _trade_metrics(columns, profits, n_curves):
+    """
+    متریک‌های معاملات؛ columns شماره منحنی هر معامله (مرتب و به ترتیب زمانی در هر منحنی)
+    """
+    win = profits > 0
+    trade_count = np.bincount(columns, minlength=n_curves)
+    wins = np.bincount(columns[win], minlength=n_curves)
+    losses = trade_count - wins
+
+    # bincount جمع را به ترتیب ورودی انجام می‌دهد؛ همان جمع ترتیبی حلقه قبلی
+    gross_profit = np.bincount(columns, weights=np.where(win, profits, 0.0), minlength=n_curves)
+    gross_loss = np.bincount(columns, weights=np.where(win, 0.0, np.abs(profits)), minlength=n_curves)
+    profit_sum = np.bincount(columns, weights=profits, minlength=n_curves)
+
+    # بیشترین برد/باخت پیاپی: طول هر دنباله هم‌علامت در هر منحنی
+    max_wins = np.zeros(n_curves, dtype=np.int64)
+    max_losses = np.zeros(n_curves, dtype=np.int64)
+    if len(profits):
+        starts = np.flatnonzero(np.r_[True, (columns[1:] != columns[:-1]) | (win[1:] != win[:-1])])
+        lengths = np.diff(np.r_[starts, len(profits)])
+        run_columns = columns[starts]
+        run_win = win[starts]
+        np.maximum.at(max_wins, run_columns[run_win], lengths[run_win])
+        np.maximum.at(max_losses, run_columns[~run_win], lengths[~run_win])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        win_rate = np.where(trade_count > 0, wins / np.maximum(trade_count, 1), 0)
+        loss_rate = 1 - win_rate
+
+        avg_win = np.where(wins > 0, gross_profit / np.maximum(wins, 1), 0)
+        avg_loss = np.where(losses > 0, gross_loss / np.maximum(losses, 1), 0)
+
+        expectancy = (avg_win * win_rate) - (avg_loss * loss_rate)
+
+        profit_factor = np.where(gross_loss > 0, gross_profit / np.where(gross_loss > 0, gross_loss, 1), float('inf'))
+        avg_trade_return = np.where(trade_count > 0, profit_sum / np.maximum(trade_count, 1), 0)
+        avg_win_loss = np.where(avg_loss != 0, avg_win / np.where(avg_loss != 0, avg_loss, 1), float('inf'))
+
+    return {
         "Expectancy": expectancy,
-        "Std Dev of Returns": std_dev_returns,
-        "Avg Win / Avg Loss": (avg_win / avg_loss) if avg_loss != 0 else float('inf'),
-        "Max Consecutive Wins": max_consecutive_wins,
-        "Max Consecutive Losses": max_consecutive_losses,
+        "Avg Win / Avg Loss": avg_win_loss,
+        "Max Consecutive Wins": max_wins,
+        "Max Consecutive Losses": max_losses,
         "Win Rate (%)": win_rate * 100,
         "Profit Factor": profit_factor,
         "Average Trade Return (%)": avg_trade_return,
-    }
\ No newline at end of file
+    }
+
+
+def _trade_columns(trade_profits, n_curves):
+    """
+    تبدیل ورودی معاملات به (columns, profits)
+    - لیست آرایه‌های بازده (یکی برای هر منحنی)
+    - یا جدول معاملات run_backtest_batch / backtest_batch_kernel (فقط معاملات بسته)
+    """
+    if trade_profits is None:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    if isinstance(trade_profits, dict):
+        closed = trade_profits["exit_idx"] != -1
+        columns = trade_profits["column"][closed]
+        profits = trade_profits["profit_pct"][closed]
+        order = np.argsort(columns, kind='stable')
+        return columns[order], profits[order].astype(np.float64)
+
+    profits = [np.asarray(p, dtype=np.float64) for p in trade_profits]
+    if len(profits) != n_curves:
+        raise ValueError("❌ Error: one trade-return vector is needed per equity curve")
+    columns = np.repeat(np.arange(n_curves), [len(p) for p in profits])
+    return columns, (np.concatenate(profits) if profits else np.empty(0))
+
+
+@profiled("metrics")
+def batch_metrics(
+    equity,
+    trade_profits=None,
+    start_time=0,
+    end_time=0,
+    initial_capital=1000,
+    timeframe_minutes=5
+):
+    """
+    محاسبه برداری همه متریک‌های calculate_metrics برای یک یا چند منحنی سرمایه
+
+    پارامترها:
+    - equity: آرایه (bars,) یا (bars, curves) سرمایه در هر کندل (محور زمانی مشترک)
+    - trade_profits: لیست آرایه‌های profit_pct معاملات بسته هر منحنی (به ترتیب زمانی)
+      یا جدول trades خروجی run_backtest_batch
+    - start_time, end_time: زمان اولین و آخرین کندل (Timestamp یا int64 نانوثانیه)
+
+    خروجی:
+    DataFrame با یک سطر برای هر منحنی و ستون‌های METRIC_KEYS
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    if equity.ndim == 1:
+        equity = equity[:, None]
+    n_bars, n_curves = equity.shape
+
+    if n_bars == 0:
+        return pd.DataFrame([_empty_metrics() for _ in range(n_curves)])
+
+    # هر سطر یک منحنی پیوسته در حافظه تا جمع‌ها مثل pandas به صورت pairwise انجام شوند
+    curves = np.ascontiguousarray(equity.T)
+    table = _equity_metrics(curves, _to_ns(start_time), _to_ns(end_time), initial_capital, timeframe_minutes)
+    table.update(_trade_metrics(*_trade_columns(trade_profits, n_curves), n_curves))
+    return pd.DataFrame({key: table[key] for key in METRIC_KEYS})
+
+
+def _sparse_metrics(curve, profits, initial_capital, timeframe_minutes):
+    """
+    متریک‌های SparseEquityCurve بدون بازسازی منحنی کامل سرمایه:
+    سرمایه نهایی، Max Drawdown و بازه زمانی از نقاط تغییر و بازده‌ها از curve.returns()
+    """
+    returns = curve.returns().to_numpy(dtype=np.float64)
+    table = _equity_metrics(
+        curve.values[None, :], int(curve.times[0]), int(curve.times[-1]),
+        initial_capital, timeframe_minutes, returns=returns[None, :]
+    )
+    table.update(_trade_metrics(*_trade_columns([profits], 1), 1))
+    return pd.DataFrame({key: table[key] for key in METRIC_KEYS})
+
+
+def metrics_records(table):
+    """تبدیل خروجی batch_metrics به لیست دیکشنری‌ها (مقادیر پایتونی)"""
+    columns = {key: table[key].tolist() for key in table.columns}
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+@profiled("metrics")
+def calculate_metrics(capital_over_time, trade_log, initial_capital=1000, timeframe_minutes=5):
+    sparse = isinstance(capital_over_time, SparseEquityCurve)
+    if sparse:
+        times, values = capital_over_time.times, capital_over_time.values
+    elif isinstance(capital_over_time, EquityCurve):
+        times, values = capital_over_time.times, capital_over_time.values
+    elif len(capital_over_time):
+        raw_times, values = zip(*capital_over_time)
+        index = pd.DatetimeIndex(pd.to_datetime(list(raw_times)))
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        times = index.as_unit('ns').asi8
+        values = np.array(values, dtype=np.float64)
+        if len(times) > 1 and (np.diff(times) < 0).any():
+            order = np.argsort(times, kind='stable')
+            times, values = times[order], values[order]
+    else:
+        times, values = np.empty(0, dtype=np.int64), np.empty(0)
+
+    if len(values) == 0:
+        return _empty_metrics()
+
+    if isinstance(trade_log, TradeLog):
+        profits = trade_log.closed["profit_pct"]
+    else:
+        profits = [trade.get('profit_pct') for trade in trade_log if isinstance(trade, dict)]
+        profits = np.array([p for p in profits if p is not None], dtype=np.float64)
+
+    if sparse:
+        table = _sparse_metrics(capital_over_time, profits, initial_capital, timeframe_minutes)
+    else:
+        table = batch_metrics(values, [profits], times[0], times[-1], initial_capital, timeframe_minutes)
+    return metrics_records(table)[0]
@@ -0,0 +1,299 @@
+# panel.py
+
+import numpy as np
+import pandas as pd
+
+from signals import SIGNAL_BUY, SIGNAL_SELL, signal_column, toggle_signals
+
+PANEL_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+
+class Panel:
+    """
+    پنل کندل‌های چند نماد روی یک محور زمانی مشترک: هر ستون OHLCV آرایه (bars, symbols)
+
+    کندل‌های موجود نبودن (نماد در آن زمان معامله نشده یا داده ندارد) NaN هستند.
+    یک کندل وقتی معتبر است که High، Low و Close آن NaN نباشند؛ اندیکاتورهای پنل
+    برای هر نماد فقط روی کندل‌های معتبر همان نماد جلو می‌روند (مثل dropna در نسخه DataFrame).
+    """
+
+    def __init__(self, index, symbols, open=None, high=None, low=None, close=None, volume=None):
+        self.index = pd.DatetimeIndex(index)
+        self.symbols = list(symbols)
+        shape = (len(self.index), len(self.symbols))
+        self.close = _as_panel(close, shape)
+        self.high = _as_panel(high, shape) if high is not None else self.close
+        self.low = _as_panel(low, shape) if low is not None else self.close
+        self.open = _as_panel(open, shape) if open is not None else self.close
+        self.volume = _as_panel(volume, shape) if volume is not None else np.zeros(shape)
+
+    @classmethod
+    def from_frames(cls, frames):
+        """
+        ساخت پنل از دیکشنری {symbol: DataFrame} (مثل خروجی get_data برای هر نماد)
+        روی اجتماع ایندکس‌ها؛ کندل‌های نبودن NaN می‌شوند
+        """
+        symbols = list(frames)
+        index = pd.DatetimeIndex([])
+        for df in frames.values():
+            index = index.union(df.index)
+
+        columns = {}
+        for col in PANEL_COLUMNS:
+            data = np.full((len(index), len(symbols)), np.nan)
+            for j, symbol in enumerate(symbols):
+                df = frames[symbol]
+                if col in df.columns:
+                    data[index.get_indexer(df.index), j] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+            columns[col.lower()] = data
+        return cls(index, symbols, **columns)
+
+    @property
+    def shape(self):
+        return self.close.shape
+
+    @property
+    def valid(self):
+        """ماسک bool کندل‌های معتبر (bars, symbols)"""
+        return ~(np.isnan(self.high) | np.isnan(self.low) | np.isnan(self.close))
+
+    def frame(self, symbol, signals=None):
+        """
+        DataFrame کندل‌های معتبر یک نماد (برای run_backtest / run_backtest_fast)
+
+        پارامترها:
+        - signals: آرایه کد سیگنال پنل (bars, symbols)؛ اگر داده شود ستون 'Signal' اضافه می‌شود
+        """
+        j = self.symbols.index(symbol)
+        rows = self.valid[:, j]
+        df = pd.DataFrame({
+            col: getattr(self, col.lower())[rows, j] for col in PANEL_COLUMNS
+        }, index=self.index[rows])
+        if signals is not None:
+            df['Signal'] = signal_column(np.asarray(signals)[rows, j])
+        return df
+
+
+def _as_panel(values, shape=None):
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    if shape is not None and values.shape != shape:
+        raise ValueError(f"❌ Error: panel array shape {values.shape} does not match {shape}")
+    return values
+
+
+def _valid_mask(high, low, close, valid=None):
+    if valid is not None:
+        return np.asarray(valid, dtype=bool)
+    return ~(np.isnan(high) | np.isnan(low) | np.isnan(close))
+
+
+def panel_rsi(close, window=14, valid=None):
+    """
+    RSI برای همه نمادهای پنل در یک پیمایش زمانی (عملیات برداری روی نمادها)
+
+    پارامترها:
+    - close: آرایه (bars, symbols)
+    - valid: ماسک کندل‌های معتبر (پیش‌فرض: Close غیر NaN)
+
+    خروجی:
+    آرایه (bars, symbols) با همان مقادیر calculate_rsi روی کندل‌های معتبر هر نماد؛ بقیه NaN
+    """
+    close = _as_panel(close)
+    valid = ~np.isnan(close) if valid is None else np.asarray(valid, dtype=bool)
+    n, m = close.shape
+
+    # همان بازگشت ewm(adjust=False) پانداس که ta.momentum.RSIIndicator استفاده می‌کند
+    alpha = 1 / window
+    old_wt = 1. - alpha
+
+    rsi = np.full((n, m), np.nan)
+    prev_close = np.full(m, np.nan)
+    avg_gain = np.zeros(m)
+    avg_loss = np.zeros(m)
+    count = np.zeros(m, dtype=np.int64)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for i in range(n):
+            v = valid[i]
+            if not v.any():
+                continue
+            diff = close[i] - prev_close
+            # کندل اول هر نماد diff ندارد: gain=0.0 و loss=-0.0 مثل ta
+            gain = np.where(diff > 0, diff, 0.0)
+            loss = np.where(diff < 0, -diff, -0.0)
+
+            first = count == 0
+            new_gain = np.where(first | (avg_gain == gain), np.where(first, gain, avg_gain),
+                                (old_wt * avg_gain + alpha * gain) / (old_wt + alpha))
+            new_loss = np.where(first | (avg_loss == loss), np.where(first, loss, avg_loss),
+                                (old_wt * avg_loss + alpha * loss) / (old_wt + alpha))
+
+            avg_gain = np.where(v, new_gain, avg_gain)
+            avg_loss = np.where(v, new_loss, avg_loss)
+            prev_close = np.where(v, close[i], prev_close)
+            count += v
+
+            value = np.where(avg_loss == 0, 100.0, 100 - (100 / (1 + avg_gain / avg_loss)))
+            rsi[i] = np.where(v & (count >= window), value, np.nan)
+
+    return rsi
+
+
+def panel_atr(high, low, close, period=14, valid=None):
+    """
+    ATR (Wilder) برای همه نمادهای پنل؛ همان مقادیر compute_atr روی کندل‌های معتبر هر نماد
+
+    خروجی:
+    آرایه (bars, symbols)؛ period-1 کندل معتبر اول هر نماد صفر و کندل‌های نامعتبر NaN
+    """
+    high, low, close = _as_panel(high), _as_panel(low), _as_panel(close)
+    valid = _valid_mask(high, low, close, valid)
+    n, m = close.shape
+
+    atr_out = np.full((n, m), np.nan)
+    prev_close = np.full(m, np.nan)
+    atr = np.zeros(m)
+    count = np.zeros(m, dtype=np.int64)
+    # True Rangeهای دوره اول هر نماد (هر سطر پیوسته تا میانگین مثل np.mean یک‌بعدی جمع شود)
+    warmup = np.zeros((m, period))
+
+    for i in range(n):
+        v = valid[i]
+        if not v.any():
+            continue
+        h, l = high[i], low[i]
+        true_range = np.fmax(np.fmax(h - l, np.abs(h - prev_close)), np.abs(l - prev_close))
+
+        count += v
+        cols = np.flatnonzero(v & (count <= period))
+        warmup[cols, count[cols] - 1] = true_range[cols]
+
+        ready = np.flatnonzero(v & (count == period))
+        if len(ready):
+            atr[ready] = warmup[ready].mean(axis=1)
+
+        wilder = v & (count > period)
+        atr = np.where(wilder, (atr * (period - 1) + true_range) / float(period), atr)
+        prev_close = np.where(v, close[i], prev_close)
+        atr_out[i] = np.where(v, atr, np.nan)
+
+    return atr_out
+
+
+def panel_supertrend(high, low, close, period=10, multiplier=3, valid=None):
+    """
+    Supertrend برای همه نمادهای پنل؛ همان خروجی calculate_supertrend روی کندل‌های معتبر هر نماد
+    (نمادهایی با کمتر از period کندل معتبر مثل نسخه DataFrame روند True و باند NaN دارند)
+
+    خروجی:
+    (trend, upperband, lowerband)؛ trend آرایه bool که روی کندل‌های نامعتبر False است
+    """
+    high, low, close = _as_panel(high), _as_panel(low), _as_panel(close)
+    valid = _valid_mask(high, low, close, valid)
+    n, m = close.shape
+
+    atr = panel_atr(high, low, close, period, valid)
+    hl2 = (high + low) / 2
+    upperband = hl2 + multiplier * atr
+    lowerband = hl2 - multiplier * atr
+
+    trend_out = np.zeros((n, m), dtype=bool)
+    trend = np.ones(m, dtype=bool)
+    prev_upper = np.full(m, np.nan)
+    prev_lower = np.full(m, np.nan)
+
+    for i in range(n):
+        v = valid[i]
+        c = close[i]
+        # مقایسه با NaN (کندل اول هر نماد) False است و روند True اولیه حفظ می‌شود
+        up = v & (c > prev_upper)
+        down = v & (c < prev_lower) & ~up
+        trend = (trend | up) & ~down
+        prev_upper = np.where(v, upperband[i], prev_upper)
+        prev_lower = np.where(v, lowerband[i], prev_lower)
+        trend_out[i] = trend & v
+
+    short = valid.sum(axis=0) < period
+    if short.any():
+        trend_out[:, short] = valid[:, short]
+        upperband[:, short] = np.nan
+        lowerband[:, short] = np.nan
+
+    return trend_out, upperband, lowerband
+
+
+def _not_first_bar(valid):
+    # کندل معتبر اول هر نماد در نسخه DataFrame هیچ‌وقت سیگنال ندارد (حلقه از ردیف 1 شروع می‌شود)
+    return valid & (np.cumsum(valid, axis=0) > 1)
+
+
+def panel_supertrend_rsi_signals(rsi, trend, valid, rsi_buy_threshold=30, rsi_sell_threshold=70):
+    """
+    مرحله سیگنال Supertrend + RSI برای همه نمادها؛ وضعیت پوزیشن هر نماد با signals.toggle_signals (بدون حلقه)
+
+    خروجی:
+    آرایه int8 کد سیگنال (bars, symbols)
+    """
+    eligible = _not_first_bar(valid) & ~np.isnan(rsi)
+    with np.errstate(invalid='ignore'):
+        buy_ready = eligible & (rsi < rsi_buy_threshold) & trend
+        sell_ready = eligible & ((rsi > rsi_sell_threshold) | ~trend)
+    return toggle_signals(buy_ready, sell_ready)
+
+
+def panel_advanced_signals(rsi, trend, valid):
+    """
+    مرحله سیگنال استراتژی پیشرفته برای همه نمادها (بدون وضعیت؛ کاملاً برداری)
+
+    خروجی:
+    آرایه int8 کد سیگنال (bars, symbols)
+    """
+    eligible = _not_first_bar(valid)
+    with np.errstate(invalid='ignore'):
+        buy = eligible & (rsi < 40) & trend
+        sell = eligible & (rsi > 75) & ~trend & ~buy
+    codes = np.zeros(rsi.shape, dtype=np.int8)
+    codes[buy] = SIGNAL_BUY
+    codes[sell] = SIGNAL_SELL
+    return codes
+
+
+def _panel_indicators(panel, rsi_window, supertrend_period, supertrend_multiplier):
+    valid = panel.valid
+    rsi = panel_rsi(panel.close, rsi_window, valid)
+    trend, upperband, lowerband = panel_supertrend(
+        panel.high, panel.low, panel.close, supertrend_period, supertrend_multiplier, valid
+    )
+    return valid, rsi, trend
+
+
+def supertrend_rsi_panel(
+    panel,
+    rsi_period=14,
+    rsi_buy_threshold=30,
+    rsi_sell_threshold=70,
+    supertrend_period=10,
+    supertrend_multiplier=3
+):
+    """
+    استراتژی Supertrend + RSI روی کل پنل در یک پیمایش
+
+    خروجی:
+    دیکشنری با آرایه‌های (bars, symbols): 'RSI'، 'Supertrend' و 'Signal' (کد int8)
+    """
+    valid, rsi, trend = _panel_indicators(panel, rsi_period, supertrend_period, supertrend_multiplier)
+    codes = panel_supertrend_rsi_signals(rsi, trend, valid, rsi_buy_threshold, rsi_sell_threshold)
+    return {"RSI": rsi, "Supertrend": trend, "Signal": codes}
+
+
+def advanced_panel(panel, rsi_window=7, supertrend_period=7, supertrend_multiplier=2):
+    """
+    استراتژی پیشرفته روی کل پنل در یک پیمایش
+
+    خروجی:
+    دیکشنری با آرایه‌های (bars, symbols): 'RSI'، 'Supertrend' و 'Signal' (کد int8)
+    """
+    valid, rsi, trend = _panel_indicators(panel, rsi_window, supertrend_period, supertrend_multiplier)
+    return {"RSI": rsi, "Supertrend": trend, "Signal": panel_advanced_signals(rsi, trend, valid)}
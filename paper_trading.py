@@ -0,0 +1,337 @@
+# paper_trading.py
+
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime
+from uuid import uuid4
+
+import pandas as pd
+
+from backtest import enter_trade, exit_trade
+from database import connect_paper_db, load_paper_equity, save_paper_fills, save_paper_equity
+from streaming import StreamingRSI, StreamingSupertrend
+from store import BAR_COLUMNS, MappedBars
+from config import (
+    INITIAL_CAPITAL, STOP_LOSS_PCT, TAKE_PROFIT_PCT, TRADING_FEE_PCT,
+    RSI_PERIOD, RSI_BUY_THRESHOLD, RSI_SELL_THRESHOLD,
+    SUPERTREND_PERIOD, SUPERTREND_MULTIPLIER
+)
+
+
+# ==========================
+# 📡 Bar feeds
+# ==========================
+
+class BarFeed(ABC):
+    """
+    منبع کندل برای حلقه معاملات کاغذی
+
+    هر feed یک iterable از تاپل‌های (time, open, high, low, close, volume) است
+    (time یک Timestamp). آداپتور صرافی کافی است __iter__ را پیاده‌سازی کند.
+    """
+
+    @abstractmethod
+    def __iter__(self):
+        """کندل‌ها را به ترتیب زمان yield می‌کند"""
+
+
+class ReplayFeed(BarFeed):
+    """
+    پخش دوباره کندل‌های ذخیره‌شده به ترتیب زمان
+
+    پارامترها:
+    - source: DataFrame با ستون‌های OHLCV، مسیر فایل CSV یا MappedBars
+    - delay: مکث بین کندل‌ها به ثانیه (0 یعنی با حداکثر سرعت)
+    """
+
+    def __init__(self, source, delay=0.0):
+        self.source = source
+        self.delay = delay
+
+    def _frame(self):
+        if isinstance(self.source, MappedBars):
+            return self.source.to_frame()
+        if isinstance(self.source, str):
+            # مثل data.py: زمان‌ها همان‌طور که در فایل ذخیره شده‌اند (naive یا با منطقه زمانی) می‌مانند
+            df = pd.read_csv(self.source, index_col=0)
+            df.index = pd.to_datetime(df.index, errors='coerce')
+            df.dropna(inplace=True)
+            return df
+        return self.source
+
+    def __iter__(self):
+        df = self._frame()
+        columns = [df[col].tolist() for col in BAR_COLUMNS]
+        for bar in zip(df.index, *columns):
+            yield bar
+            if self.delay:
+                time.sleep(self.delay)
+
+
+# ==========================
+# 🧠 Incremental strategy
+# ==========================
+
+class SupertrendRSISignals:
+    """
+    نسخه افزایشی supertrend_rsi_signals: هر کندل با هزینه O(1) پردازش می‌شود
+    و همان سیگنال استراتژی Supertrend + RSI روی کل تاریخچه را برمی‌گرداند.
+    """
+
+    def __init__(
+        self,
+        rsi_period=RSI_PERIOD,
+        rsi_buy_threshold=RSI_BUY_THRESHOLD,
+        rsi_sell_threshold=RSI_SELL_THRESHOLD,
+        supertrend_period=SUPERTREND_PERIOD,
+        supertrend_multiplier=SUPERTREND_MULTIPLIER
+    ):
+        self.rsi_buy_threshold = rsi_buy_threshold
+        self.rsi_sell_threshold = rsi_sell_threshold
+        self.rsi = StreamingRSI(rsi_period)
+        self.supertrend = StreamingSupertrend(supertrend_period, supertrend_multiplier)
+        self.position_open = False
+        self.bars = 0
+
+    def update(self, high, low, close):
+        """
+        خروجی:
+        'buy'، 'sell' یا 'hold'
+        """
+        rsi = self.rsi.update(close)
+        supertrend = self.supertrend.update(high, low, close)[0]
+        self.bars += 1
+
+        # مثل نسخه DataFrame: کندل اول و کندل‌های بدون RSI سیگنال ندارند
+        if self.bars == 1 or rsi != rsi:
+            return 'hold'
+
+        if not self.position_open and rsi < self.rsi_buy_threshold and supertrend:
+            self.position_open = True
+            return 'buy'
+        if self.position_open and (rsi > self.rsi_sell_threshold or not supertrend):
+            self.position_open = False
+            return 'sell'
+        return 'hold'
+
+    def get_state(self):
+        return {
+            "rsi_buy_threshold": self.rsi_buy_threshold,
+            "rsi_sell_threshold": self.rsi_sell_threshold,
+            "rsi": self.rsi.get_state(),
+            "supertrend": self.supertrend.get_state(),
+            "position_open": self.position_open,
+            "bars": self.bars,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        signals = cls(rsi_buy_threshold=state["rsi_buy_threshold"], rsi_sell_threshold=state["rsi_sell_threshold"])
+        signals.rsi = StreamingRSI.from_state(state["rsi"])
+        signals.supertrend = StreamingSupertrend.from_state(state["supertrend"])
+        signals.position_open = state["position_open"]
+        signals.bars = state["bars"]
+        return signals
+
+
+# ==========================
+# 📝 Paper trader
+# ==========================
+
+class PaperTrader:
+    """
+    حلقه رویدادمحور معاملات کاغذی: هر کندل سیگنال را به‌روز می‌کند و با همان قوانین
+    run_backtest (enter_trade / exit_trade، حد ضرر، حد سود و کارمزد) معامله می‌کند.
+
+    پارامترها:
+    - signals: شیء با متد update(high, low, close) که 'buy'/'sell'/'hold' برمی‌گرداند
+      (پیش‌فرض SupertrendRSISignals با پارامترهای config)
+    - db_conn: اتصال SQLite (از connect_paper_db)؛ اگر None باشد چیزی ذخیره نمی‌شود
+    - run_id: شناسه متنی اجرا در جدول‌های paper_fills / paper_equity (پیش‌فرض زمان + uuid4)؛
+      جدا از شناسه عددی جدول runs است و اجراهای کاغذی در runs ثبت نمی‌شوند
+    - flush_every: تعداد کندل‌ها بین هر نوشتن دسته‌ای منحنی سرمایه در دیتابیس
+    - history: تعداد آخرین نقاط سرمایه که در حافظه (capital_over_time) نگه داشته می‌شوند؛
+      منحنی کامل در جدول paper_equity است و results() آن را از دیتابیس می‌خواند
+    """
+
+    def __init__(
+        self,
+        signals=None,
+        initial_capital=INITIAL_CAPITAL,
+        stop_loss_pct=STOP_LOSS_PCT,
+        take_profit_pct=TAKE_PROFIT_PCT,
+        trading_fee_pct=TRADING_FEE_PCT,
+        db_conn=None,
+        run_id=None,
+        flush_every=500,
+        history=10_000
+    ):
+        self.signals = signals if signals is not None else SupertrendRSISignals()
+        self.stop_loss_pct = stop_loss_pct
+        self.take_profit_pct = take_profit_pct
+        self.trading_fee_pct = trading_fee_pct
+        self.db_conn = db_conn
+        # پسوند تصادفی: دو اجرای هم‌ثانیه روی یک دیتابیس منحنی‌های همدیگر را نمی‌خوانند
+        self.run_id = run_id or f"paper_{datetime.now():%Y%m%d_%H%M%S}_{uuid4().hex[:12]}"
+        self.flush_every = flush_every
+
+        self.capital = initial_capital
+        self.position = 0.0
+        self.entry_price = 0.0
+        self.stop_loss_price = None
+        self.take_profit_price = None
+        self.total_fees = 0.0
+        self.trade_log = []
+        self.capital_over_time = deque(maxlen=history)
+        self.last_time = None
+        self.last_price = None
+
+        self._pending_fills = []
+        self._pending_equity = []
+
+    def _fill(self, current_time, side, price, fee_cost, reason):
+        self._pending_fills.append(
+            (current_time.isoformat(), side, price, self.position, fee_cost, reason, self.capital)
+        )
+
+    def on_bar(self, current_time, open_price, high, low, close, volume=0.0):
+        """
+        پردازش یک کندل
+
+        خروجی:
+        سیگنال همان کندل ('buy' / 'sell' / 'hold')
+        """
+        sig = self.signals.update(high, low, close)
+        price = float(close)
+        low = float(low)
+        high = float(high)
+
+        if sig == 'buy' and self.position == 0.0:
+            (
+                self.position,
+                self.entry_price,
+                _,
+                self.stop_loss_price,
+                self.take_profit_price,
+                self.capital,
+                fee_cost,
+                trade
+            ) = enter_trade(
+                self.capital, price, self.trading_fee_pct, self.stop_loss_pct, self.take_profit_pct, current_time
+            )
+            self.total_fees += fee_cost
+            self.trade_log.append(trade)
+            self._fill(current_time, 'buy', price, fee_cost, 'buy')
+
+        elif self.position > 0.0:
+            stop_hit = self.stop_loss_price is not None and low <= self.stop_loss_price
+            take_hit = self.take_profit_price is not None and high >= self.take_profit_price
+
+            if stop_hit or take_hit or sig == 'sell':
+                if stop_hit:
+                    self._exit(current_time, self.stop_loss_price, "Stop Loss")
+                elif take_hit:
+                    self._exit(current_time, self.take_profit_price, "Take Profit")
+                else:
+                    self._exit(current_time, price, "Signal Sell")
+
+        equity = self.capital + (self.position * price if self.position > 0.0 else 0.0)
+        self.capital_over_time.append((current_time, equity))
+        self._pending_equity.append((current_time.isoformat(), equity))
+        self.last_time = current_time
+        self.last_price = price
+
+        if self._pending_fills or len(self._pending_equity) >= self.flush_every:
+            self.flush()
+        return sig
+
+    def _exit(self, current_time, exit_price, reason):
+        net_capital, fee_cost = exit_trade(
+            self.position, self.entry_price, exit_price, self.trading_fee_pct, current_time, self.trade_log, reason
+        )
+        self.total_fees += fee_cost
+        self.capital = net_capital
+        self._fill(current_time, 'sell', exit_price, fee_cost, reason)
+
+        self.position = 0.0
+        self.entry_price = 0.0
+        self.stop_loss_price = None
+        self.take_profit_price = None
+
+    def flush(self):
+        """نوشتن fillها و نقاط سرمایه در صف به دیتابیس"""
+        if self.db_conn is None:
+            self._pending_fills.clear()
+            self._pending_equity.clear()
+            return
+        # نقاط سرمایه قبل از fillها نوشته می‌شوند تا ترتیب زمانی در دیتابیس حفظ شود
+        if self._pending_equity:
+            save_paper_equity(self.db_conn, self.run_id, self._pending_equity)
+            self._pending_equity.clear()
+        if self._pending_fills:
+            save_paper_fills(self.db_conn, self.run_id, self._pending_fills)
+            self._pending_fills.clear()
+
+    def results(self):
+        """
+        خروجی:
+        (final_capital, trade_log, capital_over_time, total_fees) مثل run_backtest؛
+        با دیتابیس، capital_over_time کل منحنی ذخیره‌شده این run_id است و بدون آن فقط history نقطه آخر
+        """
+        if self.db_conn is None:
+            capital_over_time = list(self.capital_over_time)
+        else:
+            self.flush()
+            capital_over_time = load_paper_equity(self.db_conn, self.run_id)
+        return self.capital, self.trade_log, capital_over_time, self.total_fees
+
+    def finish(self, final_sell=True):
+        """
+        پایان اجرا: بستن پوزیشن باز با آخرین قیمت (مثل Final Sell در run_backtest) و ذخیره صف
+
+        خروجی:
+        همان results()
+        """
+        if final_sell and self.position > 0.0:
+            self._exit(self.last_time, self.last_price, "Final Sell")
+        self.flush()
+        return self.results()
+
+    def run(self, feed, final_sell=True):
+        """
+        مصرف همه کندل‌های feed و برگرداندن نتیجه finish
+        """
+        for bar in feed:
+            self.on_bar(*bar)
+        return self.finish(final_sell=final_sell)
+
+
+def run_paper_trading(feed, strategy_params=None, db_file=None, run_id=None, verbose=True, **trader_kwargs):
+    """
+    اجرای معاملات کاغذی استراتژی Supertrend + RSI روی یک feed و ذخیره fillها و سرمایه در SQLite
+
+    پارامترها:
+    - strategy_params: پارامترهای SupertrendRSISignals (مثل خروجی param_tuner)
+    - db_file: مسیر دیتابیس (پیش‌فرض database.DB_FILE)
+    - trader_kwargs: initial_capital، stop_loss_pct، take_profit_pct، trading_fee_pct، ...
+
+    خروجی:
+    (final_capital, trade_log, capital_over_time, total_fees)
+    """
+    conn = connect_paper_db(db_file)
+    try:
+        trader = PaperTrader(
+            signals=SupertrendRSISignals(**(strategy_params or {})),
+            db_conn=conn,
+            run_id=run_id,
+            **trader_kwargs
+        )
+        result = trader.run(feed)
+    finally:
+        conn.close()
+
+    if verbose:
+        print(f"📝 Paper trading run '{trader.run_id}' finished: "
+              f"{len(trader.trade_log)} trades, final capital {result[0]:.2f}")
+    return result
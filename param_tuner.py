@@ -1,61 +1,354 @@
+import inspect
 import itertools
-from backtest import run_backtest
-from metrics import calculate_metrics
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtest import run_backtest_fast, run_backtest_batch
+from data import resample_data
+from metrics import calculate_metrics, batch_metrics, metrics_records
+from signals import encode_signals
+from utils.shared import share_frame, cached_attach
+from utils.time import convert_interval_to_minutes
 from config import TRADING_FEE_PCT, INITIAL_CAPITAL, STOP_LOSS_PCT, TAKE_PROFIT_PCT
 
-def param_tuner(
-    df,
-    strategy_func,
-    param_grid,
-    initial_capital=INITIAL_CAPITAL,
-    stop_loss_pct=STOP_LOSS_PCT,
-    take_profit_pct=TAKE_PROFIT_PCT,
-    trading_fee_pct=TRADING_FEE_PCT,
-    timeframe_minutes=60,
-    verbose=True
-):
-    keys = list(param_grid.keys())
-    values = list(param_grid.values())
-    all_combos = list(itertools.product(*values))
+# تعداد ترکیب‌هایی که با هم در یک بک‌تست دسته‌ای اجرا می‌شوند
+BATCH_COLUMNS = 64
 
-    results = []
+# تعداد تسک برای هر worker در حالت موازی (برای پخش بهتر بار)
+TASKS_PER_WORKER = 4
+
+
+def plan_grid(strategy_func, combos):
+    """
+    تفکیک ترکیب‌های پارامتر بر اساس اندیکاتوری که هر پارامتر به آن می‌رسد.
+
+    strategy_func باید ویژگی indicator_plan داشته باشد:
+    {
+        "indicators": {column: (indicator_func, {strategy_param: indicator_kwarg})},
+        "signals": signals_func,
+    }
+
+    خروجی:
+    دیکشنری با کلیدهای:
+    - "indicators": {column: {config_key: kwargs}} برای هر پیکربندی متمایز
+    - "combos": لیست (params, {column: config_key}, signal_kwargs) برای هر ترکیب
+    یا None اگر استراتژی نقشه نداشته باشد
+    """
+    plan = getattr(strategy_func, "indicator_plan", None)
+    if plan is None:
+        return None
 
-    for combo in all_combos:
-        params = dict(zip(keys, combo))
+    defaults = {
+        name: p.default
+        for name, p in inspect.signature(strategy_func).parameters.items()
+        if p.default is not inspect.Parameter.empty
+    }
+    indicator_params = {
+        name for _, mapping in plan["indicators"].values() for name in mapping
+    }
 
+    indicators = {column: {} for column in plan["indicators"]}
+    planned = []
+    for params in combos:
+        full_params = {**defaults, **params}
+        keys = {}
+        for column, (_, mapping) in plan["indicators"].items():
+            kwargs = {kwarg: full_params[name] for name, kwarg in mapping.items()}
+            key = tuple(sorted(kwargs.items()))
+            indicators[column].setdefault(key, kwargs)
+            keys[column] = key
+        signal_kwargs = {k: v for k, v in full_params.items() if k not in indicator_params}
+        planned.append((params, keys, signal_kwargs))
+
+    return {"indicators": indicators, "combos": planned}
+
+
+def _can_factorize(df):
+    # اندیکاتورها روی داده عددی و بدون NaN هیچ ردیفی حذف نمی‌کنند؛
+    # فقط در این حالت ستون‌های محاسبه‌شده جداگانه با خروجی strategy_func یکی هستند
+    if not isinstance(df.index, pd.DatetimeIndex):
+        return False
+    for col in ['High', 'Low', 'Close']:
+        if col not in df.columns or not pd.api.types.is_numeric_dtype(df[col]) or df[col].isna().any():
+            return False
+    return True
+
+
+def _evaluate_combo(df, strategy_func, params, backtest_kwargs, timeframe_minutes):
+    df_strategy = strategy_func(df.copy(), **params)
+
+    final_capital, trade_log, capital_over_time, _ = run_backtest_fast(df_strategy, **backtest_kwargs)
+
+    metrics = calculate_metrics(
+        capital_over_time,
+        trade_log,
+        initial_capital=backtest_kwargs["initial_capital"],
+        timeframe_minutes=timeframe_minutes
+    )
+    metrics["Final Capital"] = final_capital
+    return {"params": params, "metrics": metrics}
+
+
+def _factorized_signals(df, strategy_func, grid_plan):
+    """
+    هر اندیکاتور یک بار برای هر پیکربندی متمایز محاسبه می‌شود و برای هر ترکیب
+    فقط مرحله سیگنال اجرا می‌شود.
+
+    خروجی:
+    لیست (params, آرایه کد سیگنال یا Exception) به ترتیب ترکیب‌ها
+    """
+    plan = strategy_func.indicator_plan
+    signals_func = plan["signals"]
+
+    columns = {}
+    for column, configs in grid_plan["indicators"].items():
+        indicator_func = plan["indicators"][column][0]
+        columns[column] = {}
+        for key, kwargs in configs.items():
+            try:
+                columns[column][key] = indicator_func(df, **kwargs)[column].to_numpy()
+            except Exception as e:
+                columns[column][key] = e
+
+    signals = []
+    for params, keys, signal_kwargs in grid_plan["combos"]:
+        try:
+            frame = df.copy()
+            for column, key in keys.items():
+                values = columns[column][key]
+                if isinstance(values, Exception):
+                    raise values
+                frame[column] = values
+            signals.append((params, encode_signals(signals_func(frame, **signal_kwargs)['Signal'])))
+        except Exception as e:
+            signals.append((params, e))
+    return signals
+
+
+def full_history_signals(df, strategy_func, combos):
+    """
+    محاسبه سیگنال هر ترکیب یک بار روی کل تاریخچه df
+    (با نقشه اندیکاتور در صورت امکان، وگرنه یک اجرای strategy_func برای هر ترکیب)
+
+    خروجی:
+    لیست (params, آرایه کد سیگنال یا Exception) هم‌طول با df،
+    یا None اگر خروجی استراتژی با ردیف‌های df هم‌تراز نباشد
+    """
+    if not _can_factorize(df):
+        return None
+
+    if hasattr(strategy_func, "grid_signals"):
+        return strategy_func.grid_signals(df, combos)
+
+    grid_plan = plan_grid(strategy_func, combos)
+    if grid_plan is not None:
+        return _factorized_signals(df, strategy_func, grid_plan)
+
+    signals = []
+    for params in combos:
         try:
             df_strategy = strategy_func(df.copy(), **params)
+        except Exception as e:
+            signals.append((params, e))
+            continue
+        if not df_strategy.index.equals(df.index):
+            return None
+        signals.append((params, encode_signals(df_strategy['Signal'])))
+    return signals
 
-            final_capital, trade_log, capital_over_time, _ = run_backtest(
-                df_strategy,
-                initial_capital=initial_capital,
-                stop_loss_pct=stop_loss_pct,
-                take_profit_pct=take_profit_pct,
-                trading_fee_pct=trading_fee_pct
-            )
-
-            metrics = calculate_metrics(
-                capital_over_time,
-                trade_log,
-                initial_capital=initial_capital,
-                timeframe_minutes=timeframe_minutes
-            )
-            metrics["Final Capital"] = final_capital
-
-            results.append({
-                "params": params,
-                "metrics": metrics
-            })
 
-            if verbose:
-                print(f"Tested params: {params} -> Final Capital: {final_capital:.2f}")
+def score_signals(df, signal_columns, backtest_kwargs, timeframe_minutes, start=0, stop=None):
+    """
+    بک‌تست دسته‌ای و محاسبه متریک برای چند آرایه سیگنال روی پنجره [start:stop] از df.
+    برش‌ها view هستند و هیچ اندیکاتوری دوباره محاسبه نمی‌شود.
+
+    خروجی:
+    لیست (final_capital، metrics) به ترتیب signal_columns
+    """
+    window = slice(start, stop)
+    close = df['Close'].to_numpy(dtype=np.float64)[window]
+    high = df['High'].to_numpy(dtype=np.float64)[window]
+    low = df['Low'].to_numpy(dtype=np.float64)[window]
+    index = df.index[window]
+
+    scored = []
+    for chunk_start in range(0, len(signal_columns), BATCH_COLUMNS):
+        chunk = signal_columns[chunk_start:chunk_start + BATCH_COLUMNS]
+        batch = run_backtest_batch(
+            close, high, low,
+            np.column_stack([codes[window] for codes in chunk]),
+            index,
+            build_trade_logs=False,
+            **backtest_kwargs
+        )
+        # یک جدول متریک برای همه ستون‌های دسته (بدون ساخت DataFrame برای هر ترکیب)
+        table = batch_metrics(
+            batch["equity"],
+            batch["trades"],
+            index[0],
+            index[-1],
+            initial_capital=backtest_kwargs["initial_capital"],
+            timeframe_minutes=timeframe_minutes
+        )
+        for j, metrics in enumerate(metrics_records(table)):
+            metrics["Final Capital"] = float(batch["final_capital"][j])
+            scored.append(metrics)
+    return scored
+
+
+def _score_outcomes(df, signals, backtest_kwargs, timeframe_minutes):
+    """
+    بک‌تست دسته‌ای سیگنال‌های از پیش ساخته‌شده (خروجی _factorized_signals یا grid_signals)
+
+    خروجی:
+    لیست (params, result یا Exception) به ترتیب signals
+    """
+    valid = [codes for _, codes in signals if not isinstance(codes, Exception)]
+    scored = iter(score_signals(df, valid, backtest_kwargs, timeframe_minutes))
+
+    return [
+        (params, codes if isinstance(codes, Exception) else {"params": params, "metrics": next(scored)})
+        for params, codes in signals
+    ]
+
+
+def _evaluate_factorized(df, strategy_func, grid_plan, backtest_kwargs, timeframe_minutes):
+    """
+    مسیر factorized: سیگنال‌ها با اندیکاتورهای مشترک ساخته و دسته‌ای بک‌تست می‌شوند.
+
+    خروجی:
+    لیست (params, result یا Exception) به ترتیب ترکیب‌ها
+    """
+    signals = _factorized_signals(df, strategy_func, grid_plan)
+    return _score_outcomes(df, signals, backtest_kwargs, timeframe_minutes)
+
+
+def _evaluate(df, strategy_func, combos, backtest_kwargs, timeframe_minutes):
+    """
+    اجرای ترکیب‌ها روی یک DataFrame (مسیر factorized در صورت امکان)
+
+    خروجی:
+    لیست (params, result یا Exception) به ترتیب combos
+    """
+    if hasattr(strategy_func, "grid_signals") and _can_factorize(df):
+        # استراتژی قوانین (strategies/rules.py): همه ترکیب‌ها روی اندیکاتورهای مشترک، بدون حلقه کندلی
+        return _score_outcomes(df, strategy_func.grid_signals(df, combos), backtest_kwargs, timeframe_minutes)
+
+    grid_plan = plan_grid(strategy_func, combos)
+
+    if grid_plan is not None and _can_factorize(df):
+        return _evaluate_factorized(df, strategy_func, grid_plan, backtest_kwargs, timeframe_minutes)
 
+    outcomes = []
+    for params in combos:
+        try:
+            outcomes.append((params, _evaluate_combo(df, strategy_func, params, backtest_kwargs, timeframe_minutes)))
         except Exception as e:
+            outcomes.append((params, e))
+    return outcomes
+
+
+def _evaluate_task(spec, strategy_func, combos, backtest_kwargs, timeframe_minutes):
+    return _evaluate(cached_attach(spec), strategy_func, combos, backtest_kwargs, timeframe_minutes)
+
+
+def _split_tasks(strategy_func, combos, n_tasks):
+    """
+    تقسیم ترکیب‌ها بین تسک‌ها؛ ترکیب‌هایی که پیکربندی اندیکاتور یکسان دارند کنار هم
+    می‌مانند تا هر worker اندیکاتورهایش را کمتر تکرار کند.
+
+    خروجی:
+    لیست لیست ایندکس ترکیب‌ها
+    """
+    order = list(range(len(combos)))
+    grid_plan = plan_grid(strategy_func, combos)
+    if grid_plan is not None:
+        keys = [tuple(sorted(k.items())) for _, k, _ in grid_plan["combos"]]
+        order.sort(key=lambda i: keys[i])
+
+    size = max(1, -(-len(order) // n_tasks))
+    return [order[i:i + size] for i in range(0, len(order), size)]
+
+
+def _evaluate_parallel(df, strategy_func, combos, backtest_kwargs, timeframe_minutes, n_jobs, executor):
+    """
+    پخش ترکیب‌ها بین پروسس‌ها؛ OHLCV یک بار در حافظه مشترک منتشر می‌شود و هر تسک
+    فقط پارامترهایش را می‌فرستد. خروجی به ترتیب combos برگردانده می‌شود.
+    """
+    tasks = _split_tasks(strategy_func, combos, n_jobs * TASKS_PER_WORKER)
+    shm, spec = share_frame(df)
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=n_jobs)
+
+    try:
+        futures = [
+            executor.submit(_evaluate_task, spec, strategy_func, [combos[i] for i in task],
+                            backtest_kwargs, timeframe_minutes)
+            for task in tasks
+        ]
+        outcomes = [None] * len(combos)
+        for task, future in zip(tasks, futures):
+            for i, outcome in zip(task, future.result()):
+                outcomes[i] = outcome
+    finally:
+        if own_executor:
+            executor.shutdown()
+        shm.close()
+        shm.unlink()
+
+    return outcomes
+
+
+def _run_combos(df, strategy_func, combos, backtest_kwargs, timeframe_minutes, n_jobs, executor, verbose):
+    """
+    اجرای ترکیب‌ها به صورت ترتیبی یا موازی
+
+    خروجی:
+    لیست (params, result یا Exception) به ترتیب combos
+    """
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+
+    parallel = (n_jobs > 1 or executor is not None) and len(combos) > 1
+    if parallel:
+        try:
+            pickle.dumps(strategy_func)
+        except Exception:
+            parallel = False
             if verbose:
-                print(f"Error with params {params}: {e}")
+                print("⚠️ strategy_func is not picklable; running param_tuner serially.")
+
+    if parallel:
+        return _evaluate_parallel(
+            df, strategy_func, combos, backtest_kwargs, timeframe_minutes, max(n_jobs, 1), executor
+        )
+    return _evaluate(df, strategy_func, combos, backtest_kwargs, timeframe_minutes)
+
+
+def _collect_results(outcomes, verbose):
+    results = []
+
+    for params, outcome in outcomes:
+        if isinstance(outcome, Exception):
+            if verbose:
+                print(f"Error with params {params}: {outcome}")
+            continue
+
+        results.append(outcome)
+
+        if verbose:
+            print(f"Tested params: {params} -> Final Capital: {outcome['metrics']['Final Capital']:.2f}")
 
     results.sort(key=lambda x: x["metrics"]["Final Capital"], reverse=True)
+    return results
 
+
+def _report_best(results, verbose):
     if results:
         best = results[0]
         if verbose:
@@ -65,4 +358,261 @@ def param_tuner(
     else:
         if verbose:
             print("No successful runs.")
-        return None, results
\ No newline at end of file
+        return None, results
+
+
+def param_tuner(
+    df,
+    strategy_func,
+    param_grid,
+    initial_capital=INITIAL_CAPITAL,
+    stop_loss_pct=STOP_LOSS_PCT,
+    take_profit_pct=TAKE_PROFIT_PCT,
+    trading_fee_pct=TRADING_FEE_PCT,
+    timeframe_minutes=60,
+    verbose=True,
+    n_jobs=1,
+    executor=None,
+    search="grid",
+    search_options=None
+):
+    """
+    جستجوی شبکه‌ای پارامترها و مرتب‌سازی نتایج بر اساس "Final Capital"
+
+    پارامترها:
+    - n_jobs: تعداد پروسس‌ها (1 یعنی اجرای ترتیبی، -1 یعنی همه هسته‌ها)
+    - executor: یک concurrent.futures.Executor آماده (اختیاری)؛ اگر داده شود به جای
+      ساخت ProcessPoolExecutor جدید استفاده می‌شود
+    - search: "grid" برای همه ترکیب‌ها یا "halving" برای successive halving (halving_tuner)
+    - search_options: آرگومان‌های اضافه halving_tuner (مثل sampler، n_samples، budget)
+
+    در حالت موازی strategy_func باید قابل pickle باشد (تابع سطح ماژول، نه lambda)؛
+    در غیر این صورت اجرا ترتیبی انجام می‌شود. ترتیب و محتوای نتایج با اجرای ترتیبی یکی است.
+    """
+    if search == "halving":
+        return halving_tuner(
+            df,
+            strategy_func,
+            param_grid,
+            initial_capital=initial_capital,
+            stop_loss_pct=stop_loss_pct,
+            take_profit_pct=take_profit_pct,
+            trading_fee_pct=trading_fee_pct,
+            timeframe_minutes=timeframe_minutes,
+            verbose=verbose,
+            n_jobs=n_jobs,
+            executor=executor,
+            **(search_options or {})
+        )
+    if search != "grid":
+        raise ValueError(f"❌ Error: unknown search mode '{search}'")
+
+    keys = list(param_grid.keys())
+    values = list(param_grid.values())
+    all_combos = [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+    backtest_kwargs = dict(
+        initial_capital=initial_capital,
+        stop_loss_pct=stop_loss_pct,
+        take_profit_pct=take_profit_pct,
+        trading_fee_pct=trading_fee_pct
+    )
+
+    outcomes = _run_combos(df, strategy_func, all_combos, backtest_kwargs, timeframe_minutes, n_jobs, executor, verbose)
+    results = _collect_results(outcomes, verbose)
+    return _report_best(results, verbose)
+
+
+# ==========================
+# 🎯 Successive halving search
+# ==========================
+
+def _is_range(values):
+    return isinstance(values, dict) and "low" in values and "high" in values
+
+
+def _from_unit(values, u):
+    """
+    نگاشت عدد u در بازه [0, 1) به یک مقدار از فضای پارامتر
+    - لیست: یکی از مقادیر
+    - {"low": a, "high": b}: مقدار پیوسته (اگر هر دو int باشند، عدد صحیح در [a, b])
+    """
+    if _is_range(values):
+        low, high = values["low"], values["high"]
+        if isinstance(low, int) and isinstance(high, int):
+            return low + min(int(u * (high - low + 1)), high - low)
+        return low + u * (high - low)
+    values = list(values)
+    return values[min(int(u * len(values)), len(values) - 1)]
+
+
+def sample_params(param_space, n_samples, sampler="random", seed=0):
+    """
+    نمونه‌برداری از فضای پارامتر
+
+    پارامترها:
+    - param_space: مثل param_grid؛ هر مقدار یا لیست گسسته است یا بازه {"low": a, "high": b}
+    - sampler: "grid" (همه ترکیب‌ها، فقط برای فضای گسسته)، "random" یا "lhs" (Latin hypercube)
+    - seed: بذر تولید عدد تصادفی برای تکرارپذیری
+
+    خروجی:
+    لیست دیکشنری پارامترها بدون تکرار
+    """
+    keys = list(param_space.keys())
+
+    if sampler == "grid":
+        if any(_is_range(v) for v in param_space.values()):
+            raise ValueError("❌ Error: grid sampler needs discrete values for every parameter")
+        return [dict(zip(keys, combo)) for combo in itertools.product(*param_space.values())]
+
+    rng = np.random.default_rng(seed)
+    if sampler == "random":
+        units = rng.random((n_samples, len(keys)))
+    elif sampler == "lhs":
+        # هر بعد به n_samples لایه مساوی تقسیم می‌شود و از هر لایه دقیقاً یک نمونه می‌آید
+        strata = np.column_stack([rng.permutation(n_samples) for _ in keys]) if keys else np.empty((n_samples, 0))
+        units = (strata + rng.random((n_samples, len(keys)))) / n_samples
+    else:
+        raise ValueError(f"❌ Error: unknown sampler '{sampler}'")
+
+    combos = []
+    seen = set()
+    for row in units:
+        params = {key: _from_unit(param_space[key], u) for key, u in zip(keys, row)}
+        marker = tuple(params.items())
+        if marker not in seen:
+            seen.add(marker)
+            combos.append(params)
+    return combos
+
+
+def _rung_fractions(n_candidates, eta, min_fraction):
+    """
+    سهم داده در هر مرحله: eta^-(R-1), ..., 1/eta, 1
+    تعداد مراحل R طوری انتخاب می‌شود که حداقل eta کاندیدا به مرحله آخر برسند
+    و سهم داده مرحله اول کمتر از min_fraction نشود.
+    """
+    rungs = 1
+    while n_candidates // eta ** rungs >= eta and float(eta) ** -rungs >= min_fraction:
+        rungs += 1
+    return [float(eta) ** (r - rungs + 1) for r in range(rungs)]
+
+
+def _halving_cost(n_candidates, eta, fractions):
+    cost, n = 0.0, n_candidates
+    for fraction in fractions:
+        cost += n * fraction
+        n = max(1, n // eta)
+    return cost
+
+
+def halving_tuner(
+    df,
+    strategy_func,
+    param_space,
+    initial_capital=INITIAL_CAPITAL,
+    stop_loss_pct=STOP_LOSS_PCT,
+    take_profit_pct=TAKE_PROFIT_PCT,
+    trading_fee_pct=TRADING_FEE_PCT,
+    timeframe_minutes=60,
+    verbose=True,
+    n_jobs=1,
+    executor=None,
+    sampler="grid",
+    n_samples=100,
+    eta=3,
+    budget=None,
+    min_fraction=0.05,
+    min_bars=100,
+    fidelity="recent",
+    resample_intervals=None,
+    seed=0
+):
+    """
+    جستجوی چندمرحله‌ای (successive halving):
+    همه کاندیداها روی یک برش ارزان از داده امتیاز می‌گیرند، فقط 1/eta بهترین‌ها به مرحله
+    بعد می‌روند و روی داده بیشتر دوباره اجرا می‌شوند تا مرحله آخر که کل داده است.
+
+    پارامترها:
+    - param_space: مثل param_grid؛ مقدار هر پارامتر لیست یا بازه {"low": a, "high": b}
+    - sampler, n_samples, seed: نحوه تولید کاندیداها (sample_params)
+    - eta: ضریب حذف در هر مرحله
+    - budget: سقف هزینه بر حسب «اجرای کامل روی کل داده»؛ در صورت نیاز تعداد کاندیداها کم می‌شود
+    - fidelity: "recent" (آخرین بخش داده) یا "resample" (تایم‌فریم درشت‌تر با resample_data)
+    - min_fraction / min_bars: حداقل سهم داده و حداقل تعداد کندل در مراحل ارزان
+    - resample_intervals: تایم‌فریم‌های مراحل ارزان از درشت به ریز (برای fidelity="resample" الزامی؛
+      budget با هزینه واقعی همین مراحل محاسبه می‌شود)
+
+    خروجی:
+    (best, results) مثل param_tuner؛ results نتایج مرحله آخر (کل داده) است
+    """
+    candidates = sample_params(param_space, n_samples, sampler=sampler, seed=seed)
+
+    if fidelity == "resample":
+        intervals = list(resample_intervals or [])
+        if not intervals:
+            raise ValueError("❌ Error: fidelity='resample' needs at least one interval in resample_intervals")
+        rung_frames = [resample_data(df, interval) for interval in intervals]
+        # هزینه هر مرحله ارزان = سهم کندل‌های تایم‌فریم درشت از کل داده
+        resample_costs = [len(frame) / max(len(df), 1) for frame in rung_frames] + [1.0]
+
+        def rung_costs(n):
+            return resample_costs
+    elif fidelity == "recent":
+        def rung_costs(n):
+            return _rung_fractions(n, eta, min_fraction)
+    else:
+        raise ValueError(f"❌ Error: unknown fidelity '{fidelity}'")
+
+    fractions = rung_costs(len(candidates))
+
+    if budget is not None:
+        # بزرگ‌ترین تعداد کاندیدا که هزینه کل آن از budget بیشتر نشود
+        n = len(candidates)
+        while n > 1 and _halving_cost(n, eta, rung_costs(n)) > budget:
+            n -= 1
+        if n < len(candidates):
+            keep = np.random.default_rng(seed).permutation(len(candidates))[:n]
+            candidates = [candidates[i] for i in sorted(keep)]
+            fractions = rung_costs(n)
+
+    backtest_kwargs = dict(
+        initial_capital=initial_capital,
+        stop_loss_pct=stop_loss_pct,
+        take_profit_pct=take_profit_pct,
+        trading_fee_pct=trading_fee_pct
+    )
+
+    survivors = candidates
+    results = []
+    evaluated = 0.0
+
+    for rung, fraction in enumerate(fractions):
+        last = rung == len(fractions) - 1
+        rung_minutes = timeframe_minutes
+
+        if fidelity == "resample" and not last:
+            df_rung = rung_frames[rung]
+            rung_minutes = convert_interval_to_minutes(intervals[rung])
+            cost = len(df_rung) / max(len(df), 1)
+        else:
+            bars = len(df) if last else min(len(df), max(min_bars, int(len(df) * fraction)))
+            df_rung = df.iloc[len(df) - bars:]
+            cost = bars / max(len(df), 1)
+
+        outcomes = _run_combos(df_rung, strategy_func, survivors, backtest_kwargs, rung_minutes, n_jobs, executor, False)
+        results = _collect_results(outcomes, False)
+        evaluated += cost * len(survivors)
+
+        if verbose:
+            print(f"🎯 Rung {rung + 1}/{len(fractions)}: {len(survivors)} candidates on {len(df_rung)} bars")
+
+        if last or not results:
+            break
+        survivors = [r["params"] for r in results[:max(1, len(survivors) // eta)]]
+
+    if verbose:
+        full_grid = len(candidates)
+        print(f"Cost: {evaluated:.1f} full-data evaluations ({evaluated / max(full_grid, 1) * 100:.1f}% of evaluating all {full_grid} candidates)")
+
+    return _report_best(results, verbose)
@@ -0,0 +1,266 @@
+# portfolio.py
+
+import numpy as np
+import pandas as pd
+
+from backtest import batch_trade_table, batch_trades_by_column, trades_to_log
+from panel import Panel
+from signals import SIGNAL_BUY, SIGNAL_SELL, encode_signals
+
+ALLOCATION_RULES = ("equal", "cash")
+
+
+def _panel_signals(frames, panel):
+    # ستون 'Signal' هر نماد روی محور زمانی مشترک پنل (کندل‌های نبودن hold)
+    codes = np.zeros(panel.shape, dtype=np.int8)
+    for j, symbol in enumerate(panel.symbols):
+        df = frames[symbol]
+        if 'Signal' not in df.columns:
+            raise ValueError(f"❌ Error: 'Signal' column not found for {symbol}")
+        codes[panel.index.get_indexer(df.index), j] = encode_signals(df['Signal'])
+    return codes
+
+
+def portfolio_kernel(
+    close,
+    high,
+    low,
+    signals,
+    valid,
+    initial_capital=1000.0,
+    stop_loss_pct=None,
+    take_profit_pct=None,
+    trading_fee_pct=0.0,
+    max_positions=None,
+    allocation="equal"
+):
+    """
+    بک‌تست پرتفوی با یک سرمایه مشترک روی پنل (bars, symbols) در یک پیمایش زمانی.
+
+    وضعیت همه نمادها در یک جدول از پیش تخصیص‌یافته (حجم، قیمت ورود، حد ضرر/سود، معامله باز)
+    نگه داشته می‌شود و هر کندل با عملیات برداری جلو می‌رود. قوانین ورود/خروج، کارمزد و
+    اولویت خروج (Stop Loss، Take Profit، Signal Sell) همان run_backtest است.
+    در هر کندل اول خروج‌ها انجام می‌شوند تا سرمایه آزاد شده برای ورودهای همان کندل در دسترس باشد؛
+    اگر خرید بیشتری از جای خالی باشد، نمادها به ترتیب ستون وارد می‌شوند.
+
+    پارامترها:
+    - valid: ماسک کندل‌های معتبر؛ نماد در کندل نامعتبر نه معامله می‌کند نه حد ضرر/سودش بررسی می‌شود
+      و ارزش پوزیشنش با آخرین Close معتبر حساب می‌شود
+    - max_positions: حداکثر پوزیشن باز هم‌زمان (پیش‌فرض تعداد نمادها)
+    - allocation: 'equal' یعنی هر پوزیشن جدید equity / max_positions (حداکثر تا نقدینگی موجود)
+      و 'cash' یعنی نقدینگی بین جاهای خالی به طور مساوی تقسیم می‌شود
+
+    خروجی:
+    (final_capital, trades, equity, cash, total_fees)
+    - trades: جدول آرایه‌ای معاملات (ستون 'column' شماره نماد)، مثل backtest_batch_kernel
+    - equity, cash: آرایه‌های طول bars
+    """
+    if allocation not in ALLOCATION_RULES:
+        raise ValueError(f"❌ Error: allocation must be one of {ALLOCATION_RULES}")
+
+    close = np.asarray(close, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    signals = np.asarray(signals)
+    valid = np.asarray(valid, dtype=bool)
+
+    n, m = close.shape
+    max_positions = m if max_positions is None else max(int(max_positions), 1)
+
+    buy_signal = valid & (signals == SIGNAL_BUY)
+    sell_signal = valid & (signals == SIGNAL_SELL)
+
+    # جدول وضعیت نمادها
+    position = np.zeros(m, dtype=np.float64)
+    entry_price = np.zeros(m, dtype=np.float64)
+    stop_loss_price = np.full(m, np.nan)
+    take_profit_price = np.full(m, np.nan)
+    open_trade = np.full(m, -1, dtype=np.int64)
+    last_close = np.zeros(m, dtype=np.float64)
+    last_bar = np.full(m, -1, dtype=np.int64)
+
+    cash = float(initial_capital)
+    total_fees = 0.0
+    equity = np.empty(n, dtype=np.float64)
+    cash_curve = np.empty(n, dtype=np.float64)
+
+    entries = []
+    exits = []
+    trade_count = 0
+    open_count = 0
+
+    def close_positions(cols, i, exit_price, reason):
+        nonlocal cash, total_fees, open_count
+        volume = position[cols]
+        gross_capital = volume * exit_price
+        fee_cost = gross_capital * trading_fee_pct
+        net_capital = gross_capital - fee_cost
+        cost = volume * entry_price[cols]
+        profit_pct = (net_capital - cost) / cost * 100
+
+        for net in net_capital.tolist():
+            cash += net
+        total_fees += float(fee_cost.sum())
+        exits.append((open_trade[cols], np.full(len(cols), i) if np.ndim(i) == 0 else i,
+                      exit_price, profit_pct, reason, fee_cost))
+
+        position[cols] = 0.0
+        entry_price[cols] = 0.0
+        stop_loss_price[cols] = np.nan
+        take_profit_price[cols] = np.nan
+        open_trade[cols] = -1
+        open_count -= len(cols)
+
+    has_buy = buy_signal.any(axis=1)
+
+    for i in range(n):
+        v = valid[i]
+        price = close[i]
+        np.copyto(last_close, price, where=v)
+        np.copyto(last_bar, i, where=v)
+
+        if not open_count and not has_buy[i]:
+            # کندل بدون پوزیشن باز و بدون خرید: فقط ثبت سرمایه
+            cash_curve[i] = equity[i] = cash
+            continue
+
+        # مثل if/elif در run_backtest: نمادی که در همین کندل خارج شده دوباره وارد نمی‌شود
+        flat = position == 0.0
+
+        if open_count:
+            is_open = (position > 0.0) & v
+            exit_mask = is_open & sell_signal[i]
+            stop_hit = take_hit = None
+            with np.errstate(invalid='ignore'):
+                if stop_loss_pct:
+                    stop_hit = is_open & (low[i] <= stop_loss_price)
+                    exit_mask |= stop_hit
+                if take_profit_pct:
+                    take_hit = is_open & (high[i] >= take_profit_price)
+                    exit_mask |= take_hit
+
+            if exit_mask.any():
+                cols = np.flatnonzero(exit_mask)
+                reason = np.full(len(cols), 3, dtype=np.int8)
+                exit_price = price[cols].copy()
+                if take_hit is not None:
+                    hit = take_hit[cols]
+                    reason[hit] = 2
+                    exit_price[hit] = take_profit_price[cols][hit]
+                if stop_hit is not None:
+                    hit = stop_hit[cols]
+                    reason[hit] = 1
+                    exit_price[hit] = stop_loss_price[cols][hit]
+                close_positions(cols, i, exit_price, reason)
+
+        free_slots = max_positions - open_count
+        if free_slots > 0 and has_buy[i]:
+            cols = np.flatnonzero(buy_signal[i] & flat)[:free_slots]
+            if allocation == "equal":
+                slot = (cash + float((position * last_close).sum())) / max_positions
+            else:
+                slot = cash / free_slots
+            # هر ورود حداکثر slot و حداکثر نقدینگی باقی‌مانده را می‌گیرد
+            budget = np.clip(cash - slot * np.arange(len(cols)), 0.0, slot)
+            cols, budget = cols[budget > 0.0], budget[budget > 0.0]
+
+            if len(cols):
+                entry = price[cols]
+                fee_cost = budget * trading_fee_pct
+                net_capital = budget - fee_cost
+                volume = net_capital / entry
+                for spent in budget.tolist():
+                    cash -= spent
+                total_fees += float(fee_cost.sum())
+                position[cols] = volume
+                entry_price[cols] = entry
+                if stop_loss_pct:
+                    stop_loss_price[cols] = entry * (1 - stop_loss_pct)
+                if take_profit_pct:
+                    take_profit_price[cols] = entry * (1 + take_profit_pct)
+                open_trade[cols] = np.arange(trade_count, trade_count + len(cols))
+                trade_count += len(cols)
+                open_count += len(cols)
+                entries.append((cols, np.full(len(cols), i), entry, volume, fee_cost))
+
+        cash_curve[i] = cash
+        equity[i] = cash + float((position * last_close).sum()) if open_count else cash
+
+    # بستن پوزیشن‌های باز با آخرین Close معتبر هر نماد (مثل Final Sell در run_backtest)
+    still_open = np.flatnonzero(position > 0.0)
+    if len(still_open):
+        close_positions(still_open, last_bar[still_open], last_close[still_open],
+                        np.full(len(still_open), 4, dtype=np.int8))
+
+    trades = batch_trade_table(entries, exits, trade_count)
+    return cash, trades, equity, cash_curve, total_fees
+
+
+def run_portfolio_backtest(
+    panel,
+    signals=None,
+    initial_capital=1000.0,
+    stop_loss_pct=None,
+    take_profit_pct=None,
+    trading_fee_pct=0.0,
+    max_positions=None,
+    allocation="equal",
+    build_trade_logs=True
+):
+    """
+    بک‌تست چند نماد با سرمایه مشترک روی محور زمانی ادغام‌شده
+
+    پارامترها:
+    - panel: panel.Panel یا دیکشنری {symbol: DataFrame} با ستون 'Signal'
+      (کندل‌های همه نمادها روی اجتماع زمان‌ها به یک جریان مرتب زمانی تبدیل می‌شوند)
+    - signals: آرایه کد سیگنال (bars, symbols) برای Panel (مثلاً خروجی supertrend_rsi_strategy(panel)['Signal'])
+    - max_positions / allocation: قوانین تخصیص سرمایه (portfolio_kernel را ببینید)
+    - build_trade_logs: ساخت trade_log هر نماد با قالب run_backtest
+
+    خروجی:
+    دیکشنری با کلیدهای:
+    - "symbols", "index"
+    - "final_capital", "total_fees"
+    - "equity", "cash": Series روی index
+    - "trades": جدول آرایه‌ای همه معاملات (ستون 'column' شماره نماد)
+    - "trade_logs": دیکشنری {symbol: trade_log} یا None
+    """
+    if not isinstance(panel, Panel):
+        frames = panel
+        panel = Panel.from_frames(frames)
+        if signals is None:
+            signals = _panel_signals(frames, panel)
+    if signals is None:
+        raise ValueError("❌ Error: signals are required when a Panel is given")
+    if isinstance(signals, dict):
+        signals = signals["Signal"]
+
+    final_capital, trades, equity, cash, total_fees = portfolio_kernel(
+        panel.close,
+        panel.high,
+        panel.low,
+        signals,
+        panel.valid,
+        initial_capital=initial_capital,
+        stop_loss_pct=stop_loss_pct,
+        take_profit_pct=take_profit_pct,
+        trading_fee_pct=trading_fee_pct,
+        max_positions=max_positions,
+        allocation=allocation
+    )
+
+    trade_logs = None
+    if build_trade_logs:
+        per_symbol = batch_trades_by_column(trades, len(panel.symbols))
+        trade_logs = {symbol: trades_to_log(t, panel.index) for symbol, t in zip(panel.symbols, per_symbol)}
+
+    return {
+        "symbols": panel.symbols,
+        "index": panel.index,
+        "final_capital": final_capital,
+        "total_fees": total_fees,
+        "equity": pd.Series(equity, index=panel.index, name="Equity"),
+        "cash": pd.Series(cash, index=panel.index, name="Cash"),
+        "trades": trades,
+        "trade_logs": trade_logs,
+    }
@@ -0,0 +1,381 @@
+# results.py
+
+import numpy as np
+import pandas as pd
+
+# کد عددی دلیل هر معامله؛ ایندکس هر برچسب همان کد آن است
+# (همان ترتیب کدهای reason در backtest_batch_kernel)
+TRADE_REASONS = ("buy", "Stop Loss", "Take Profit", "Signal Sell", "Final Sell")
+_REASON_CODES = {reason: code for code, reason in enumerate(TRADE_REASONS)}
+
+# زمان معامله باز (بدون خروج)
+NO_TIME = np.iinfo(np.int64).min
+
+TRADE_DTYPE = np.dtype([
+    ("entry_time", "<i8"),
+    ("exit_time", "<i8"),
+    ("entry_price", "<f8"),
+    ("exit_price", "<f8"),
+    ("volume", "<f8"),
+    ("profit_pct", "<f8"),
+    ("reason", "i1"),
+    ("fee_cost_entry", "<f8"),
+    ("fee_cost_exit", "<f8"),
+])
+
+
+def _to_ns(current_time):
+    if isinstance(current_time, (int, np.integer)):
+        return int(current_time)
+    ts = pd.Timestamp(current_time)
+    if ts.tz is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts.as_unit("ns").value
+
+
+def _iso_times(ns, tz):
+    ns = np.asarray(ns, dtype=np.int64)
+    index = pd.DatetimeIndex(ns.view("M8[ns]"))
+    if tz is not None:
+        index = index.tz_localize("UTC").tz_convert(tz)
+    if (ns % 1_000_000_000).any():
+        return [ts.isoformat() for ts in index]
+
+    # مسیر سریع برای ثانیه‌های کامل: همان خروجی Timestamp.isoformat بدون ساخت Timestamp
+    local = index.tz_localize(None).as_unit("ns").asi8 if tz is not None else ns
+    text = np.datetime_as_string(local.view("M8[ns]"), unit="s")
+    if tz is None:
+        return text.tolist()
+    offset = (local - ns) // 60_000_000_000
+    sign = np.where(offset < 0, "-", "+")
+    hours, minutes = np.divmod(np.abs(offset), 60)
+    suffix = np.char.add(np.char.add(sign, np.char.zfill(hours.astype(str), 2)),
+                         np.char.add(":", np.char.zfill(minutes.astype(str), 2)))
+    return np.char.add(text, suffix).tolist()
+
+
+class TradeLog:
+    """
+    ذخیره فشرده معاملات در یک آرایه ساخت‌یافته (TRADE_DTYPE) به جای لیست دیکشنری‌ها
+
+    زمان‌ها int64 نانوثانیه (UTC برای ایندکس‌های دارای منطقه زمانی) هستند و معامله باز
+    با ایندکس نگه داشته می‌شود، پس بستن معامله نیازی به جستجو ندارد.
+    تبدیل به قالب دیکشنری/CSV فعلی فقط در لبه گزارش‌گیری (to_dicts / to_frame) انجام می‌شود.
+    """
+
+    __slots__ = ("_records", "_size", "open_index", "tz")
+
+    def __init__(self, capacity=64, tz=None):
+        self._records = np.empty(max(capacity, 1), dtype=TRADE_DTYPE)
+        self._size = 0
+        self.open_index = -1
+        self.tz = None if tz is None else str(tz)
+
+    @classmethod
+    def from_trades(cls, trades, timestamps):
+        """
+        ساخت TradeLog از خروجی backtest_kernel و DatetimeIndex (یا آرایه int64) کندل‌ها
+        """
+        index = pd.DatetimeIndex(timestamps)
+        log = cls(capacity=len(trades), tz=index.tz)
+        if not trades:
+            return log
+
+        times = index.tz_convert("UTC").tz_localize(None) if index.tz is not None else index
+        times = times.as_unit("ns").asi8
+        (entry_idx, exit_idx, entry_price, exit_price, volume,
+         profit_pct, reason, fee_entry, fee_exit) = zip(*trades)
+
+        exit_idx = np.array(exit_idx, dtype=np.int64)
+        closed = exit_idx != -1
+        records = log._records[:len(trades)]
+        records["entry_time"] = times[np.array(entry_idx, dtype=np.int64)]
+        records["exit_time"] = np.where(closed, times[exit_idx], NO_TIME)
+        records["entry_price"] = entry_price
+        records["exit_price"] = [np.nan if p is None else p for p in exit_price]
+        records["volume"] = volume
+        records["profit_pct"] = [np.nan if p is None else p for p in profit_pct]
+        records["reason"] = [_REASON_CODES[r] for r in reason]
+        records["fee_cost_entry"] = fee_entry
+        records["fee_cost_exit"] = [np.nan if f is None else f for f in fee_exit]
+
+        log._size = len(trades)
+        if not closed[-1]:
+            log.open_index = len(trades) - 1
+        return log
+
+    def open(self, entry_time, entry_price, volume, fee_cost):
+        """
+        ثبت ورود؛ خروجی ایندکس معامله جدید
+        """
+        if self._size == len(self._records):
+            grown = np.empty(2 * len(self._records), dtype=TRADE_DTYPE)
+            grown[:self._size] = self._records
+            self._records = grown
+
+        if self._size == 0 and self.tz is None and getattr(entry_time, "tzinfo", None) is not None:
+            # منطقه زمانی از اولین معامله گرفته می‌شود تا خروجی isoformat مثل قبل باشد
+            self.tz = str(pd.Timestamp(entry_time).tz)
+
+        index = self._size
+        self._records[index] = (
+            _to_ns(entry_time), NO_TIME, entry_price, np.nan, volume, np.nan,
+            0, fee_cost, np.nan
+        )
+        self._size += 1
+        self.open_index = index
+        return index
+
+    def close(self, exit_time, exit_price, profit_pct, reason, fee_cost):
+        """
+        بستن معامله باز (اگر معامله بازی نباشد کاری انجام نمی‌شود)
+        """
+        if self.open_index == -1:
+            return
+        record = self._records[self.open_index]
+        record["exit_time"] = _to_ns(exit_time)
+        record["exit_price"] = exit_price
+        record["profit_pct"] = profit_pct
+        record["reason"] = _REASON_CODES[reason]
+        record["fee_cost_exit"] = fee_cost
+        self.open_index = -1
+
+    @property
+    def records(self):
+        """view آرایه ساخت‌یافته معاملات ثبت‌شده"""
+        return self._records[:self._size]
+
+    @property
+    def closed(self):
+        """معاملات بسته‌شده"""
+        records = self.records
+        return records[records["exit_time"] != NO_TIME]
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def __getitem__(self, i):
+        return self.to_dicts(self.records[[i]])[0]
+
+    def __iter__(self):
+        return iter(self.to_dicts())
+
+    def to_dicts(self, records=None):
+        """
+        خروجی با همان قالب لیست دیکشنری‌های run_backtest
+        """
+        records = self.records if records is None else records
+        if len(records) == 0:
+            return []
+
+        closed = records["exit_time"] != NO_TIME
+        entry_iso = _iso_times(records["entry_time"], self.tz)
+        exit_iso = _iso_times(np.where(closed, records["exit_time"], 0), self.tz)
+
+        trades = []
+        for k, row in enumerate(records.tolist()):
+            _, _, entry_price, exit_price, volume, profit_pct, reason, fee_entry, fee_exit = row
+            trade = {
+                "entry_time": entry_iso[k],
+                "exit_time": None,
+                "entry_price": entry_price,
+                "exit_price": None,
+                "volume": volume,
+                "profit_pct": None,
+                "reason": TRADE_REASONS[0],
+                "fee_cost_entry": fee_entry
+            }
+            if closed[k]:
+                trade.update({
+                    "exit_time": exit_iso[k],
+                    "exit_price": exit_price,
+                    "profit_pct": profit_pct,
+                    "reason": TRADE_REASONS[reason],
+                    "fee_cost_exit": fee_exit
+                })
+            trades.append(trade)
+        return trades
+
+    def to_rows(self):
+        """
+        سطرهای جدول trades دیتابیس به ترتیب ستون‌ها (بدون ساخت دیکشنری برای هر معامله):
+        (entry_time, exit_time, entry_price, exit_price, volume, profit_pct, reason, fee_cost_entry, fee_cost_exit)
+        """
+        records = self.records
+        if len(records) == 0:
+            return []
+
+        closed = records["exit_time"] != NO_TIME
+        exit_iso = _iso_times(np.where(closed, records["exit_time"], 0), self.tz)
+        reasons = np.array(TRADE_REASONS, dtype=object)[np.where(closed, records["reason"], 0)]
+        return list(zip(
+            _iso_times(records["entry_time"], self.tz),
+            [t if c else None for t, c in zip(exit_iso, closed.tolist())],
+            records["entry_price"].tolist(),
+            np.where(closed, records["exit_price"], np.nan).tolist(),
+            records["volume"].tolist(),
+            np.where(closed, records["profit_pct"], np.nan).tolist(),
+            reasons.tolist(),
+            records["fee_cost_entry"].tolist(),
+            np.where(closed, records["fee_cost_exit"], 0.0).tolist(),
+        ))
+
+    def to_frame(self):
+        """DataFrame با همان ستون‌های CSV لاگ معاملات (لاگ خالی هم سرستون‌های TRADE_DTYPE را دارد)"""
+        return pd.DataFrame(self.to_dicts(), columns=list(TRADE_DTYPE.names))
+
+
+class EquityCurve:
+    """
+    منحنی سرمایه به صورت دو آرایه هم‌تراز با کندل‌ها:
+    - times: int64 نانوثانیه (UTC برای ایندکس‌های دارای منطقه زمانی)
+    - values: float64 پیش‌تخصیص‌یافته
+
+    برای سازگاری، پیمایش آن مثل capital_over_time تاپل‌های (Timestamp, capital) می‌دهد.
+    """
+
+    __slots__ = ("times", "values", "tz")
+
+    def __init__(self, times, values=None, tz=None):
+        if isinstance(times, pd.DatetimeIndex):
+            tz = times.tz if tz is None else tz
+            if times.tz is not None:
+                times = times.tz_convert("UTC").tz_localize(None)
+            times = times.as_unit("ns").asi8
+        self.times = np.asarray(times, dtype=np.int64)
+        self.values = np.empty(len(self.times), dtype=np.float64) if values is None else np.asarray(values, dtype=np.float64)
+        self.tz = None if tz is None else str(tz)
+
+    @property
+    def index(self):
+        index = pd.DatetimeIndex(self.times.view("M8[ns]"))
+        if self.tz is not None:
+            index = index.tz_localize("UTC").tz_convert(self.tz)
+        return index
+
+    def __len__(self):
+        return len(self.times)
+
+    def __bool__(self):
+        return len(self.times) > 0
+
+    def __iter__(self):
+        return zip(self.index, self.values.tolist())
+
+    def to_series(self):
+        return pd.Series(self.values, index=self.index, name="Capital")
+
+    def to_list(self):
+        """خروجی با قالب capital_over_time: لیست (Timestamp, capital)"""
+        return list(self)
+
+    def to_frame(self):
+        """DataFrame با همان ستون‌های CSV منحنی سرمایه ('Time', 'Capital')"""
+        return pd.DataFrame({"Time": self.index, "Capital": self.values})
+
+    def to_sparse(self):
+        """تبدیل به SparseEquityCurve (فقط نقاط تغییر سرمایه)"""
+        return SparseEquityCurve.from_dense(self.times, self.values, tz=self.tz)
+
+
+class SparseEquityCurve:
+    """
+    منحنی سرمایه فشرده: فقط کندل‌هایی که سرمایه در آن‌ها تغییر کرده (به علاوه اولین و آخرین کندل)
+
+    هر نقطه یعنی «از این کندل تا نقطه بعدی سرمایه همین مقدار است». وقتی استراتژی بیشتر
+    زمان بیرون از بازار است، اندازه آن بسیار کوچک‌تر از منحنی کامل است.
+
+    ویژگی‌ها:
+    - positions: ایندکس مکانی کندل هر نقطه (int64)
+    - times: زمان هر نقطه به نانوثانیه (int64)
+    - values: سرمایه در هر نقطه (float64)
+    - length: تعداد کل کندل‌ها
+    """
+
+    __slots__ = ("positions", "times", "values", "tz")
+
+    def __init__(self, positions, times, values, tz=None):
+        self.positions = np.asarray(positions, dtype=np.int64)
+        self.times = np.asarray(times, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.tz = None if tz is None else str(tz)
+
+    @classmethod
+    def from_dense(cls, times, values, tz=None):
+        """
+        ساخت از محور زمان کامل (DatetimeIndex یا int64) و آرایه سرمایه هر کندل
+        """
+        curve = EquityCurve(times, values, tz=tz)
+        values = curve.values
+        n = len(values)
+        if n == 0:
+            return cls([], [], [], tz=curve.tz)
+
+        keep = np.empty(n, dtype=bool)
+        keep[0] = True
+        # سرمایه صفر همیشه نگه داشته می‌شود تا بازده 0/0 مثل منحنی کامل NaN بماند
+        keep[1:] = (values[1:] != values[:-1]) | (values[1:] == 0)
+        keep[-1] = True
+        positions = np.flatnonzero(keep)
+        return cls(positions, curve.times[positions], values[positions], tz=curve.tz)
+
+    @classmethod
+    def from_frame(cls, df):
+        """ساخت از خروجی to_frame (مثلاً CSV ذخیره‌شده با save_results)"""
+        times = pd.DatetimeIndex(pd.to_datetime(df["Time"]))
+        return cls(df["Bar"].to_numpy(), EquityCurve(times).times, df["Capital"].to_numpy(), tz=times.tz)
+
+    @property
+    def length(self):
+        return int(self.positions[-1]) + 1 if len(self.positions) else 0
+
+    @property
+    def index(self):
+        """DatetimeIndex نقاط تغییر"""
+        index = pd.DatetimeIndex(self.times.view("M8[ns]"))
+        if self.tz is not None:
+            index = index.tz_localize("UTC").tz_convert(self.tz)
+        return index
+
+    def __len__(self):
+        return self.length
+
+    def __bool__(self):
+        return len(self.positions) > 0
+
+    def dense_values(self):
+        """سرمایه هر کندل (بازسازی کامل فقط وقتی لازم است)"""
+        if not len(self.positions):
+            return np.empty(0, dtype=np.float64)
+        runs = np.diff(self.positions, append=self.positions[-1] + 1)
+        return np.repeat(self.values, runs)
+
+    def returns(self):
+        """
+        بازده کندل به کندل (معادل pct_change().dropna() روی منحنی کامل)؛
+        روی کندل‌های بدون تغییر بازده صفر است
+        """
+        n = self.length
+        returns = np.zeros(max(n - 1, 0), dtype=np.float64)
+        if n > 1:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns[self.positions[1:] - 1] = self.values[1:] / self.values[:-1] - 1
+        returns = pd.Series(returns)
+        return returns[returns.notna()]
+
+    def expand(self, index):
+        """
+        بازسازی EquityCurve کامل روی ایندکس کندل‌ها (همان ایندکسی که بک‌تست روی آن اجرا شده)
+        """
+        return EquityCurve(index, self.dense_values())
+
+    def to_series(self):
+        """Series سرمایه فقط در نقاط تغییر"""
+        return pd.Series(self.values, index=self.index, name="Capital")
+
+    def to_frame(self):
+        """DataFrame با ستون‌های 'Time'، 'Capital' و 'Bar' (ایندکس کندل) برای ذخیره CSV"""
+        return pd.DataFrame({"Time": self.index, "Capital": self.values, "Bar": self.positions})
@@ -0,0 +1,96 @@
+# signals.py
+
+import numpy as np
+import pandas as pd
+
+# کدهای عددی سیگنال (int8) برای موتورهای آرایه‌ای
+SIGNAL_HOLD = 0
+SIGNAL_BUY = 1
+SIGNAL_SELL = 2
+
+# برچسب متنی هر کد؛ ایندکس هر برچسب همان کد آن است
+SIGNAL_LABELS = ('hold', 'buy', 'sell')
+
+# ستون 'Signal' استراتژی‌ها: Categorical با کدهای int8 و همین برچسب‌ها، تا مقایسه با 'buy'،
+# نمودارها و CSV گزارش‌ها مثل ستون متنی کار کنند ولی encode_signals فقط کدها را بخواند
+SIGNAL_DTYPE = pd.CategoricalDtype(SIGNAL_LABELS)
+
+
+def encode_signals(signal):
+    """
+    تبدیل ستون سیگنال به آرایه int8 با کدهای SIGNAL_HOLD / SIGNAL_BUY / SIGNAL_SELL
+
+    پارامترها:
+    - signal: Series یا آرایه شامل 'buy', 'sell', 'hold' (یا هر مقدار دیگر که hold حساب می‌شود)
+      یا آرایه‌ای که از قبل کد عددی دارد
+
+    خروجی:
+    np.ndarray با dtype=int8
+    """
+    if isinstance(signal, pd.Series):
+        if isinstance(signal.dtype, pd.CategoricalDtype) and tuple(signal.cat.categories) == SIGNAL_LABELS:
+            # مقدار گمشده در Categorical کد -1 دارد و hold حساب می‌شود
+            return np.maximum(signal.cat.codes.to_numpy(), SIGNAL_HOLD).astype(np.int8, copy=False)
+        signal = signal.to_numpy()
+
+    signal = np.asarray(signal)
+
+    if signal.dtype.kind in 'iu':
+        return signal.astype(np.int8, copy=False)
+
+    codes = np.zeros(len(signal), dtype=np.int8)
+    codes[signal == 'buy'] = SIGNAL_BUY
+    codes[signal == 'sell'] = SIGNAL_SELL
+    return codes
+
+
+def decode_signals(codes):
+    """
+    تبدیل کدهای int8 به برچسب‌های متنی 'hold' / 'buy' / 'sell'
+    """
+    return np.asarray(SIGNAL_LABELS, dtype=object)[np.asarray(codes)]
+
+
+def signal_column(codes):
+    """
+    ساخت ستون 'Signal' (Categorical با dtype SIGNAL_DTYPE) از کدهای int8
+    """
+    return pd.Categorical.from_codes(np.asarray(codes, dtype=np.int8), dtype=SIGNAL_DTYPE)
+
+
+def toggle_signals(buy_ready, sell_ready):
+    """
+    سیگنال استراتژی‌هایی که پوزیشن باز/بسته را نگه می‌دارند (خرید فقط بدون پوزیشن، فروش فقط با پوزیشن)،
+    بدون حلقه روی کندل‌ها و در طول محور 0 (برای آرایه (bars,) یا (bars, symbols)).
+
+    وضعیت بعد از هر کندل: کندلی که فقط آماده خرید است پوزیشن را باز و کندلی که فقط آماده فروش است
+    آن را بسته می‌گذارد؛ کندلی که آماده هر دو است وضعیت را برعکس می‌کند. پس وضعیت هر کندل =
+    وضعیت آخرین کندل «فقط خرید/فقط فروش» XOR زوج/فرد بودن تعداد کندل‌های «هر دو» بعد از آن.
+
+    پارامترها:
+    - buy_ready / sell_ready: ماسک‌های bool کندل‌هایی که شرط خرید / فروش را دارند
+
+    خروجی:
+    آرایه int8 کد سیگنال هم‌شکل ورودی
+    """
+    buy_ready = np.asarray(buy_ready, dtype=bool)
+    sell_ready = np.asarray(sell_ready, dtype=bool)
+    codes = np.zeros(buy_ready.shape, dtype=np.int8)
+    if buy_ready.shape[0] == 0:
+        return codes
+
+    both = buy_ready & sell_ready
+    rows = np.arange(buy_ready.shape[0]).reshape((-1,) + (1,) * (buy_ready.ndim - 1))
+    last = np.maximum.accumulate(np.where(buy_ready ^ sell_ready, rows, -1), axis=0)
+    seen = last >= 0
+    last = np.maximum(last, 0)
+
+    flips = np.cumsum(both, axis=0)
+    flips -= np.where(seen, np.take_along_axis(flips, last, axis=0), 0)
+    is_open = (seen & np.take_along_axis(buy_ready, last, axis=0)) ^ (flips % 2 == 1)
+
+    was_open = np.zeros_like(is_open)
+    was_open[1:] = is_open[:-1]
+    codes[buy_ready & ~was_open] = SIGNAL_BUY
+    codes[sell_ready & was_open] = SIGNAL_SELL
+    return codes
@@ -0,0 +1,393 @@
+# store.py
+
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_STORE_DIR
+
+# ستون‌های OHLCV که در انبار نگه داشته می‌شوند
+BAR_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+# هر فایل روز یک آرایه ساخت‌یافته با محور زمانی int64 (نانوثانیه UTC) است
+BAR_DTYPE = np.dtype([('time', '<i8')] + [(col, '<f8') for col in BAR_COLUMNS])
+
+_NS_PER_DAY = 86_400 * 10**9
+
+
+def _day_of(ns):
+    return ns // _NS_PER_DAY
+
+
+def _day_name(day):
+    return str(np.datetime64(int(day), 'D'))
+
+
+def _to_ns(value, tz):
+    """تبدیل یک زمان (str / datetime / Timestamp) به int64 نانوثانیه هم‌تراز با انبار"""
+    ts = pd.Timestamp(value)
+    if tz is not None:
+        ts = ts.tz_localize('UTC') if ts.tz is None else ts.tz_convert('UTC')
+    elif ts.tz is not None:
+        ts = ts.tz_localize(None)
+    return ts.as_unit('ns').value
+
+
+def frame_to_bars(df):
+    """
+    تبدیل DataFrame با ایندکس زمانی و ستون‌های OHLCV به آرایه BAR_DTYPE
+
+    خروجی:
+    (bars, tz) — tz نام منطقه زمانی ایندکس یا None برای ایندکس بدون منطقه زمانی
+    """
+    index = pd.DatetimeIndex(df.index)
+    tz = None if index.tz is None else str(index.tz)
+    if tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+
+    bars = np.empty(len(df), dtype=BAR_DTYPE)
+    bars['time'] = index.as_unit('ns').asi8
+    for col in BAR_COLUMNS:
+        bars[col] = df[col].to_numpy(dtype=np.float64)
+    return bars, tz
+
+
+def bars_to_frame(bars, tz=None):
+    """
+    تبدیل آرایه BAR_DTYPE به DataFrame با DatetimeIndex
+    """
+    index = pd.DatetimeIndex(bars['time'].view('M8[ns]'))
+    if tz is not None:
+        index = index.tz_localize('UTC').tz_convert(tz)
+    return pd.DataFrame({col: bars[col] for col in BAR_COLUMNS}, index=index)
+
+
+def _merge(new, old):
+    """ادغام دو آرایه کندل؛ در زمان‌های تکراری داده جدید برنده است و خروجی مرتب است"""
+    merged = np.concatenate([new, old])
+    _, first = np.unique(merged['time'], return_index=True)
+    return merged[first]
+
+
+class MappedBars:
+    """
+    کندل‌های OHLCV به صورت ستون‌های memory-mapped (فایل‌های NPY فقط‌خواندنی)
+
+    هر ستون یک np.memmap با dtype ثابت است و محور زمان int64 نانوثانیه (UTC) است.
+    پروسس‌های مختلف که یک پوشه را باز می‌کنند page cache مشترک دارند، برش بازه زمانی
+    فقط view می‌سازد (بدون کپی) و pickle کردن شیء فقط مسیر و محدوده را منتقل می‌کند.
+
+    ویژگی‌ها:
+    - time: آرایه int64 نانوثانیه
+    - open, high, low, close, volume: آرایه‌های float64
+    """
+
+    def __init__(self, path, lo=0, hi=None):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.tz = json.load(f).get('tz')
+        self._columns = {
+            name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r')
+            for name in ('time',) + BAR_COLUMNS
+        }
+        self._set_range(lo, len(self._columns['time']) if hi is None else hi)
+
+    def _set_range(self, lo, hi):
+        self._lo, self._hi = lo, hi
+        for name, values in self._columns.items():
+            setattr(self, name.lower(), values[lo:hi])
+
+    def __len__(self):
+        return self._hi - self._lo
+
+    def __reduce__(self):
+        return (MappedBars, (self.path, self._lo, self._hi))
+
+    def __getitem__(self, key):
+        """برش مکانی (مثل bars[100:200]) بدون کپی"""
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise TypeError("❌ Error: MappedBars only supports contiguous slices")
+        lo, hi, _ = key.indices(len(self))
+        view = object.__new__(MappedBars)
+        view.path, view.tz, view._columns = self.path, self.tz, self._columns
+        view._set_range(self._lo + lo, self._lo + max(lo, hi))
+        return view
+
+    def between(self, start=None, end=None):
+        """
+        برش بازه زمانی [start, end] با جستجوی دودویی روی محور زمان (بدون کپی)
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.time, _to_ns(start, self.tz), side='left'))
+        hi = len(self) if end is None else int(np.searchsorted(self.time, _to_ns(end, self.tz), side='right'))
+        return self[lo:hi]
+
+    @property
+    def index(self):
+        """DatetimeIndex روی محور زمان"""
+        index = pd.DatetimeIndex(self.time.view('M8[ns]'))
+        if self.tz is not None:
+            index = index.tz_localize('UTC').tz_convert(self.tz)
+        return index
+
+    def to_frame(self):
+        """
+        DataFrame با ستون‌های OHLCV که ستون‌هایش view فقط‌خواندنی روی همان فایل‌ها هستند
+        """
+        data = {col: getattr(self, col.lower()) for col in BAR_COLUMNS}
+        return pd.DataFrame(data, index=self.index, copy=False)
+
+
+def write_mapped_bars(path, bars, tz=None):
+    """
+    نوشتن آرایه BAR_DTYPE به صورت یک فایل NPY پیوسته برای هر ستون (قالب MappedBars)
+
+    خروجی:
+    MappedBars باز شده روی path
+    """
+    os.makedirs(path, exist_ok=True)
+    # time.npy آخر نوشته می‌شود چون معیار تازگی نسخه ساخته‌شده است
+    for name in BAR_COLUMNS + ('time',):
+        target = os.path.join(path, name + '.npy')
+        tmp_path = target + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(bars[name]))
+        os.replace(tmp_path, target)
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump({'tz': tz}, f)
+    return MappedBars(path)
+
+
+class BarStore:
+    """
+    انبار محلی کندل‌های OHLCV به صورت فایل‌های NPY پارتیشن‌شده:
+    root/<symbol>/<interval>/<YYYY-MM-DD>.npy
+
+    هر فایل یک روز (UTC) از کندل‌ها را با dtype ثابت BAR_DTYPE نگه می‌دارد،
+    پس خواندن یک بازه فقط np.load چند فایل و یک concatenate است.
+    """
+
+    def __init__(self, root=DATA_STORE_DIR):
+        self.root = root
+
+    def _folder(self, symbol, interval):
+        return os.path.join(self.root, symbol, interval)
+
+    def _meta_path(self, symbol, interval):
+        return os.path.join(self._folder(symbol, interval), 'meta.json')
+
+    def _days(self, symbol, interval):
+        folder = self._folder(symbol, interval)
+        if not os.path.isdir(folder):
+            return []
+        names = sorted(name[:-4] for name in os.listdir(folder) if name.endswith('.npy'))
+        return names
+
+    def _meta(self, symbol, interval):
+        path = self._meta_path(symbol, interval)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def _save_meta(self, symbol, interval, meta):
+        os.makedirs(self._folder(symbol, interval), exist_ok=True)
+        with open(self._meta_path(symbol, interval), 'w') as f:
+            json.dump(meta, f)
+
+    def tz(self, symbol, interval):
+        """منطقه زمانی ذخیره‌شده برای این نماد/تایم‌فریم (یا None)"""
+        return self._meta(symbol, interval).get('tz')
+
+    def requested_range(self, symbol, interval):
+        """
+        بازه‌ای که قبلاً از منبع داده درخواست شده، حتی اگر منبع برای همه آن کندل نداشته
+        (مثلاً ابتدای دوره در تعطیلی بازار یا تاریخچه کوتاه‌تر از دوره)
+
+        خروجی:
+        (start, end)؛ start برابر 'max' یعنی کل تاریخچه درخواست شده و None یعنی ثبت نشده
+        """
+        meta = self._meta(symbol, interval)
+        start, end = meta.get('requested_start'), meta.get('requested_end')
+        if start is not None and start != 'max':
+            start = pd.Timestamp(start)
+        return start, (None if end is None else pd.Timestamp(end))
+
+    def mark_requested(self, symbol, interval, start=None, end=None):
+        """
+        ثبت یک بازه درخواست‌شده در meta.json تا get_data آن را دوباره دانلود نکند
+
+        پارامترها:
+        - start: Timestamp یا 'max' (کل تاریخچه)؛ با بازه قبلی اجتماع گرفته می‌شود
+        - end: Timestamp
+        """
+        meta = self._meta(symbol, interval)
+        old_start, old_end = self.requested_range(symbol, interval)
+        if start is not None:
+            if start == 'max' or old_start == 'max':
+                meta['requested_start'] = 'max'
+            else:
+                start = pd.Timestamp(start)
+                meta['requested_start'] = (start if old_start is None else min(start, old_start)).isoformat()
+        if end is not None:
+            end = pd.Timestamp(end)
+            meta['requested_end'] = (end if old_end is None else max(end, old_end)).isoformat()
+        self._save_meta(symbol, interval, meta)
+
+    def coverage(self, symbol, interval):
+        """
+        بازه موجود در انبار
+
+        خروجی:
+        (first, last) به صورت Timestamp، یا None اگر داده‌ای نباشد
+        """
+        days = self._days(symbol, interval)
+        if not days:
+            return None
+        folder = self._folder(symbol, interval)
+        first = np.load(os.path.join(folder, days[0] + '.npy'), mmap_mode='r')['time'][0]
+        last = np.load(os.path.join(folder, days[-1] + '.npy'), mmap_mode='r')['time'][-1]
+        tz = self.tz(symbol, interval)
+        bounds = pd.DatetimeIndex(np.array([first, last]).view('M8[ns]'))
+        if tz is not None:
+            bounds = bounds.tz_localize('UTC').tz_convert(tz)
+        return bounds[0], bounds[1]
+
+    def read_bars(self, symbol, interval, start=None, end=None):
+        """
+        خواندن کندل‌های [start, end] به صورت آرایه BAR_DTYPE (بدون ساخت DataFrame)
+        """
+        tz = self.tz(symbol, interval)
+        start_ns = None if start is None else _to_ns(start, tz)
+        end_ns = None if end is None else _to_ns(end, tz)
+
+        days = self._days(symbol, interval)
+        if start_ns is not None:
+            first_day = _day_name(_day_of(start_ns))
+            days = [d for d in days if d >= first_day]
+        if end_ns is not None:
+            last_day = _day_name(_day_of(end_ns))
+            days = [d for d in days if d <= last_day]
+
+        folder = self._folder(symbol, interval)
+        parts = [np.load(os.path.join(folder, d + '.npy')) for d in days]
+        bars = np.concatenate(parts) if parts else np.empty(0, dtype=BAR_DTYPE)
+
+        if start_ns is not None or end_ns is not None:
+            times = bars['time']
+            lo = 0 if start_ns is None else np.searchsorted(times, start_ns, side='left')
+            hi = len(bars) if end_ns is None else np.searchsorted(times, end_ns, side='right')
+            bars = bars[lo:hi]
+        return bars
+
+    def read(self, symbol, interval, start=None, end=None):
+        """
+        خواندن کندل‌های [start, end] به صورت DataFrame با ستون‌های OHLCV
+        """
+        bars = self.read_bars(symbol, interval, start, end)
+        return bars_to_frame(bars, self.tz(symbol, interval))
+
+    def _mapped_folder(self, symbol, interval):
+        return os.path.join(self._folder(symbol, interval), 'mapped')
+
+    def mapped(self, symbol, interval, refresh=True):
+        """
+        باز کردن کندل‌های این نماد/تایم‌فریم به صورت MappedBars
+
+        فایل‌های ستونی در root/<symbol>/<interval>/mapped/ نگه داشته می‌شوند و فقط وقتی
+        پارتیشن‌های روزانه جدیدتر باشند (یا هنوز ساخته نشده باشند) بازسازی می‌شوند.
+
+        پارامترها:
+        - refresh: اگر False باشد نسخه موجود بدون بررسی تازگی باز می‌شود
+        """
+        folder = self._mapped_folder(symbol, interval)
+        time_path = os.path.join(folder, 'time.npy')
+        tz = self.tz(symbol, interval)
+
+        stale = not os.path.exists(time_path)
+        if not stale and refresh:
+            built = os.path.getmtime(time_path)
+            day_folder = self._folder(symbol, interval)
+            stale = any(
+                os.path.getmtime(os.path.join(day_folder, d + '.npy')) > built
+                for d in self._days(symbol, interval)
+            )
+
+        if stale:
+            return write_mapped_bars(folder, self.read_bars(symbol, interval), tz)
+        return MappedBars(folder)
+
+    def write(self, symbol, interval, df):
+        """
+        افزودن کندل‌ها به انبار. فقط روزهایی که داده جدید دارند بازنویسی می‌شوند
+        و در زمان‌های تکراری داده جدید جایگزین داده قدیمی می‌شود.
+
+        خروجی:
+        تعداد کندل‌های نوشته‌شده
+        """
+        if df is None or df.empty:
+            return 0
+
+        bars, tz = frame_to_bars(df.dropna(subset=list(BAR_COLUMNS)))
+        if len(bars) == 0:
+            return 0
+
+        folder = self._folder(symbol, interval)
+        os.makedirs(folder, exist_ok=True)
+
+        stored_tz = self.tz(symbol, interval)
+        if self._days(symbol, interval):
+            if stored_tz != tz and (stored_tz is None or tz is None):
+                raise ValueError(
+                    f"❌ Error: timezone mismatch for {symbol} {interval}: store={stored_tz}, data={tz}"
+                )
+        else:
+            stored_tz = tz
+        meta = self._meta(symbol, interval)
+        meta['tz'] = stored_tz
+        self._save_meta(symbol, interval, meta)
+
+        bars = np.sort(bars, order='time')
+        day_ids = _day_of(bars['time'])
+        cuts = np.flatnonzero(np.diff(day_ids)) + 1
+        for part in np.split(bars, cuts):
+            path = os.path.join(folder, _day_name(_day_of(part['time'][0])) + '.npy')
+            old = np.load(path) if os.path.exists(path) else part[:0]
+            part = _merge(part, old)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.save(f, part)
+            os.replace(tmp_path, path)
+        return len(bars)
+
+    def import_csv(self, symbol, interval, paths):
+        """
+        وارد کردن فایل‌های CSV (مثلاً خروجی yfinance) بدون نیاز به شبکه
+
+        پارامترها:
+        - paths: مسیر یک فایل، یک الگوی glob یا لیستی از مسیرها.
+          ستون اول (یا ستون Datetime/Date) زمان است و ستون‌های Open/High/Low/Close/Volume لازم‌اند.
+
+        خروجی:
+        تعداد کل کندل‌های وارد شده
+        """
+        if isinstance(paths, str):
+            paths = sorted(glob.glob(paths)) or [paths]
+
+        total = 0
+        for path in paths:
+            df = pd.read_csv(path)
+            time_col = next((c for c in ('Datetime', 'Date', 'time', 'timestamp') if c in df.columns), df.columns[0])
+            index = pd.to_datetime(df[time_col], utc=_is_tz_aware(df[time_col]))
+            df = df.set_index(pd.DatetimeIndex(index)).drop(columns=[time_col])
+            df.columns = [str(c).capitalize() for c in df.columns]
+            total += self.write(symbol, interval, df)
+        return total
+
+
+def _is_tz_aware(values):
+    """آیا رشته‌های زمانی CSV شامل آفست منطقه زمانی هستند (مثل +00:00)؟"""
+    sample = str(values.iloc[0]) if len(values) else ''
+    return sample.endswith('Z') or (len(sample) > 19 and sample[-6] in '+-' and sample[-3] == ':')
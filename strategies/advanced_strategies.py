@@ -1,5 +1,9 @@
+import numpy as np
 import pandas as pd
 from indicators import calculate_rsi, calculate_supertrend
+from panel import Panel, advanced_panel
+from signals import SIGNAL_BUY, SIGNAL_SELL, signal_column
+from utils.profiling import profiled
 
 def advanced_strategy(
     df,
@@ -11,28 +15,57 @@ def advanced_strategy(
     استراتژی پیشرفته با ترکیب RSI و Supertrend
 
     پارامترها:
-    - df: DataFrame ورودی
+    - df: DataFrame ورودی (یا panel.Panel برای چند نماد در یک پیمایش)
     - rsi_window: طول دوره RSI (پیش‌فرض 7)
     - supertrend_period: دوره Supertrend (پیش‌فرض 7)
     - supertrend_multiplier: ضریب Supertrend (پیش‌فرض 2)
 
     خروجی:
     DataFrame با ستون 'Signal' شامل مقادیر 'buy', 'sell', یا 'hold'
+    (Categorical با کدهای int8، signals.SIGNAL_DTYPE)
+    (برای Panel: دیکشنری آرایه‌های 'RSI'، 'Supertrend' و 'Signal' با شکل (bars, symbols))
     """
+    if isinstance(df, Panel):
+        return advanced_panel(df, rsi_window, supertrend_period, supertrend_multiplier)
+
     df = df.copy()
     df = calculate_rsi(df, window=rsi_window)
     df = calculate_supertrend(df, period=supertrend_period, multiplier=supertrend_multiplier)
 
+    return advanced_signals(df)
+
+
+@profiled("signals")
+def advanced_signals(df):
+    """
+    مرحله تولید سیگنال استراتژی پیشرفته روی DataFrame‌ای که
+    ستون‌های 'RSI' و 'Supertrend' آن از قبل محاسبه شده‌اند
+    """
+    codes = np.zeros(len(df), dtype=np.int8)
     if len(df) == 0 or 'RSI' not in df.columns or 'Supertrend' not in df.columns:
-        df['Signal'] = 'hold'
+        df['Signal'] = signal_column(codes)
         return df
 
-    df['Signal'] = 'hold'
+    rsi = df['RSI'].to_numpy(dtype=np.float64)
+    # مقدار truthy مثل حلقه قبلی (NaN در ستون اعشاری True حساب می‌شود)
+    trend = df['Supertrend'].to_numpy().astype(bool)
+
+    # کندل اول هیچ‌وقت سیگنال ندارد؛ RSI برابر NaN در هیچ مقایسه‌ای صدق نمی‌کند
+    with np.errstate(invalid='ignore'):
+        buy = (rsi < 40) & trend
+        sell = (rsi > 75) & ~trend & ~buy
+    buy[:1] = sell[:1] = False
+    codes[buy] = SIGNAL_BUY
+    codes[sell] = SIGNAL_SELL
+
+    df['Signal'] = signal_column(codes)
+    return df
 
-    for i in range(1, len(df)):
-        if df['RSI'].iloc[i] < 40 and df['Supertrend'].iloc[i]:
-            df.at[df.index[i], 'Signal'] = 'buy'
-        elif df['RSI'].iloc[i] > 75 and not df['Supertrend'].iloc[i]:
-            df.at[df.index[i], 'Signal'] = 'sell'
 
-    return df
\ No newline at end of file
+advanced_strategy.indicator_plan = {
+    "indicators": {
+        "RSI": (calculate_rsi, {"rsi_window": "window"}),
+        "Supertrend": (calculate_supertrend, {"supertrend_period": "period", "supertrend_multiplier": "multiplier"}),
+    },
+    "signals": advanced_signals,
+}
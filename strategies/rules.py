@@ -0,0 +1,443 @@
+import ast
+import re
+
+import numpy as np
+import pandas as pd
+from indicators import calculate_rsi, calculate_supertrend, compute_atr
+from panel import Panel, panel_rsi, panel_atr, panel_supertrend
+from signals import SIGNAL_BUY, SIGNAL_SELL, signal_column, toggle_signals
+
+# ستون‌های قیمت که مستقیم در قوانین قابل استفاده‌اند (مثل Close > 100)
+PRICE_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+RULE_KEYS = ("buy", "sell")
+
+
+def _frame_rsi(high, low, close, window):
+    # کل سری (با کندل‌های NaN) به calculate_rsi می‌رود تا مثل استراتژی‌ها فقط Close نامعتبر حذف شود
+    if np.isnan(close).all():
+        return np.full(len(close), np.nan)
+    rsi = calculate_rsi(pd.DataFrame({"Close": close}), window=int(window))['RSI']
+    return rsi.reindex(range(len(close))).to_numpy(dtype=np.float64)
+
+
+def _frame_supertrend(high, low, close, period, multiplier):
+    df = pd.DataFrame({"High": high, "Low": low, "Close": close})
+    return calculate_supertrend(df, period=int(period), multiplier=multiplier)['Supertrend'].to_numpy(dtype=bool)
+
+
+def _frame_atr(high, low, close, period):
+    if len(close) < period:
+        return np.full(len(close), np.nan)
+    return compute_atr(high, low, close, int(period))
+
+
+def _panel_rsi(high, low, close, valid, window):
+    return panel_rsi(close, int(window), valid)
+
+
+def _panel_supertrend(high, low, close, valid, period, multiplier):
+    return panel_supertrend(high, low, close, int(period), multiplier, valid)[0]
+
+
+def _panel_atr(high, low, close, valid, period):
+    return panel_atr(high, low, close, int(period), valid)
+
+
+# نام اندیکاتور: (تابع روی آرایه‌های یک نماد، تابع پنل، تعداد آرگومان)
+# تابع یک نماد (high, low, close, *args) و تابع پنل (high, low, close, valid, *args) می‌گیرد
+INDICATORS = {
+    "RSI": (_frame_rsi, _panel_rsi, 1),
+    "Supertrend": (_frame_supertrend, _panel_supertrend, 2),
+    "ATR": (_frame_atr, _panel_atr, 1),
+}
+
+# اندیکاتورهایی که تابع یک نماد آن‌ها کل سری را (با کندل‌های نامعتبر) می‌گیرد و خودش NaN را مدیریت می‌کند
+FULL_SERIES_INDICATORS = {"RSI"}
+
+
+def register_indicator(name, frame_func, panel_func=None, n_args=1):
+    """
+    افزودن اندیکاتور جدید به زبان قوانین
+
+    پارامترها:
+    - frame_func: تابع (high, low, close, *args) روی کندل‌های معتبر یک نماد که آرایه هم‌طول برمی‌گرداند
+    - panel_func: تابع (high, low, close, valid, *args) روی آرایه‌های (bars, symbols) (اختیاری)
+    """
+    if not name.isidentifier() or name in PRICE_COLUMNS:
+        raise ValueError(f"❌ Error: invalid indicator name '{name}'")
+    INDICATORS[name] = (frame_func, panel_func, n_args)
+
+
+class IndicatorCache:
+    """
+    ستون‌های قیمت و اندیکاتورهای مشترک بین قوانین و ترکیب‌های پارامتر؛
+    هر (اندیکاتور، آرگومان‌ها) فقط یک بار محاسبه می‌شود.
+
+    ورودی DataFrame یا panel.Panel است. اندیکاتورهای DataFrame فقط روی کندل‌های معتبر
+    (High، Low و Close غیر NaN) محاسبه می‌شوند و کندل‌های نامعتبر NaN (یا False) می‌گیرند؛
+    جز FULL_SERIES_INDICATORS (مثل RSI که مانند calculate_rsi فقط Close نامعتبر را کنار می‌گذارد).
+    """
+
+    def __init__(self, data):
+        self.is_panel = isinstance(data, Panel)
+        if self.is_panel:
+            self.columns = {col: getattr(data, col.lower()) for col in PRICE_COLUMNS}
+            self.valid = data.valid
+            self._rows = None
+        else:
+            if 'Close' not in data.columns:
+                raise ValueError("❌ Error: 'Close' column not found in DataFrame")
+            self.columns = {
+                col: pd.to_numeric(data[col], errors='coerce').to_numpy(dtype=np.float64)
+                for col in PRICE_COLUMNS if col in data.columns
+            }
+            close = self.columns['Close']
+            self.valid = ~(np.isnan(self.columns.get('High', close)) | np.isnan(self.columns.get('Low', close)) | np.isnan(close))
+            self._rows = None if self.valid.all() else np.flatnonzero(self.valid)
+        self.shape = self.valid.shape
+        self.values = {}
+
+    def column(self, name):
+        if name not in self.columns:
+            raise ValueError(f"❌ Error: '{name}' column not found in data")
+        return self.columns[name]
+
+    def indicator(self, name, args):
+        key = (name, args)
+        if key not in self.values:
+            frame_func, panel_func, _ = INDICATORS[name]
+            close = self.columns['Close']
+            high = self.columns.get('High', close)
+            low = self.columns.get('Low', close)
+            if self.is_panel:
+                if panel_func is None:
+                    raise ValueError(f"❌ Error: indicator '{name}' has no panel implementation")
+                values = panel_func(high, low, close, self.valid, *args)
+            elif self._rows is None or name in FULL_SERIES_INDICATORS:
+                values = frame_func(high, low, close, *args)
+            else:
+                rows = self._rows
+                part = np.asarray(frame_func(high[rows], low[rows], close[rows], *args))
+                values = np.zeros(self.shape, dtype=bool) if part.dtype == bool else np.full(self.shape, np.nan)
+                values[rows] = part
+            self.values[key] = np.asarray(values)
+        return self.values[key]
+
+
+# ==========================
+# 🧩 Parsing
+# ==========================
+
+_COMPARE_OPS = {
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+_ARITH_OPS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+}
+# درخت کامپایل‌شده نام عملگر را نگه می‌دارد (قابل pickle برای تیونر موازی)
+_OPS_BY_NAME = {op.__name__: func for op, func in {**_COMPARE_OPS, **_ARITH_OPS}.items()}
+
+
+def _to_python(expr):
+    # & و | و ~ در پایتون از مقایسه‌ها قوی‌ترند (RSI(7) < 40 & x یعنی RSI(7) < (40 & x))؛
+    # با and/or/not مقایسه‌ها اول انجام می‌شوند، همان چیزی که نوشتن قانون انتظار دارد
+    return re.sub(r"~", " not ", re.sub(r"\|", " or ", re.sub(r"&", " and ", expr)))
+
+
+def _compile(node, text):
+    """تبدیل گره ast به درخت تاپلی قابل pickle؛ هر ساختار دیگری خطاست"""
+    if isinstance(node, ast.BoolOp):
+        op = "and" if isinstance(node.op, ast.And) else "or"
+        return (op, tuple(_compile(v, text) for v in node.values))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return ("not", _compile(node.operand, text))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return ("neg", _compile(node.operand, text))
+    if isinstance(node, ast.Compare):
+        # a < b < c یعنی (a < b) & (b < c)
+        operands = [_compile(node.left, text)] + [_compile(c, text) for c in node.comparators]
+        for op in node.ops:
+            if type(op) not in _COMPARE_OPS:
+                raise ValueError(f"❌ Error: unsupported comparison in rule '{text}'")
+        parts = tuple(
+            ("cmp", type(op).__name__, operands[i], operands[i + 1]) for i, op in enumerate(node.ops)
+        )
+        return parts[0] if len(parts) == 1 else ("and", parts)
+    if isinstance(node, ast.BinOp) and type(node.op) in _ARITH_OPS:
+        return ("arith", type(node.op).__name__, _compile(node.left, text), _compile(node.right, text))
+    if isinstance(node, ast.Call):
+        name = node.func.id if isinstance(node.func, ast.Name) else None
+        if name not in INDICATORS or node.keywords:
+            raise ValueError(f"❌ Error: unknown indicator call in rule '{text}'")
+        n_args = INDICATORS[name][2]
+        if len(node.args) != n_args:
+            raise ValueError(f"❌ Error: {name} takes {n_args} argument(s) in rule '{text}'")
+        args = tuple(_compile(a, text) for a in node.args)
+        if any(a[0] not in ("const", "param", "neg") for a in args):
+            raise ValueError(f"❌ Error: {name} arguments must be numbers or parameters in rule '{text}'")
+        return ("ind", name, args)
+    if isinstance(node, ast.Name):
+        if node.id in PRICE_COLUMNS:
+            return ("column", node.id)
+        if node.id in INDICATORS:
+            raise ValueError(f"❌ Error: indicator '{node.id}' must be called, e.g. {node.id}(14), in rule '{text}'")
+        return ("param", node.id)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (bool, int, float)):
+        return ("const", node.value)
+    raise ValueError(f"❌ Error: unsupported syntax in rule '{text}'")
+
+
+def parse_rules(text):
+    """
+    خواندن متن قوانین به شکل:
+
+        buy: RSI(rsi_period) < rsi_buy_threshold & Supertrend(supertrend_period, supertrend_multiplier)
+        sell: RSI(rsi_period) > rsi_sell_threshold | ~Supertrend(supertrend_period, supertrend_multiplier)
+
+    هر قانون در یک خط (یا جدا با ';')؛ '#' تا آخر خط توضیح است.
+    عملگرها: & | ~ (یا and/or/not)، مقایسه‌ها (< <= > >= == !=)، + - * / و پرانتز.
+    نام‌های INDICATORS فراخوانی اندیکاتورند، Open/High/Low/Close/Volume ستون قیمت‌اند
+    و هر نام دیگر پارامتری است که هنگام اجرا (یا در param_grid تیونر) مقدار می‌گیرد.
+
+    خروجی:
+    دیکشنری {"buy": درخت, "sell": درخت}
+    """
+    rules = {}
+    for line in re.split(r"[;\n]", text):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        key, sep, expr = line.partition(":")
+        key = key.strip().lower()
+        if not sep or key not in RULE_KEYS:
+            raise ValueError(f"❌ Error: rule lines must look like 'buy: <expr>' or 'sell: <expr>', got '{line}'")
+        if key in rules:
+            raise ValueError(f"❌ Error: duplicate '{key}' rule")
+        try:
+            tree = ast.parse(_to_python(expr.strip()), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"❌ Error: invalid rule '{line}': {e.msg}") from None
+        rules[key] = _compile(tree.body, line)
+
+    missing = [key for key in RULE_KEYS if key not in rules]
+    if missing:
+        raise ValueError(f"❌ Error: missing rule(s) {missing}")
+    return rules
+
+
+def _walk(node):
+    yield node
+    if node[0] in ("and", "or"):
+        for child in node[1]:
+            yield from _walk(child)
+    elif node[0] in ("not", "neg"):
+        yield from _walk(node[1])
+    elif node[0] in ("cmp", "arith"):
+        yield from _walk(node[2])
+        yield from _walk(node[3])
+    elif node[0] == "ind":
+        for arg in node[2]:
+            yield from _walk(arg)
+
+
+# ==========================
+# ⚡ Vectorized evaluation
+# ==========================
+
+def _as_bool(values):
+    values = np.asarray(values)
+    return values if values.dtype == bool else values != 0
+
+
+def _scalar(node, params):
+    value = _evaluate(node, None, params)
+    if np.ndim(value):
+        raise ValueError("❌ Error: indicator arguments must be scalars")
+    return value
+
+
+def _evaluate(node, cache, params):
+    kind = node[0]
+    if kind == "const":
+        return node[1]
+    if kind == "param":
+        if node[1] not in params:
+            raise ValueError(f"❌ Error: missing rule parameter '{node[1]}'")
+        return params[node[1]]
+    if kind == "column":
+        return cache.column(node[1])
+    if kind == "ind":
+        return cache.indicator(node[1], tuple(_scalar(arg, params) for arg in node[2]))
+    if kind == "neg":
+        return np.negative(_evaluate(node[1], cache, params))
+    if kind == "not":
+        return ~_as_bool(_evaluate(node[1], cache, params))
+    if kind in ("and", "or"):
+        reduce = np.logical_and if kind == "and" else np.logical_or
+        result = _as_bool(_evaluate(node[1][0], cache, params))
+        for child in node[1][1:]:
+            result = reduce(result, _as_bool(_evaluate(child, cache, params)))
+        return result
+    op = _OPS_BY_NAME[node[1]]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return op(_evaluate(node[2], cache, params), _evaluate(node[3], cache, params))
+
+
+class RuleStrategy:
+    """
+    استراتژی تعریف‌شده با قوانین متنی خرید/فروش (parse_rules) که روی ستون‌های اندیکاتور
+    مشترک (IndicatorCache) به صورت برداری اجرا می‌شود.
+
+    پارامترها:
+    - rules: متن قوانین
+    - stateful: اگر True باشد خرید فقط بدون پوزیشن و فروش فقط با پوزیشن باز (signals.toggle_signals)،
+      وگرنه هر کندل مستقل است و خرید بر فروش اولویت دارد
+    - name: نام استراتژی برای گزارش‌ها
+    - defaults: مقدار پیش‌فرض پارامترهای قوانین
+
+    کندل اول هر نماد، کندل‌های نامعتبر و کندل‌هایی که یکی از اندیکاتورها/ستون‌های استفاده‌شده در
+    آن‌ها NaN است (مثلاً گرم شدن RSI) سیگنال ندارند؛ همان رفتار استراتژی‌های دستی.
+
+    نمونه:
+        strategy = RuleStrategy("buy: RSI(n) < 40 & Supertrend(7, 2); sell: RSI(n) > 75", n=7)
+        df = strategy(df, n=14)                   # DataFrame با ستون‌های اندیکاتور و 'Signal'
+        param_tuner(df, strategy, {"n": [7, 14]}) # اندیکاتورها یک بار برای همه ترکیب‌ها
+    """
+
+    def __init__(self, rules, stateful=True, name=None, **defaults):
+        self.text = rules
+        self.rules = parse_rules(rules)
+        self.stateful = stateful
+        self.name = name or "Rule Strategy"
+        self.defaults = defaults
+        self.params = sorted({
+            node[1] for tree in self.rules.values() for node in _walk(tree) if node[0] == "param"
+        })
+
+    def __repr__(self):
+        return f"RuleStrategy({self.name!r})"
+
+    def _params(self, params):
+        params = {**self.defaults, **params}
+        unknown = set(params) - set(self.params) - set(self.defaults)
+        if unknown:
+            raise ValueError(f"❌ Error: unknown rule parameters {sorted(unknown)}")
+        return params
+
+    def _used_columns(self, cache, params):
+        # {برچسب ستون: آرایه} برای هر اندیکاتور/ستون قیمت استفاده‌شده با این پارامترها
+        used = {}
+        for tree in self.rules.values():
+            for node in _walk(tree):
+                if node[0] == "ind":
+                    key = (node[1], tuple(_scalar(arg, params) for arg in node[2]))
+                    used[key] = cache.indicator(*key)
+                elif node[0] == "column":
+                    used[(node[1], None)] = cache.column(node[1])
+        return used
+
+    def signal_codes(self, cache, **params):
+        """
+        کد سیگنال int8 با شکل cache.shape برای یک مجموعه پارامتر
+        """
+        params = self._params(params)
+        eligible = cache.valid & (np.cumsum(cache.valid, axis=0) > 1)
+        for values in self._used_columns(cache, params).values():
+            if values.dtype.kind == 'f':
+                eligible = eligible & ~np.isnan(values)
+
+        buy = eligible & np.broadcast_to(_as_bool(_evaluate(self.rules["buy"], cache, params)), cache.shape)
+        sell = eligible & np.broadcast_to(_as_bool(_evaluate(self.rules["sell"], cache, params)), cache.shape)
+        if self.stateful:
+            return toggle_signals(buy, sell)
+
+        codes = np.zeros(cache.shape, dtype=np.int8)
+        codes[buy] = SIGNAL_BUY
+        codes[sell & ~buy] = SIGNAL_SELL
+        return codes
+
+    def __call__(self, df, **params):
+        """
+        اجرای قوانین روی DataFrame یا panel.Panel
+
+        خروجی:
+        DataFrame با ستون اندیکاتورهای استفاده‌شده و 'Signal'
+        (برای Panel: دیکشنری آرایه‌های (bars, symbols) با همین کلیدها)
+        """
+        cache = IndicatorCache(df)
+        codes = self.signal_codes(cache, **params)
+
+        used = {key: values for key, values in self._used_columns(cache, self._params(params)).items()
+                if key[1] is not None}
+        names = [name for name, _ in used]
+        columns = {}
+        for (name, args), values in used.items():
+            # اگر یک اندیکاتور با یک پیکربندی استفاده شده باشد نام ساده (مثلاً 'RSI' برای نمودارها)
+            label = name if names.count(name) == 1 else f"{name}({','.join(str(a) for a in args)})"
+            columns[label] = values
+
+        if cache.is_panel:
+            return {**columns, "Signal": codes}
+
+        df = df.copy()
+        for label, values in columns.items():
+            df[label] = values
+        df['Signal'] = signal_column(codes)
+        return df
+
+    def grid_signals(self, df, combos):
+        """
+        سیگنال همه ترکیب‌های پارامتر روی df با یک IndicatorCache مشترک (برای param_tuner و walk-forward)
+
+        خروجی:
+        لیست (params, آرایه کد سیگنال یا Exception) به ترتیب combos
+        """
+        cache = IndicatorCache(df)
+        signals = []
+        for params in combos:
+            try:
+                signals.append((params, self.signal_codes(cache, **params)))
+            except Exception as e:
+                signals.append((params, e))
+        return signals
+
+
+# دو استراتژی موجود به زبان قوانین (همان سیگنال‌های supertrend_rsi_strategy و advanced_strategy)
+SUPERTREND_RSI_RULES = """
+buy: RSI(rsi_period) < rsi_buy_threshold & Supertrend(supertrend_period, supertrend_multiplier)
+sell: RSI(rsi_period) > rsi_sell_threshold | ~Supertrend(supertrend_period, supertrend_multiplier)
+"""
+
+ADVANCED_RULES = """
+buy: RSI(rsi_window) < 40 & Supertrend(supertrend_period, supertrend_multiplier)
+sell: RSI(rsi_window) > 75 & ~Supertrend(supertrend_period, supertrend_multiplier)
+"""
+
+supertrend_rsi_rules = RuleStrategy(
+    SUPERTREND_RSI_RULES,
+    stateful=True,
+    name="Supertrend + RSI",
+    rsi_period=14,
+    rsi_buy_threshold=30,
+    rsi_sell_threshold=70,
+    supertrend_period=10,
+    supertrend_multiplier=3
+)
+
+advanced_rules = RuleStrategy(
+    ADVANCED_RULES,
+    stateful=False,
+    name="Advanced Strategy",
+    rsi_window=7,
+    supertrend_period=7,
+    supertrend_multiplier=2
+)
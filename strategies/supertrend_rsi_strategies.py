@@ -1,5 +1,9 @@
+import numpy as np
 import pandas as pd
 from indicators import calculate_rsi, calculate_supertrend
+from panel import Panel, supertrend_rsi_panel
+from signals import signal_column, toggle_signals
+from utils.profiling import profiled
 
 def supertrend_rsi_strategy(
     df,
@@ -13,7 +17,7 @@ def supertrend_rsi_strategy(
     استراتژی ترکیبی Supertrend و RSI
 
     پارامترها:
-    - df: DataFrame ورودی با داده‌های OHLCV
+    - df: DataFrame ورودی با داده‌های OHLCV (یا panel.Panel برای چند نماد در یک پیمایش)
     - rsi_period: دوره RSI (پیش‌فرض 14)
     - rsi_buy_threshold: حد آستانه خرید RSI (پیش‌فرض 30)
     - rsi_sell_threshold: حد آستانه فروش RSI (پیش‌فرض 70)
@@ -22,26 +26,52 @@ def supertrend_rsi_strategy(
 
     خروجی:
     DataFrame با ستون جدید 'Signal' که مقادیر 'buy', 'sell' یا 'hold' دارد
+    (Categorical با کدهای int8، signals.SIGNAL_DTYPE)
+    (برای Panel: دیکشنری آرایه‌های 'RSI'، 'Supertrend' و 'Signal' با شکل (bars, symbols))
     """
+    if isinstance(df, Panel):
+        return supertrend_rsi_panel(
+            df, rsi_period, rsi_buy_threshold, rsi_sell_threshold, supertrend_period, supertrend_multiplier
+        )
+
     df = df.copy()
 
     df = calculate_rsi(df, window=rsi_period)
     df = calculate_supertrend(df, period=supertrend_period, multiplier=supertrend_multiplier)
 
-    df['Signal'] = 'hold'
-    position_open = False
+    return supertrend_rsi_signals(df, rsi_buy_threshold, rsi_sell_threshold)
+
+
+@profiled("signals")
+def supertrend_rsi_signals(df, rsi_buy_threshold=30, rsi_sell_threshold=70):
+    """
+    مرحله تولید سیگنال استراتژی Supertrend + RSI روی DataFrame‌ای که
+    ستون‌های 'RSI' و 'Supertrend' آن از قبل محاسبه شده‌اند
+
+    خروجی:
+    همان DataFrame با ستون 'Signal'
+    """
+    rsi = df['RSI'].to_numpy(dtype=np.float64)
+    supertrend = df['Supertrend']
+
+    # مثل حلقه قبلی: کندل اول و کندل‌های بدون RSI یا Supertrend سیگنال ندارند
+    eligible = ~np.isnan(rsi) & supertrend.notna().to_numpy()
+    eligible[:1] = False
+    trend = np.where(eligible, supertrend.to_numpy(), False).astype(bool)
+    with np.errstate(invalid='ignore'):
+        buy_ready = eligible & (rsi < rsi_buy_threshold) & trend
+        sell_ready = eligible & ((rsi > rsi_sell_threshold) | ~trend)
 
-    for i in range(1, len(df)):
-        rsi = df['RSI'].iloc[i]
-        supertrend = df['Supertrend'].iloc[i]
-        if pd.isna(rsi) or pd.isna(supertrend):
-            continue
+    df['Signal'] = signal_column(toggle_signals(buy_ready, sell_ready))
+    return df
 
-        if not position_open and rsi < rsi_buy_threshold and supertrend:
-            df.at[df.index[i], 'Signal'] = 'buy'
-            position_open = True
-        elif position_open and (rsi > rsi_sell_threshold or not supertrend):
-            df.at[df.index[i], 'Signal'] = 'sell'
-            position_open = False
 
-    return df
\ No newline at end of file
+# نقشه پارامترها برای param_tuner: هر اندیکاتور فقط یک بار برای هر مقدار متمایز
+# پارامترهایش محاسبه می‌شود و بقیه پارامترها فقط به مرحله سیگنال می‌رسند
+supertrend_rsi_strategy.indicator_plan = {
+    "indicators": {
+        "RSI": (calculate_rsi, {"rsi_period": "window"}),
+        "Supertrend": (calculate_supertrend, {"supertrend_period": "period", "supertrend_multiplier": "multiplier"}),
+    },
+    "signals": supertrend_rsi_signals,
+}
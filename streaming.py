@@ -0,0 +1,201 @@
+# streaming.py
+
+import math
+
+import numpy as np
+
+
+class StreamingRSI:
+    """
+    RSI افزایشی (Wilder) با هزینه O(1) برای هر کندل
+
+    خروجی update همان مقدار calculate_rsi (ta.momentum.RSIIndicator) در آن کندل است؛
+    window-1 مقدار اول NaN هستند.
+    """
+
+    def __init__(self, window=14):
+        self.window = window
+        self.alpha = 1 / window
+        self.prev_close = None
+        self.avg_gain = None
+        self.avg_loss = None
+        self.count = 0
+
+    def _ewm(self, weighted, value):
+        # همان بازگشت ewm(adjust=False) پانداس، با همان ترتیب عملیات اعشاری
+        if weighted == value:
+            return weighted
+        old_wt = 1. - self.alpha
+        return (old_wt * weighted + self.alpha * value) / (old_wt + self.alpha)
+
+    def update(self, close):
+        """
+        افزودن یک Close و برگرداندن RSI به‌روز شده
+        """
+        close = float(close)
+        if self.prev_close is None:
+            gain, loss = 0.0, -0.0
+        else:
+            diff = close - self.prev_close
+            gain = diff if diff > 0 else 0.0
+            loss = -diff if diff < 0 else -0.0
+        self.prev_close = close
+        self.count += 1
+
+        if self.avg_gain is None:
+            self.avg_gain, self.avg_loss = gain, loss
+        else:
+            self.avg_gain = self._ewm(self.avg_gain, gain)
+            self.avg_loss = self._ewm(self.avg_loss, loss)
+
+        return self.value
+
+    @property
+    def value(self):
+        if self.count < self.window:
+            return math.nan
+        if self.avg_loss == 0:
+            return 100.0
+        return 100 - (100 / (1 + self.avg_gain / self.avg_loss))
+
+    def get_state(self):
+        """وضعیت قابل ذخیره (JSON) برای ادامه محاسبه بعد از راه‌اندازی مجدد"""
+        return {
+            "window": self.window,
+            "prev_close": self.prev_close,
+            "avg_gain": self.avg_gain,
+            "avg_loss": self.avg_loss,
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        indicator = cls(state["window"])
+        indicator.prev_close = state["prev_close"]
+        indicator.avg_gain = state["avg_gain"]
+        indicator.avg_loss = state["avg_loss"]
+        indicator.count = state["count"]
+        return indicator
+
+
+class StreamingATR:
+    """
+    ATR افزایشی (Wilder) با هزینه O(1) برای هر کندل
+
+    خروجی update همان مقدار compute_atr در آن کندل است؛ period-1 مقدار اول صفر هستند.
+    """
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.atr = 0.0
+        self.count = 0
+        # True Rangeهای دوره اول تا ساخت میانگین اولیه
+        self.warmup = []
+
+    def update(self, high, low, close):
+        """
+        افزودن یک کندل و برگرداندن ATR به‌روز شده
+        """
+        high, low, close = float(high), float(low), float(close)
+        true_range = high - low
+        if self.prev_close is not None:
+            true_range = max(true_range, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        self.count += 1
+
+        if self.count < self.period:
+            self.warmup.append(true_range)
+        elif self.count == self.period:
+            self.warmup.append(true_range)
+            # میانگین اولیه با np.mean تا جمع عددی دقیقاً مثل compute_atr باشد
+            self.atr = float(np.mean(np.array(self.warmup)))
+            self.warmup = []
+        else:
+            self.atr = (self.atr * (self.period - 1) + true_range) / float(self.period)
+
+        return self.atr
+
+    @property
+    def value(self):
+        return self.atr
+
+    def get_state(self):
+        """وضعیت قابل ذخیره (JSON) برای ادامه محاسبه بعد از راه‌اندازی مجدد"""
+        return {
+            "period": self.period,
+            "prev_close": self.prev_close,
+            "atr": self.atr,
+            "count": self.count,
+            "warmup": list(self.warmup),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        indicator = cls(state["period"])
+        indicator.prev_close = state["prev_close"]
+        indicator.atr = state["atr"]
+        indicator.count = state["count"]
+        indicator.warmup = list(state["warmup"])
+        return indicator
+
+
+class StreamingSupertrend:
+    """
+    Supertrend افزایشی (باندها و جهت روند) با هزینه O(1) برای هر کندل
+
+    خروجی update همان (trend, upperband, lowerband) از compute_supertrend در آن کندل است.
+    توجه: calculate_supertrend برای DataFrameهای کوتاه‌تر از period همه روندها را True
+    می‌گذارد؛ این کلاس مثل compute_supertrend روی کل تاریخچه رفتار می‌کند.
+    """
+
+    def __init__(self, period=10, multiplier=3):
+        self.period = period
+        self.multiplier = multiplier
+        self.atr = StreamingATR(period)
+        self.trend = True
+        self.upperband = None
+        self.lowerband = None
+
+    def update(self, high, low, close):
+        """
+        افزودن یک کندل و برگرداندن (trend, upperband, lowerband)
+        """
+        atr = self.atr.update(high, low, close)
+        close = float(close)
+
+        if self.upperband is not None:
+            if close > self.upperband:
+                self.trend = True
+            elif close < self.lowerband:
+                self.trend = False
+
+        hl2 = (float(high) + float(low)) / 2
+        self.upperband = hl2 + self.multiplier * atr
+        self.lowerband = hl2 - self.multiplier * atr
+        return self.trend, self.upperband, self.lowerband
+
+    @property
+    def line(self):
+        """خط فعال Supertrend (باند پایین در روند صعودی، باند بالا در روند نزولی)"""
+        return self.lowerband if self.trend else self.upperband
+
+    def get_state(self):
+        """وضعیت قابل ذخیره (JSON) برای ادامه محاسبه بعد از راه‌اندازی مجدد"""
+        return {
+            "period": self.period,
+            "multiplier": self.multiplier,
+            "atr": self.atr.get_state(),
+            "trend": self.trend,
+            "upperband": self.upperband,
+            "lowerband": self.lowerband,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        indicator = cls(state["period"], state["multiplier"])
+        indicator.atr = StreamingATR.from_state(state["atr"])
+        indicator.trend = state["trend"]
+        indicator.upperband = state["upperband"]
+        indicator.lowerband = state["lowerband"]
+        return indicator
@@ -3,8 +3,10 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import pytest
+import numpy as np
 import pandas as pd
-from backtest import run_backtest
+from backtest import run_backtest, run_backtest_fast, run_backtest_arrays, run_backtest_batch
+from signals import encode_signals
 
 
 @pytest.fixture
@@ -66,4 +68,123 @@ def test_run_backtest_no_trades(sample_data_no_signals):
     assert isinstance(total_fees, float)
 
     assert len(trade_log) == 0
-    assert final_capital == 1000.0 or final_capital > 0
\ No newline at end of file
+    assert final_capital == 1000.0 or final_capital > 0
+
+
+def random_data_with_signals(seed, rows=400):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    data = {
+        "Close": close,
+        "Low": close * (1 - rng.uniform(0, 0.02, rows)),
+        "High": close * (1 + rng.uniform(0, 0.02, rows)),
+        "Signal": rng.choice(['buy', 'sell', 'hold', ''], rows, p=[0.05, 0.05, 0.6, 0.3])
+    }
+    index = pd.date_range(start="2022-01-01", periods=rows, freq='5min')
+    return pd.DataFrame(data, index=index)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("stop_loss_pct, take_profit_pct, trading_fee_pct", [
+    (0.02, 0.04, 0.001),
+    (None, None, 0.0),
+    (0.01, None, 0.002),
+    (None, 0.015, 0.001),
+])
+def test_run_backtest_fast_matches_run_backtest(seed, stop_loss_pct, take_profit_pct, trading_fee_pct):
+    df = random_data_with_signals(seed)
+    kwargs = dict(
+        initial_capital=1000.0,
+        stop_loss_pct=stop_loss_pct,
+        take_profit_pct=take_profit_pct,
+        trading_fee_pct=trading_fee_pct
+    )
+
+    expected = run_backtest(df.copy(), **kwargs)
+    result = run_backtest_fast(df.copy(), **kwargs)
+
+    assert result[0] == expected[0]
+    assert result[1] == expected[1]
+    assert result[2] == expected[2]
+    assert result[3] == expected[3]
+
+
+def test_run_backtest_fast_open_trade_closed_at_end():
+    df = random_data_with_signals(0, rows=50)
+    df['Signal'] = 'hold'
+    df.iloc[-1, df.columns.get_loc('Signal')] = 'buy'
+
+    expected = run_backtest(df.copy(), initial_capital=1000.0, trading_fee_pct=0.001)
+    result = run_backtest_fast(df.copy(), initial_capital=1000.0, trading_fee_pct=0.001)
+
+    assert result == expected
+    assert result[1][-1]["reason"] == "Final Sell"
+
+
+def test_run_backtest_arrays_accepts_int64_timestamps(sample_data_with_signals):
+    df = sample_data_with_signals
+    expected = run_backtest(df.copy(), initial_capital=1000.0, stop_loss_pct=0.05, take_profit_pct=0.05, trading_fee_pct=0.001)
+
+    result = run_backtest_arrays(
+        df['Close'].to_numpy(dtype=float),
+        df['High'].to_numpy(dtype=float),
+        df['Low'].to_numpy(dtype=float),
+        encode_signals(df['Signal']),
+        df.index.as_unit('ns').asi8,
+        initial_capital=1000.0,
+        stop_loss_pct=0.05,
+        take_profit_pct=0.05,
+        trading_fee_pct=0.001
+    )
+
+    assert result == expected
+
+
+@pytest.mark.parametrize("stop_loss_pct, take_profit_pct", [(0.02, 0.04), (None, None), (0.01, None)])
+def test_run_backtest_batch_matches_single_runs(stop_loss_pct, take_profit_pct):
+    df = random_data_with_signals(0)
+    signals = pd.DataFrame({f"s{seed}": random_data_with_signals(seed)["Signal"].to_numpy() for seed in range(6)}, index=df.index)
+    kwargs = dict(
+        initial_capital=1000.0,
+        stop_loss_pct=stop_loss_pct,
+        take_profit_pct=take_profit_pct,
+        trading_fee_pct=0.001
+    )
+
+    batch = run_backtest_batch(
+        df['Close'].to_numpy(),
+        df['High'].to_numpy(),
+        df['Low'].to_numpy(),
+        signals,
+        df.index,
+        **kwargs
+    )
+
+    assert batch["columns"] == list(signals.columns)
+    assert batch["equity"].shape == (len(df), signals.shape[1])
+
+    for j, col in enumerate(signals.columns):
+        df_col = df.assign(Signal=signals[col])
+        final_capital, trade_log, capital_over_time, total_fees = run_backtest(df_col, **kwargs)
+
+        assert batch["final_capital"][j] == final_capital
+        assert batch["total_fees"][j] == total_fees
+        assert batch["trade_logs"][j] == trade_log
+        assert batch["equity"][:, j].tolist() == [cap for _, cap in capital_over_time]
+
+
+def test_run_backtest_batch_without_equity():
+    df = random_data_with_signals(1, rows=100)
+    batch = run_backtest_batch(
+        df['Close'].to_numpy(),
+        df['High'].to_numpy(),
+        df['Low'].to_numpy(),
+        encode_signals(df['Signal']),
+        df.index,
+        record_equity=False,
+        build_trade_logs=False
+    )
+
+    assert batch["equity"] is None
+    assert batch["trade_logs"] is None
+    assert batch["final_capital"].shape == (1,)
@@ -0,0 +1,76 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.synthetic import REGIMES, generate_ohlcv, regime_path
+from benchmarks.suite import compare_to_baseline, measure, run_suite, save_baseline, load_baseline
+
+
+def test_generate_ohlcv_is_deterministic_and_consistent():
+    df = generate_ohlcv(5_000, seed=3)
+
+    pd.testing.assert_frame_equal(df, generate_ohlcv(5_000, seed=3))
+    assert not df.equals(generate_ohlcv(5_000, seed=4))
+    assert list(df.columns) == ["Open", "High", "Low", "Close", "Volume"]
+    assert df.index.is_monotonic_increasing and str(df.index.tz) == "UTC"
+    assert (df["High"] >= df[["Open", "Close"]].max(axis=1)).all()
+    assert (df["Low"] <= df[["Open", "Close"]].min(axis=1)).all()
+    assert (df["Volume"] > 0).all() and np.isfinite(df.to_numpy()).all()
+
+
+def test_regime_path_switches_regimes():
+    regimes = regime_path(20_000, seed=1, mean_regime_bars=500)
+
+    assert len(regimes) == 20_000
+    assert set(np.unique(regimes)) <= set(range(len(REGIMES)))
+    switches = np.flatnonzero(np.diff(regimes))
+    assert 10 < len(switches) < 100  # حدود 40 رژیم، هر بار به رژیمی متفاوت
+
+
+def test_compare_to_baseline_flags_speed_and_memory():
+    baseline = {"run_backtest@10000": {"bars_per_sec": 1000.0, "peak_mb": 10.0}}
+    result = {"benchmark": "run_backtest", "bars": 10_000, "seconds": 1.0}
+
+    ok = {"run_backtest@10000": dict(result, bars_per_sec=800.0, peak_mb=12.0),
+          "calculate_rsi@10000": dict(result, bars_per_sec=1.0, peak_mb=None)}
+    assert compare_to_baseline(ok, baseline, threshold_pct=25) == []
+
+    slow = {"run_backtest@10000": dict(result, bars_per_sec=700.0, peak_mb=13.0)}
+    messages = compare_to_baseline(slow, baseline, threshold_pct=25)
+    assert len(messages) == 2
+    assert "-30.0%" in messages[0] and "+30.0%" in messages[1]
+
+
+
+def test_short_benchmarks_use_the_short_threshold():
+    # 10k کندل با 2M کندل بر ثانیه (5ms) کوتاه است؛ 40٪ افت فقط با آستانه کوتاه‌ها پذیرفته می‌شود
+    baseline = {"calculate_rsi@10000": {"bars_per_sec": 2_000_000.0, "peak_mb": None}}
+    result = {"calculate_rsi@10000": {"benchmark": "calculate_rsi", "bars": 10_000, "seconds": 0.008,
+                                      "bars_per_sec": 1_200_000.0, "peak_mb": None}}
+
+    assert compare_to_baseline(result, baseline, threshold_pct=25, short_threshold_pct=50) == []
+    assert len(compare_to_baseline(result, baseline, threshold_pct=25, short_threshold_pct=25)) == 1
+
+
+def test_measure_repeats_short_calls_until_min_seconds():
+    calls = []
+    seconds, peak_mb = measure(lambda: calls.append(1), repeat=2, memory=False, min_seconds=0.02)
+
+    assert len(calls) > 100 and peak_mb is None
+    assert 0 < seconds < 0.01
+
+def test_run_suite_and_baseline_roundtrip(tmp_path):
+    results = run_suite(sizes=[2_000], names=["calculate_rsi", "run_backtest_fast"], repeat=1, verbose=False)
+
+    assert set(results) == {"calculate_rsi@2000", "run_backtest_fast@2000"}
+    assert all(r["bars_per_sec"] > 0 and r["peak_mb"] > 0 for r in results.values())
+
+    path = str(tmp_path / "baseline.json")
+    save_baseline(results, path)
+    assert compare_to_baseline(results, load_baseline(path), threshold_pct=50) == []
+
+    with pytest.raises(ValueError):
+        run_suite(sizes=[2_000], names=["unknown"], verbose=False)
@@ -0,0 +1,79 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import pytest
+from catalog import parse_run_folder, record_run, backfill, query_runs, best_run
+from database import close_connections
+from utils.report import save_results
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    yield str(tmp_path / "catalog.db")
+    close_connections()
+
+
+def write_run(results_dir, name, sharpe, config=None):
+    folder = os.path.join(results_dir, name)
+    save_results(
+        strategy_name=name.rsplit('_', 2)[0],
+        trade_log=[{"entry_time": "2025-08-01T00:00:00", "profit_pct": 1.0}],
+        metrics={"Total Return (%)": sharpe * 2, "Sharpe Ratio": sharpe, "Final Capital": 1000 + sharpe},
+        capital_over_time=[],
+        output_dir=folder,
+        config=config
+    )
+    return folder
+
+
+def test_parse_run_folder():
+    assert parse_run_folder("results/Supertrend + RSI_15T_Out-of-Sample_20250803_223112") == {
+        "strategy": "Supertrend + RSI",
+        "timeframe": "15T",
+        "sample": "Out-of-Sample",
+        "run_time": "2025-08-03T22:31:12",
+    }
+    assert parse_run_folder("Advanced Strategy_1D_20250803_223117")["sample"] is None
+    assert parse_run_folder("strategy_comparison") is None
+
+
+def test_backfill_indexes_folders_once(tmp_path, db_file):
+    results_dir = str(tmp_path / "results")
+    write_run(results_dir, "Supertrend + RSI_15T_Out-of-Sample_20250803_100000", 1.5)
+    write_run(results_dir, "Supertrend + RSI_15T_Out-of-Sample_20250805_100000", 0.5,
+              config={"params": {"rsi_period": 7}, "symbol": "BTC-USD", "data_hash": "abc"})
+    write_run(results_dir, "Supertrend + RSI_15T_In-Sample_20250805_100000", 9.0)
+    write_run(results_dir, "Advanced Strategy_1H_Out-of-Sample_20250805_100000", 5.0)
+    os.makedirs(os.path.join(results_dir, "strategy_comparison"))
+
+    assert backfill(results_dir, db_file=db_file, verbose=False) == 4
+    assert backfill(results_dir, db_file=db_file, verbose=False) == 0
+
+    runs = query_runs(timeframe="15T", sample="Out-of-Sample", db_file=db_file)
+    assert runs["sharpe_ratio"].tolist() == [1.5, 0.5]
+    assert runs["trade_count"].tolist() == [1, 1]
+
+    best = best_run("sharpe_ratio", timeframe="15T", sample="Out-of-Sample", since="2025-08-04", db_file=db_file)
+    assert best["folder"] == "Supertrend + RSI_15T_Out-of-Sample_20250805_100000"
+    assert json.loads(best["params"]) == {"rsi_period": 7}
+    assert best["data_hash"] == "abc"
+
+    assert best_run("sharpe_ratio", timeframe="5T", db_file=db_file) is None
+
+
+def test_record_run_updates_existing_entry(tmp_path, db_file):
+    folder = write_run(str(tmp_path / "results"), "Supertrend + RSI_1H_In-Sample_20250801_120000", 1.0)
+    record_run(folder, {"Sharpe Ratio": 1.0}, db_file=db_file)
+    record_run(folder, {"Sharpe Ratio": 2.0}, params={"a": 1}, db_file=db_file)
+
+    runs = query_runs(strategy="Supertrend + RSI", db_file=db_file)
+    assert len(runs) == 1
+    assert runs.loc[0, "sharpe_ratio"] == 2.0
+    assert runs.loc[0, "run_time"] == "2025-08-01T12:00:00"
+
+
+def test_query_runs_rejects_unknown_column(db_file):
+    with pytest.raises(ValueError):
+        query_runs(order_by="sharpe_ratio; DROP TABLE catalog", db_file=db_file)
@@ -0,0 +1,81 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from data import BarPyramid, IncrementalResampler, resample_data
+
+TIMEFRAMES = ['1D', '5T', '1H', '15T']
+
+
+def random_bars(seed, tz, rows=6000):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, rows)))
+    df = pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.0005, rows)),
+        "High": close * 1.001,
+        "Low": close * 0.999,
+        "Close": close,
+        "Volume": rng.integers(0, 1000, rows).astype(float),
+    }, index=pd.date_range("2024-03-01 07:35", periods=rows, freq='5min', tz=tz))
+    return df[rng.random(rows) > 0.2]  # کندل‌های گمشده
+
+
+@pytest.mark.parametrize("tz", [None, "UTC", "America/New_York"])
+def test_bar_pyramid_matches_resample_data(tz):
+    df = random_bars(0, tz)
+
+    levels = BarPyramid(df).build(TIMEFRAMES)
+
+    assert list(levels) == ['5T', '15T', '1H', '1D']
+    for tf, level in levels.items():
+        pd.testing.assert_frame_equal(level, resample_data(df.copy(), tf), check_freq=False, check_exact=True)
+
+
+def test_bar_pyramid_caches_levels():
+    pyramid = BarPyramid(random_bars(1, "UTC"))
+    hourly = pyramid['1H']
+
+    assert pyramid['1H'] is hourly
+    # سطح روزانه از سطح ساعتی کش‌شده ساخته می‌شود و همان نتیجه را دارد
+    pd.testing.assert_frame_equal(pyramid['1D'], resample_data(pyramid.df.copy(), '1D'), check_freq=False)
+
+
+def collect(updates):
+    # کندل‌های به‌روزشده جایگزین نسخه قبلی همان سطل می‌شوند
+    combined = pd.concat([u for u in updates if not u.empty])
+    return combined[~combined.index.duplicated(keep='last')]
+
+
+@pytest.mark.parametrize("tz", [None, "UTC", "America/New_York"])
+@pytest.mark.parametrize("interval", ['15T', '1H', '1D'])
+def test_incremental_resampler_matches_full_resample(tz, interval):
+    df = random_bars(2, tz)
+    rng = np.random.default_rng(3)
+    cuts = np.sort(rng.choice(np.arange(1, len(df)), size=40, replace=False))
+
+    resampler = IncrementalResampler(interval)
+    updates = []
+    for k, chunk in enumerate(np.split(np.arange(len(df)), cuts)):
+        if k == 20:
+            # ادامه بعد از راه‌اندازی مجدد
+            resampler = IncrementalResampler.from_state(json.loads(json.dumps(resampler.get_state())))
+        updates.append(resampler.update(df.iloc[chunk]))
+
+    pd.testing.assert_frame_equal(collect(updates), resample_data(df.copy(), interval), check_freq=False)
+
+
+def test_incremental_resampler_emits_only_new_buckets():
+    df = random_bars(4, "UTC", rows=600)
+    resampler = IncrementalResampler('1H')
+    resampler.update(df.iloc[:300])
+
+    new = resampler.update(df.iloc[300:])
+
+    # فقط سطل‌های کندل‌های جدید (شامل سطل باز قبلی که به‌روز شده)
+    assert new.index.equals(df.index[300:].floor('1h').unique().as_unit(new.index.unit))
+    # کندل‌های تکراری یا قدیمی‌تر نادیده گرفته می‌شوند
+    assert resampler.update(df.iloc[200:]).empty
@@ -0,0 +1,130 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+from backtest import run_backtest
+from database import (
+    get_connection, close_connections, init_db, create_run, save_trade, save_trades, save_metrics, data_fingerprint
+)
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    path = str(tmp_path / "results" / "test.db")
+    yield path
+    close_connections()
+
+
+def random_ohlc(seed, rows=800):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    return pd.DataFrame({
+        "Close": close,
+        "High": close * 1.005,
+        "Low": close * 0.995,
+        "Signal": rng.choice(['buy', 'sell', 'hold'], rows, p=[0.05, 0.05, 0.9]),
+    }, index=pd.date_range("2024-01-01", periods=rows, freq='5min', tz='UTC'))
+
+
+def test_init_db_uses_wal_and_indexes(db_file):
+    init_db(db_file)
+    conn = get_connection(db_file)
+
+    assert get_connection(db_file) is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_trades_run", "idx_metrics_run", "idx_runs_lookup", "idx_runs_data_hash"} <= indexes
+
+
+def test_save_trades_compact_and_dicts_write_same_rows(db_file):
+    df = random_ohlc(0)
+    kwargs = dict(stop_loss_pct=0.01, take_profit_pct=0.02, trading_fee_pct=0.001)
+    _, trade_log, _, _ = run_backtest(df, **kwargs)
+    _, compact_log, _, _ = run_backtest(df, compact=True, **kwargs)
+
+    run_a = create_run("test", params={"a": 1}, symbol="BTC-USD", timeframe="5m", db_file=db_file)
+    run_b = create_run("test", params={"a": 1}, symbol="BTC-USD", timeframe="5m", db_file=db_file)
+    assert save_trades(trade_log, run_a, db_file=db_file) == len(trade_log)
+    assert save_trades(compact_log, run_b, db_file=db_file) == len(trade_log)
+
+    query = "SELECT * FROM trades WHERE run_id = ? ORDER BY id"
+    conn = get_connection(db_file)
+    rows_a = [row[2:] for row in conn.execute(query, (run_a,))]
+    rows_b = [row[2:] for row in conn.execute(query, (run_b,))]
+    assert rows_a == rows_b
+    assert len(rows_a) > 0
+
+
+def test_runs_join_trades_and_metrics(db_file):
+    df = random_ohlc(1)
+    run_id = create_run(
+        "Supertrend + RSI", params={"rsi_period": 14}, symbol="BTC-USD", timeframe="1h",
+        data_hash=data_fingerprint(df), db_file=db_file
+    )
+    save_trade({"entry_time": "2024-01-01T00:00:00", "entry_price": 100.0, "reason": "buy"}, run_id, db_file=db_file)
+    save_metrics({"Total Return (%)": 1.5, "Sharpe Ratio": 0.3}, "2024-01-02T00:00:00", run_id, db_file=db_file)
+
+    row = get_connection(db_file).execute("""
+    SELECT runs.strategy, runs.params, runs.data_hash, COUNT(trades.id), metrics.total_return
+    FROM runs
+    JOIN trades ON trades.run_id = runs.id
+    JOIN metrics ON metrics.run_id = runs.id
+    WHERE runs.id = ?
+    GROUP BY runs.id
+    """, (run_id,)).fetchone()
+
+    assert row[0] == "Supertrend + RSI"
+    assert json.loads(row[1]) == {"rsi_period": 14}
+    assert row[2] == data_fingerprint(df.copy())
+    assert row[3:] == (1, 1.5)
+
+
+def test_data_fingerprint_changes_with_data():
+    df = random_ohlc(2)
+    changed = df.copy()
+    changed.iloc[10, 0] += 1e-9
+
+    assert data_fingerprint(df) == data_fingerprint(df.copy())
+    assert data_fingerprint(df) != data_fingerprint(changed)
+    assert data_fingerprint(df) != data_fingerprint(df.iloc[1:])
+
+
+def test_old_schema_is_migrated(db_file):
+    os.makedirs(os.path.dirname(db_file), exist_ok=True)
+    with sqlite3.connect(db_file) as conn:
+        conn.execute("CREATE TABLE trades (id INTEGER PRIMARY KEY AUTOINCREMENT, entry_time TEXT, exit_time TEXT, "
+                     "entry_price REAL, exit_price REAL, volume REAL, profit_pct REAL, reason TEXT, "
+                     "fee_cost_entry REAL, fee_cost_exit REAL)")
+        conn.execute("INSERT INTO trades (entry_time) VALUES ('2023-01-01')")
+    conn.close()
+
+    save_trades([{"entry_time": "2024-01-01"}], run_id=7, db_file=db_file)
+
+    rows = get_connection(db_file).execute("SELECT entry_time, run_id FROM trades ORDER BY id").fetchall()
+    assert rows == [("2023-01-01", None), ("2024-01-01", 7)]
+
+
+def _worker_write(args):
+    db_file, worker = args
+    run_id = create_run("worker", params={"worker": worker}, db_file=db_file)
+    for _ in range(20):
+        save_trades([{"entry_time": str(k), "profit_pct": float(worker)} for k in range(50)], run_id, db_file=db_file)
+    close_connections()
+    return run_id
+
+
+def test_concurrent_workers_write_safely(db_file):
+    init_db(db_file)
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        run_ids = list(pool.map(_worker_write, [(db_file, w) for w in range(4)]))
+
+    conn = get_connection(db_file)
+    assert len(set(run_ids)) == 4
+    counts = dict(conn.execute("SELECT run_id, COUNT(*) FROM trades GROUP BY run_id").fetchall())
+    assert counts == {run_id: 1000 for run_id in run_ids}
@@ -2,9 +2,11 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import numpy as np
 import pandas as pd
 import pytest
-from indicators import calculate_rsi, calculate_supertrend
+import ta
+from indicators import calculate_rsi, calculate_supertrend, compute_atr
 
 def sample_df():
     data = {
@@ -34,4 +36,56 @@ def test_calculate_supertrend_valid():
 def test_calculate_supertrend_missing_column():
     df = sample_df().drop(columns=["High"])
     with pytest.raises(ValueError):
-        calculate_supertrend(df)
\ No newline at end of file
+        calculate_supertrend(df)
+
+def random_ohlc(seed, rows=500):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    return pd.DataFrame({
+        'Close': close,
+        'High': close * (1 + rng.uniform(0, 0.02, rows)),
+        'Low': close * (1 - rng.uniform(0, 0.02, rows)),
+    }, index=pd.date_range("2023-01-01", periods=rows, freq='15min'))
+
+def reference_supertrend(df, period, multiplier):
+    # پیاده‌سازی قبلی (حلقه روی کندل‌ها) برای مقایسه بیت به بیت
+    atr = ta.volatility.AverageTrueRange(
+        high=df['High'], low=df['Low'], close=df['Close'], window=period
+    ).average_true_range()
+    hl2 = (df['High'] + df['Low']) / 2
+    upperband = hl2 + multiplier * atr
+    lowerband = hl2 - multiplier * atr
+    supertrend = [True]
+    for i in range(1, len(df)):
+        if df['Close'].iloc[i] > upperband.iloc[i - 1]:
+            supertrend.append(True)
+        elif df['Close'].iloc[i] < lowerband.iloc[i - 1]:
+            supertrend.append(False)
+        else:
+            supertrend.append(supertrend[-1])
+    return supertrend, atr, upperband, lowerband
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("period, multiplier", [(7, 2), (10, 3), (14, 1.5)])
+def test_calculate_supertrend_matches_reference(seed, period, multiplier):
+    df = random_ohlc(seed)
+    expected, atr, upperband, lowerband = reference_supertrend(df, period, multiplier)
+
+    result = calculate_supertrend(df, period=period, multiplier=multiplier, bands=True)
+
+    assert result['Supertrend'].dtype == bool
+    assert result['Supertrend'].tolist() == expected
+    assert np.array_equal(compute_atr(df['High'], df['Low'], df['Close'], period), atr.to_numpy())
+    assert np.array_equal(result['Supertrend_Upper'].to_numpy(), upperband.to_numpy())
+    assert np.array_equal(result['Supertrend_Lower'].to_numpy(), lowerband.to_numpy())
+
+def test_calculate_supertrend_bands_line_follows_trend():
+    result = calculate_supertrend(random_ohlc(0), period=10, multiplier=3, bands=True)
+    up = result['Supertrend']
+    assert (result.loc[up, 'Supertrend_Line'] == result.loc[up, 'Supertrend_Lower']).all()
+    assert (result.loc[~up, 'Supertrend_Line'] == result.loc[~up, 'Supertrend_Upper']).all()
+
+def test_calculate_supertrend_short_data_with_bands():
+    result = calculate_supertrend(sample_df().iloc[:5], period=10, bands=True)
+    assert result['Supertrend'].all()
+    assert result['Supertrend_Line'].isna().all()
@@ -0,0 +1,26 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import main
+from main import run_jobs
+
+
+def record_job(df, timeframe, suffix):
+    if timeframe == "bad":
+        raise ValueError(f"❌ Error: job {timeframe} {suffix} failed")
+    with open(os.path.join(df, f"{timeframe}_{suffix}"), "w") as f:
+        f.write("done")
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_run_jobs_raises_after_all_jobs(tmp_path, monkeypatch, max_workers):
+    monkeypatch.setattr(main.os, "cpu_count", lambda: 2)
+    jobs = [(str(tmp_path), "15T", "In-Sample"), (str(tmp_path), "bad", "In-Sample")]
+
+    with pytest.raises(ValueError, match="bad In-Sample"):
+        run_jobs(record_job, jobs, max_workers=max_workers)
+
+    # در حالت pool بقیه jobها تا انتها اجرا می‌شوند
+    assert os.path.exists(tmp_path / "15T_In-Sample")
@@ -3,7 +3,10 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import pytest
-from metrics import calculate_metrics
+import numpy as np
+import pandas as pd
+from backtest import run_backtest_batch
+from metrics import calculate_metrics, batch_metrics, metrics_records, METRIC_KEYS
 from datetime import datetime, timedelta
 import math
 
@@ -78,4 +81,78 @@ def test_calculate_metrics_consecutive_mixed():
 def test_calculate_metrics_empty_inputs():
     result = calculate_metrics([], [], initial_capital=1000)
     for key, value in result.items():
-        assert (value == 0) or (isinstance(value, float) and math.isnan(value))
\ No newline at end of file
+        assert (value == 0) or (isinstance(value, float) and math.isnan(value))
+
+
+def _reference_metrics(time_series, trade_log, initial_capital=1000, timeframe_minutes=5):
+    # پیاده‌سازی مرجع pandas (نسخه قبلی calculate_metrics) برای چند متریک اصلی
+    df = pd.DataFrame(time_series, columns=['Time', 'Capital']).set_index('Time')
+    returns = df['Capital'].pct_change().dropna()
+    roll_max = df['Capital'].cummax()
+    periods_per_year = (60 / timeframe_minutes) * 24 * 252
+    negative = returns[returns < 0]
+    return {
+        "Total Return (%)": (df['Capital'].iloc[-1] / initial_capital - 1) * 100,
+        "Max Drawdown (%)": ((df['Capital'] - roll_max) / roll_max).min() * 100,
+        "Sharpe Ratio": returns.mean() / returns.std() * np.sqrt(periods_per_year),
+        "Sortino Ratio": returns.mean() / negative.std() * np.sqrt(periods_per_year),
+        "Std Dev of Returns": returns.std(),
+    }
+
+def random_curves(seed, bars=400, curves=6):
+    rng = np.random.default_rng(seed)
+    equity = 1000 * np.exp(np.cumsum(rng.normal(0, 0.01, (bars, curves)), axis=0))
+    equity[bars // 2: bars // 2 + 20, 0] = equity[bars // 2, 0]  # بازه بدون تغییر (پوزیشن بسته)
+    profits = [rng.normal(0.2, 2, rng.integers(0, 30)) for _ in range(curves)]
+    times = [datetime(2023, 1, 1) + timedelta(minutes=5 * i) for i in range(bars)]
+    return equity, profits, times
+
+@pytest.mark.parametrize("seed", range(3))
+def test_batch_metrics_matches_per_curve(seed):
+    equity, profits, times = random_curves(seed)
+
+    table = batch_metrics(equity, profits, times[0], times[-1], initial_capital=1000, timeframe_minutes=5)
+
+    assert list(table.columns) == METRIC_KEYS
+    assert len(table) == equity.shape[1]
+    for j, row in enumerate(metrics_records(table)):
+        single = calculate_metrics(
+            list(zip(times, equity[:, j])),
+            [{'profit_pct': p} for p in profits[j]],
+            initial_capital=1000,
+            timeframe_minutes=5
+        )
+        assert row == single
+
+        reference = _reference_metrics(list(zip(times, equity[:, j])), [])
+        for key, value in reference.items():
+            assert single[key] == pytest.approx(value, rel=1e-12)
+
+def test_batch_metrics_masks_invalid_returns():
+    equity, _, times = random_curves(4)
+    equity[100:103, 1] = np.nan    # کندل‌های بدون داده
+    equity[200:, 3] = 0.0          # سرمایه صفر: بازده 0/0 نامعتبر است
+
+    table = batch_metrics(equity, None, times[0], times[-1], initial_capital=1000, timeframe_minutes=5)
+
+    for j, row in enumerate(metrics_records(table)):
+        single = calculate_metrics(list(zip(times, equity[:, j])), [], initial_capital=1000, timeframe_minutes=5)
+        assert row == single
+        if j != 3:
+            reference = _reference_metrics(list(zip(times, equity[:, j])), [])
+            for key, value in reference.items():
+                assert single[key] == pytest.approx(value, rel=1e-12), key
+
+def test_batch_metrics_accepts_backtest_trade_table():
+    rng = np.random.default_rng(5)
+    bars = 300
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    index = pd.date_range("2024-01-01", periods=bars, freq='5min', tz='UTC')
+    signals = rng.choice(np.array([0, 1, 2], dtype=np.int8), size=(bars, 4), p=[0.9, 0.05, 0.05])
+
+    batch = run_backtest_batch(close, close * 1.005, close * 0.995, signals, index, stop_loss_pct=0.01, trading_fee_pct=0.001)
+    table = batch_metrics(batch["equity"], batch["trades"], index[0], index[-1])
+
+    for j, row in enumerate(metrics_records(table)):
+        single = calculate_metrics(list(zip(index, batch["equity"][:, j])), batch["trade_logs"][j])
+        assert row == single
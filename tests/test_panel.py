@@ -0,0 +1,81 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from indicators import compute_atr
+from panel import Panel, panel_atr
+from signals import encode_signals
+from strategies.supertrend_rsi_strategies import supertrend_rsi_strategy
+from strategies.advanced_strategies import advanced_strategy
+
+STRATEGY_PARAMS = dict(rsi_period=7, rsi_buy_threshold=45, rsi_sell_threshold=60, supertrend_period=7, supertrend_multiplier=1)
+
+
+def random_frames(seed, symbols=8, rows=400):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2024-01-01", periods=rows, freq='1h', tz='UTC')
+    frames = {}
+    for s in range(symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+        if s % 2:
+            close = np.round(close, 1)  # کندل‌های بدون تغییر
+        df = pd.DataFrame({
+            "Open": close,
+            "High": close * (1 + rng.uniform(0, 0.01, rows)),
+            "Low": close * (1 - rng.uniform(0, 0.01, rows)),
+            "Close": close,
+            "Volume": 1.0,
+        }, index=index)
+        keep = rng.random(rows) > 0.1  # کندل‌های گمشده
+        if s == 2:
+            keep[:200] = False  # نمادی که دیرتر شروع به معامله کرده
+        if s == 3:
+            keep[5:] = False  # نماد با داده کمتر از دوره Supertrend
+        frames[f"SYM{s}"] = df[keep]
+    return frames
+
+
+@pytest.mark.parametrize("seed", range(2))
+@pytest.mark.parametrize("strategy,params", [(supertrend_rsi_strategy, STRATEGY_PARAMS), (advanced_strategy, {})])
+def test_panel_strategy_matches_per_symbol(seed, strategy, params):
+    frames = random_frames(seed)
+    panel = Panel.from_frames(frames)
+
+    result = strategy(panel, **params)
+
+    assert result["Signal"].shape == panel.shape
+    for j, symbol in enumerate(panel.symbols):
+        rows = panel.valid[:, j]
+        expected = strategy(frames[symbol], **params)
+        assert np.array_equal(result["RSI"][rows, j], expected["RSI"].to_numpy(), equal_nan=True)
+        assert np.array_equal(result["Supertrend"][rows, j], expected["Supertrend"].to_numpy())
+        assert np.array_equal(result["Signal"][rows, j], encode_signals(expected["Signal"]))
+        # کندل‌های گمشده هیچ سیگنالی ندارند
+        assert not result["Signal"][~rows, j].any()
+
+
+def test_panel_atr_matches_compute_atr():
+    frames = random_frames(3, symbols=4)
+    panel = Panel.from_frames({k: v for k, v in frames.items() if k != "SYM3"})
+
+    atr = panel_atr(panel.high, panel.low, panel.close, period=10)
+
+    for j, symbol in enumerate(panel.symbols):
+        df = frames[symbol]
+        expected = compute_atr(df["High"], df["Low"], df["Close"], 10)
+        assert np.array_equal(atr[panel.valid[:, j], j], expected)
+        assert np.isnan(atr[~panel.valid[:, j], j]).all()
+
+
+def test_panel_frame_roundtrip():
+    frames = random_frames(4, symbols=3)
+    panel = Panel.from_frames(frames)
+    result = supertrend_rsi_strategy(panel, **STRATEGY_PARAMS)
+
+    df = panel.frame("SYM1", signals=result["Signal"])
+
+    pd.testing.assert_frame_equal(df.drop(columns="Signal"), frames["SYM1"], check_freq=False)
+    assert df["Signal"].tolist() == supertrend_rsi_strategy(frames["SYM1"], **STRATEGY_PARAMS)["Signal"].tolist()
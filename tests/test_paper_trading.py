@@ -0,0 +1,119 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
+from backtest import run_backtest
+from strategies.supertrend_rsi_strategies import supertrend_rsi_strategy
+from database import connect_paper_db
+from paper_trading import BarFeed, PaperTrader, ReplayFeed, SupertrendRSISignals, run_paper_trading
+
+BACKTEST_KWARGS = dict(initial_capital=1000, stop_loss_pct=0.02, take_profit_pct=0.04, trading_fee_pct=0.001)
+STRATEGY_PARAMS = dict(rsi_period=7, rsi_buy_threshold=50, rsi_sell_threshold=65, supertrend_period=7, supertrend_multiplier=1)
+
+
+def random_ohlc(seed, rows=1500):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    return pd.DataFrame({
+        "Open": close,
+        "High": close * (1 + rng.uniform(0, 0.01, rows)),
+        "Low": close * (1 - rng.uniform(0, 0.01, rows)),
+        "Close": close,
+        "Volume": 1.0,
+    }, index=pd.date_range("2024-01-01", periods=rows, freq='1h', tz='UTC'))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_paper_trader_replay_matches_backtest(seed):
+    df = random_ohlc(seed)
+    expected = run_backtest(supertrend_rsi_strategy(df, **STRATEGY_PARAMS), **BACKTEST_KWARGS)
+
+    result = PaperTrader(SupertrendRSISignals(**STRATEGY_PARAMS), **BACKTEST_KWARGS).run(ReplayFeed(df))
+
+    assert result[0] == expected[0]
+    assert result[1] == expected[1]
+    assert result[2] == expected[2]
+    assert result[3] == expected[3]
+    assert len(expected[1]) > 0
+
+
+def test_signals_state_roundtrip():
+    df = random_ohlc(1)
+    expected = supertrend_rsi_strategy(df, **STRATEGY_PARAMS)['Signal'].tolist()
+
+    signals = SupertrendRSISignals(**STRATEGY_PARAMS)
+    bars = list(zip(df['High'], df['Low'], df['Close']))
+    streamed = [signals.update(*bar) for bar in bars[:700]]
+    signals = SupertrendRSISignals.from_state(json.loads(json.dumps(signals.get_state())))
+    streamed += [signals.update(*bar) for bar in bars[700:]]
+
+    assert streamed == expected
+
+
+def test_run_paper_trading_writes_fills_and_equity(tmp_path):
+    df = random_ohlc(2, rows=600)
+    db_file = str(tmp_path / "paper.db")
+
+    _, trade_log, capital_over_time, _ = run_paper_trading(
+        ReplayFeed(df), STRATEGY_PARAMS, db_file=db_file, run_id="test", verbose=False, **BACKTEST_KWARGS
+    )
+
+    with sqlite3.connect(db_file) as conn:
+        fills = conn.execute("SELECT side, reason FROM paper_fills WHERE run_id = 'test' ORDER BY id").fetchall()
+        equity = conn.execute("SELECT equity FROM paper_equity WHERE run_id = 'test' ORDER BY id").fetchall()
+
+    assert len(fills) == 2 * len(trade_log)
+    assert [f[1] for f in fills[1::2]] == [t["reason"] for t in trade_log]
+    assert [e[0] for e in equity] == [c for _, c in capital_over_time]
+
+
+def test_paper_trader_bounds_equity_history(tmp_path):
+    df = random_ohlc(3, rows=600)
+    expected = run_backtest(supertrend_rsi_strategy(df, **STRATEGY_PARAMS), **BACKTEST_KWARGS)
+
+    trader = PaperTrader(SupertrendRSISignals(**STRATEGY_PARAMS), history=100, **BACKTEST_KWARGS)
+    result = trader.run(ReplayFeed(df))
+    assert len(trader.capital_over_time) == 100
+    assert result[2] == expected[2][-100:]
+
+    # با دیتابیس منحنی کامل از paper_equity خوانده می‌شود
+    conn = connect_paper_db(str(tmp_path / "paper.db"))
+    try:
+        trader = PaperTrader(SupertrendRSISignals(**STRATEGY_PARAMS), db_conn=conn, history=100, **BACKTEST_KWARGS)
+        result = trader.run(ReplayFeed(df))
+    finally:
+        conn.close()
+    assert len(trader.capital_over_time) == 100
+    assert result[2] == expected[2]
+
+    with pytest.raises(TypeError):
+        BarFeed()
+
+
+def test_replay_feed_keeps_csv_timestamps(tmp_path):
+    df = random_ohlc(4, rows=50)
+    naive = df.tz_localize(None)
+    naive.to_csv(tmp_path / "naive.csv")
+    df.to_csv(tmp_path / "aware.csv")
+
+    naive_bars = list(ReplayFeed(str(tmp_path / "naive.csv")))
+    aware_bars = list(ReplayFeed(str(tmp_path / "aware.csv")))
+
+    assert [bar[0] for bar in naive_bars] == list(naive.index)
+    assert naive_bars[0][0].tz is None
+    assert [bar[0] for bar in aware_bars] == list(df.index)
+
+
+def test_default_run_ids_do_not_collide(tmp_path):
+    df = random_ohlc(5, rows=200)
+    db_file = str(tmp_path / "paper.db")
+
+    first = run_paper_trading(ReplayFeed(df), STRATEGY_PARAMS, db_file=db_file, verbose=False, **BACKTEST_KWARGS)
+    second = run_paper_trading(ReplayFeed(df), STRATEGY_PARAMS, db_file=db_file, verbose=False, **BACKTEST_KWARGS)
+
+    assert len(first[2]) == len(second[2]) == len(df)
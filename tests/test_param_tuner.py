@@ -2,9 +2,14 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import itertools
+import math
 import pytest
+import numpy as np
 import pandas as pd
-from param_tuner import param_tuner
+from param_tuner import halving_tuner, param_tuner, plan_grid, sample_params
+from strategies.supertrend_rsi_strategies import supertrend_rsi_strategy
+from strategies.advanced_strategies import advanced_strategy
 
 def dummy_strategy(df, rsi_period):
     df['Signal'] = ['buy'] + [''] * (len(df) - 1)
@@ -36,4 +41,138 @@ def test_param_tuner_runs(sample_data):
     assert isinstance(best_result, dict)
     assert "params" in best_result
     assert "metrics" in best_result
-    assert len(all_results) == 2
\ No newline at end of file
+    assert len(all_results) == 2
+
+
+MAIN_GRID = {
+    "rsi_period": [7, 14],
+    "rsi_buy_threshold": [25, 30],
+    "rsi_sell_threshold": [65, 70],
+    "supertrend_period": [7, 10],
+    "supertrend_multiplier": [2, 3]
+}
+
+@pytest.fixture
+def random_ohlc():
+    rng = np.random.default_rng(7)
+    rows = 600
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    return pd.DataFrame({
+        "Open": close,
+        "High": close * (1 + rng.uniform(0, 0.01, rows)),
+        "Low": close * (1 - rng.uniform(0, 0.01, rows)),
+        "Close": close,
+        "Volume": rng.uniform(1, 10, rows),
+    }, index=pd.date_range(start="2022-01-01", periods=rows, freq='1h'))
+
+def same_metrics(a, b):
+    assert a.keys() == b.keys()
+    for key in a:
+        assert a[key] == b[key] or (math.isnan(a[key]) and math.isnan(b[key])), key
+
+def test_plan_grid_counts_distinct_indicator_configs():
+    combos = [dict(zip(MAIN_GRID, values)) for values in itertools.product(*MAIN_GRID.values())]
+    plan = plan_grid(supertrend_rsi_strategy, combos)
+
+    assert len(plan["combos"]) == 32
+    assert len(plan["indicators"]["RSI"]) == 2
+    assert len(plan["indicators"]["Supertrend"]) == 4
+    _, _, signal_kwargs = plan["combos"][0]
+    assert signal_kwargs == {"rsi_buy_threshold": 25, "rsi_sell_threshold": 65}
+
+def test_plan_grid_without_plan():
+    assert plan_grid(dummy_strategy, [{"rsi_period": 5}]) is None
+
+@pytest.mark.parametrize("strategy, grid", [
+    (supertrend_rsi_strategy, MAIN_GRID),
+    (advanced_strategy, {"rsi_window": [7, 14], "supertrend_period": [7, 10], "supertrend_multiplier": [2, 3]}),
+])
+def test_factorized_tuner_matches_per_combo_runs(random_ohlc, strategy, grid):
+    kwargs = dict(stop_loss_pct=0.02, take_profit_pct=0.04, trading_fee_pct=0.001, timeframe_minutes=60, verbose=False)
+
+    best, results = param_tuner(random_ohlc, strategy, grid, **kwargs)
+    # لامبدا نقشه اندیکاتور ندارد و مسیر قدیمی (یک اجرای کامل برای هر ترکیب) را می‌رود
+    best_ref, results_ref = param_tuner(random_ohlc, lambda df, **p: strategy(df, **p), grid, **kwargs)
+
+    assert [r["params"] for r in results] == [r["params"] for r in results_ref]
+    for r, r_ref in zip(results, results_ref):
+        same_metrics(r["metrics"], r_ref["metrics"])
+    assert best["params"] == best_ref["params"]
+
+def test_parallel_tuner_matches_serial(random_ohlc):
+    kwargs = dict(stop_loss_pct=0.02, take_profit_pct=0.04, trading_fee_pct=0.001, timeframe_minutes=60, verbose=False)
+
+    best, results = param_tuner(random_ohlc, supertrend_rsi_strategy, MAIN_GRID, **kwargs)
+    best_par, results_par = param_tuner(random_ohlc, supertrend_rsi_strategy, MAIN_GRID, n_jobs=2, **kwargs)
+
+    assert [r["params"] for r in results_par] == [r["params"] for r in results]
+    for r, r_par in zip(results, results_par):
+        same_metrics(r["metrics"], r_par["metrics"])
+    assert best_par["params"] == best["params"]
+
+def test_parallel_tuner_with_unpicklable_strategy_runs_serially(sample_data):
+    best_result, all_results = param_tuner(
+        df=sample_data,
+        strategy_func=lambda df, rsi_period: dummy_strategy(df, rsi_period),
+        param_grid={"rsi_period": [5, 10]},
+        timeframe_minutes=60,
+        n_jobs=2
+    )
+
+    assert best_result is not None
+    assert len(all_results) == 2
+
+def test_sample_params_lhs_covers_ranges():
+    space = {"rsi_period": {"low": 5, "high": 21}, "supertrend_multiplier": {"low": 1.0, "high": 3.0}, "rsi_buy_threshold": [25, 30]}
+    combos = sample_params(space, 50, sampler="lhs", seed=1)
+
+    assert combos == sample_params(space, 50, sampler="lhs", seed=1)
+    assert all(isinstance(c["rsi_period"], int) and 5 <= c["rsi_period"] <= 21 for c in combos)
+    assert all(1.0 <= c["supertrend_multiplier"] < 3.0 for c in combos)
+    assert {c["rsi_buy_threshold"] for c in combos} == {25, 30}
+    # در LHS هر لایه از بازه پیوسته دقیقاً یک نمونه دارد
+    strata = sorted(int((c["supertrend_multiplier"] - 1.0) / 2.0 * 50) for c in combos)
+    assert strata == list(range(50))
+
+def test_sample_params_grid_rejects_ranges():
+    with pytest.raises(ValueError):
+        sample_params({"rsi_period": {"low": 5, "high": 21}}, 10, sampler="grid")
+
+def test_halving_search_evaluates_survivors_on_full_data(random_ohlc):
+    best, results = param_tuner(
+        random_ohlc,
+        supertrend_rsi_strategy,
+        MAIN_GRID,
+        stop_loss_pct=0.02,
+        take_profit_pct=0.04,
+        trading_fee_pct=0.001,
+        verbose=False,
+        search="halving",
+        search_options={"eta": 2, "min_bars": 50}
+    )
+
+    _, full_results = param_tuner(
+        random_ohlc, supertrend_rsi_strategy, MAIN_GRID,
+        stop_loss_pct=0.02, take_profit_pct=0.04, trading_fee_pct=0.001, verbose=False
+    )
+    full = {tuple(r["params"].items()): r["metrics"]["Final Capital"] for r in full_results}
+
+    assert best is not None
+    assert 2 <= len(results) < len(full_results)
+    # مرحله آخر روی کل داده اجرا می‌شود، پس امتیازها با جستجوی کامل یکی است
+    for r in results:
+        assert r["metrics"]["Final Capital"] == full[tuple(r["params"].items())]
+
+def test_halving_resample_fidelity_applies_budget(random_ohlc):
+    kwargs = dict(stop_loss_pct=0.02, take_profit_pct=0.04, trading_fee_pct=0.001, verbose=False,
+                  eta=2, fidelity="resample", resample_intervals=["1D"])
+
+    _, results = halving_tuner(random_ohlc, supertrend_rsi_strategy, MAIN_GRID, **kwargs)
+    # مرحله ارزان 25 کندل روزانه از 600 کندل ساعتی است: 11 کاندیدا با هزینه 11/24 + 5 در budget=6 جا می‌شوند
+    _, budgeted = halving_tuner(random_ohlc, supertrend_rsi_strategy, MAIN_GRID, budget=6, **kwargs)
+
+    assert len(results) == 16
+    assert len(budgeted) == 5
+
+    with pytest.raises(ValueError):
+        halving_tuner(random_ohlc, supertrend_rsi_strategy, MAIN_GRID, fidelity="resample", verbose=False)
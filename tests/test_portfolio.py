@@ -0,0 +1,115 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from backtest import run_backtest
+from panel import Panel
+from portfolio import run_portfolio_backtest
+from signals import SIGNAL_BUY, SIGNAL_SELL
+from strategies.supertrend_rsi_strategies import supertrend_rsi_strategy
+
+BACKTEST_KWARGS = dict(initial_capital=1000, stop_loss_pct=0.02, take_profit_pct=0.04, trading_fee_pct=0.001)
+STRATEGY_PARAMS = dict(rsi_period=7, rsi_buy_threshold=50, rsi_sell_threshold=65, supertrend_period=7, supertrend_multiplier=1)
+
+
+def random_ohlc(rng, rows, start="2024-01-01"):
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    return pd.DataFrame({
+        "Open": close,
+        "High": close * (1 + rng.uniform(0, 0.01, rows)),
+        "Low": close * (1 - rng.uniform(0, 0.01, rows)),
+        "Close": close,
+        "Volume": 1.0,
+    }, index=pd.date_range(start, periods=rows, freq='1h', tz='UTC'))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_single_symbol_portfolio_matches_run_backtest(seed):
+    rng = np.random.default_rng(seed)
+    df = random_ohlc(rng, 1500)
+    df = supertrend_rsi_strategy(df[rng.random(len(df)) > 0.1], **STRATEGY_PARAMS)
+    expected = run_backtest(df, **BACKTEST_KWARGS)
+
+    result = run_portfolio_backtest({"BTC": df}, max_positions=1, **BACKTEST_KWARGS)
+
+    assert result["final_capital"] == expected[0]
+    assert result["trade_logs"]["BTC"] == expected[1]
+    assert result["total_fees"] == expected[3]
+    assert len(expected[1]) > 0
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_no_reentry_on_exit_bar_matches_run_backtest(seed):
+    # کندل 2: حد ضرر و سیگنال خرید هم‌زمان؛ run_backtest در همان کندل دوباره وارد نمی‌شود
+    index = pd.date_range("2024-01-01", periods=6, freq='1h')
+    close = [100.0, 100.0, 90.0, 100.0, 110.0, 120.0]
+    df = pd.DataFrame({"Close": close, "High": close, "Low": [100.0, 100.0, 80.0, 100.0, 110.0, 120.0],
+                       "Signal": ["hold", "buy", "buy", "hold", "hold", "hold"]}, index=index)
+
+    # سیگنال‌های تصادفی پرتراکم که خروج و خرید هم‌کندل را زیاد تکرار می‌کنند
+    rng = np.random.default_rng(seed)
+    dense = random_ohlc(rng, 500)
+    dense["Signal"] = rng.choice(["hold", "buy", "sell"], len(dense), p=[0.4, 0.4, 0.2])
+
+    for frame in (df, dense):
+        expected = run_backtest(frame, initial_capital=1000, stop_loss_pct=0.05, take_profit_pct=0.03,
+                                trading_fee_pct=0.001)
+        result = run_portfolio_backtest({"BTC": frame}, max_positions=1, initial_capital=1000,
+                                        stop_loss_pct=0.05, take_profit_pct=0.03, trading_fee_pct=0.001)
+
+        assert result["final_capital"] == expected[0]
+        assert result["trade_logs"]["BTC"] == expected[1]
+    assert len(expected[1]) > 10
+
+
+def test_shared_capital_and_max_positions():
+    index = pd.date_range("2024-01-01", periods=6, freq='1h')
+    close = np.array([
+        [10.0, 20.0, 40.0],
+        [10.0, 20.0, 40.0],
+        [11.0, 22.0, 44.0],
+        [11.0, 22.0, 44.0],
+        [12.0, np.nan, 48.0],
+        [12.0, 24.0, 48.0],
+    ])
+    signals = np.zeros(close.shape, dtype=np.int8)
+    signals[1, :] = SIGNAL_BUY      # سه خرید هم‌زمان ولی فقط دو جای خالی
+    signals[3, 0] = SIGNAL_SELL
+    signals[4, 2] = SIGNAL_BUY      # نماد سوم بعد از آزاد شدن جا وارد می‌شود
+    panel = Panel(index, ["A", "B", "C"], close=close)
+
+    result = run_portfolio_backtest(panel, signals, initial_capital=1000, max_positions=2)
+    trades = result["trades"]
+
+    assert trades["column"].tolist() == [0, 1, 2]
+    assert trades["entry_idx"].tolist() == [1, 1, 4]
+    # equal weight: هر پوزیشن نصف سرمایه
+    assert np.allclose(trades["volume"][:2] * trades["entry_price"][:2], 500.0)
+    assert trades["exit_idx"].tolist() == [3, 5, 5]
+    assert [t["reason"] for t in result["trade_logs"]["A"]] == ["Signal Sell"]
+    assert [t["reason"] for t in result["trade_logs"]["B"]] == ["Final Sell"]
+
+    # ارزش پوزیشن B در کندل گمشده با آخرین Close معتبر حساب می‌شود
+    equity = result["equity"].to_numpy()
+    assert equity[4] == pytest.approx(result["cash"].iloc[4] + trades["volume"][1] * 22.0 + trades["volume"][2] * 48.0)
+    assert result["final_capital"] == pytest.approx(equity[-1])
+    # A: 500 → 550 که همه‌اش (equity/2 = 550) به C می‌رسد؛ B: 500 → 600
+    assert result["final_capital"] == pytest.approx(1150.0)
+
+
+def test_cash_allocation_splits_free_cash():
+    index = pd.date_range("2024-01-01", periods=3, freq='1h')
+    close = np.full((3, 4), 100.0)
+    signals = np.zeros(close.shape, dtype=np.int8)
+    signals[0, :] = SIGNAL_BUY
+    panel = Panel(index, list("ABCD"), close=close)
+
+    result = run_portfolio_backtest(panel, signals, initial_capital=1000, allocation="cash", trading_fee_pct=0.001)
+
+    spent = result["trades"]["volume"] * 100.0 + result["trades"]["fee_cost_entry"]
+    assert np.allclose(spent, 250.0)
+    assert result["cash"].iloc[0] == pytest.approx(0.0, abs=1e-9)
+    assert result["total_fees"] == pytest.approx(1000 * 0.001 + 1000 * 0.999 * 0.001)
@@ -0,0 +1,84 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from param_tuner import param_tuner
+from strategies.supertrend_rsi_strategies import supertrend_rsi_strategy
+from utils.profiling import profiling, stage, profiled, summarize_profiles, load_profiles
+
+
+@profiled("work")
+def work(x):
+    with stage("inner"):
+        return x + 1
+
+
+def test_stages_are_recorded_only_when_enabled():
+    assert work(1) == 2  # بدون پروفایل فعال
+
+    with profiling("run") as profiler:
+        with stage("outer"):
+            work(1)
+            with stage("outer"):  # مرحله هم‌نام تو در تو یک بار ثبت می‌شود
+                pass
+        work(2)
+
+    stages = [(r["stage"], r["parent"]) for r in profiler.to_dict()["stages"]]
+    assert stages == [("outer", None), ("work", "outer"), ("inner", "work"), ("work", None), ("inner", "work")]
+    assert all(r["peak_mb"] is None for r in profiler.records)
+
+    work(3)
+    assert len(profiler.records) == 5
+
+
+def test_memory_peaks_are_attributed_to_stages():
+    with profiling("mem", memory=True) as profiler:
+        with stage("outer"):
+            with stage("big"):
+                block = np.ones(4 * 2 ** 20 // 8)  # 4 MB
+                del block
+            with stage("small"):
+                block = np.ones(1024)
+
+    peaks = {r["stage"]: r["peak_mb"] for r in profiler.records}
+    assert peaks["big"] >= 4.0
+    assert peaks["small"] < 1.0
+    assert peaks["outer"] >= peaks["big"]
+
+
+def test_save_load_and_summarize(tmp_path):
+    profiles = []
+    for i in range(3):
+        with profiling(f"run{i}") as profiler:
+            work(i)
+        profiler.save(str(tmp_path / f"folder{i}"))
+        profiles.append(profiler)
+
+    loaded = load_profiles(str(tmp_path))
+    assert [p["name"] for p in loaded] == ["run0", "run1", "run2"]
+
+    summary = summarize_profiles(loaded)
+    assert summary.loc["work", "runs"] == 3
+    assert summary.loc["inner", "calls"] == 3
+    assert summary.loc["work", "total_s"] == pytest.approx(sum(r["seconds"] for p in profiles for r in p.records if r["stage"] == "work"))
+    assert summarize_profiles([]).empty
+
+
+def test_param_tuner_batch_profile():
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 500)))
+    df = pd.DataFrame({
+        "Open": close, "High": close * 1.005, "Low": close * 0.995, "Close": close, "Volume": 1.0,
+    }, index=pd.date_range("2024-01-01", periods=500, freq="1h"))
+    grid = {"rsi_period": [7, 14], "rsi_buy_threshold": [30, 40], "rsi_sell_threshold": [70],
+            "supertrend_period": [7], "supertrend_multiplier": [2, 3]}
+
+    with profiling("param_tuner") as profiler:
+        param_tuner(df, supertrend_rsi_strategy, grid, verbose=False)
+
+    summary = summarize_profiles(profiler)
+    assert {"indicators", "signals", "backtest", "metrics"} <= set(summary.index)
+    assert summary.loc["signals", "calls"] == 8
@@ -0,0 +1,108 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from backtest import run_backtest, enter_trade, exit_trade
+from metrics import calculate_metrics
+from results import TradeLog, EquityCurve
+from utils.report import save_results
+
+
+def random_signals(seed, rows=800, tz='UTC'):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    return pd.DataFrame({
+        "Close": close,
+        "High": close * (1 + rng.uniform(0, 0.01, rows)),
+        "Low": close * (1 - rng.uniform(0, 0.01, rows)),
+        "Signal": rng.choice(['buy', 'sell', 'hold'], rows, p=[0.05, 0.05, 0.9]),
+    }, index=pd.date_range("2024-01-01", periods=rows, freq='1h', tz=tz))
+
+
+@pytest.mark.parametrize("tz", ['UTC', None])
+def test_compact_backtest_exports_same_records(tz):
+    df = random_signals(0, tz=tz)
+    kwargs = dict(initial_capital=1000, stop_loss_pct=0.02, take_profit_pct=0.04, trading_fee_pct=0.001)
+
+    capital, trade_log, capital_over_time, fees = run_backtest(df, **kwargs)
+    c_capital, c_trades, c_equity, c_fees = run_backtest(df, compact=True, **kwargs)
+
+    assert isinstance(c_trades, TradeLog) and isinstance(c_equity, EquityCurve)
+    assert (c_capital, c_fees) == (capital, fees)
+    assert c_trades.to_dicts() == trade_log
+    assert c_equity.to_list() == capital_over_time
+    assert calculate_metrics(c_equity, c_trades) == calculate_metrics(capital_over_time, trade_log)
+
+
+def test_trade_log_tracks_open_trade_by_index():
+    times = pd.date_range("2024-01-01", periods=3, freq='1h', tz='UTC')
+    dict_log, compact_log = [], TradeLog(capacity=1)
+
+    for log in (dict_log, compact_log):
+        position, entry_price, _, _, _, capital, fee, trade = enter_trade(1000, 100.0, 0.001, 0.02, 0.04, times[0])
+        if isinstance(log, TradeLog):
+            log.open(times[0], entry_price, position, fee)
+        else:
+            log.append(trade)
+        assert len(log) == 1
+        exit_trade(position, entry_price, 103.0, 0.001, times[2], log, "Signal Sell")
+
+    assert compact_log.open_index == -1
+    assert compact_log.to_dicts() == dict_log
+    compact_log.open(times[1], 50.0, 1.0, 0.1)
+    compact_log.open(times[2], 60.0, 1.0, 0.1)
+    assert len(compact_log) == 3 and compact_log[-1]["exit_time"] is None
+
+
+def test_save_results_compact_matches_dicts(tmp_path):
+    df = random_signals(1)
+    capital, trade_log, capital_over_time, _ = run_backtest(df, stop_loss_pct=0.02)
+    _, c_trades, c_equity, _ = run_backtest(df, stop_loss_pct=0.02, compact=True)
+
+    save_results("dicts", trade_log, {}, capital_over_time, output_dir=str(tmp_path))
+    save_results("compact", c_trades, {}, c_equity, output_dir=str(tmp_path))
+
+    for kind in ("trade_log", "equity_curve"):
+        with open(tmp_path / f"{kind}_dicts.csv") as a, open(tmp_path / f"{kind}_compact.csv") as b:
+            assert a.read() == b.read()
+
+
+def test_save_results_empty_trade_log_has_header(tmp_path):
+    save_results("empty", TradeLog(), {}, [], output_dir=str(tmp_path))
+
+    df = pd.read_csv(tmp_path / "trade_log_empty.csv")
+    assert df.empty
+    assert list(df.columns) == ["entry_time", "exit_time", "entry_price", "exit_price", "volume",
+                                "profit_pct", "reason", "fee_cost_entry", "fee_cost_exit"]
+
+
+def test_sparse_equity_metrics_and_expansion():
+    df = random_signals(2, rows=3000)
+    df['Signal'] = np.where(np.arange(len(df)) % 300 == 0, 'buy', 'hold')  # معاملات کم
+    kwargs = dict(initial_capital=1000, stop_loss_pct=0.01, take_profit_pct=0.01, trading_fee_pct=0.001)
+
+    _, trade_log, capital_over_time, _ = run_backtest(df, **kwargs)
+    _, sparse_log, sparse, _ = run_backtest(df, sparse_equity=True, **kwargs)
+
+    assert sparse_log == trade_log
+    assert len(sparse) == len(capital_over_time)
+    assert len(sparse.values) * 10 < len(capital_over_time)
+    assert sparse.expand(df.index).to_list() == capital_over_time
+    assert calculate_metrics(sparse, trade_log, timeframe_minutes=60) == \
+        calculate_metrics(capital_over_time, trade_log, timeframe_minutes=60)
+
+
+def test_save_results_sparse_equity_roundtrip(tmp_path):
+    from results import SparseEquityCurve
+
+    df = random_signals(3)
+    _, trade_log, sparse, _ = run_backtest(df, stop_loss_pct=0.02, sparse_equity=True)
+    save_results("sparse", trade_log, {}, sparse, output_dir=str(tmp_path))
+
+    loaded = SparseEquityCurve.from_frame(pd.read_csv(tmp_path / "equity_curve_sparse.csv"))
+    assert loaded.index.equals(sparse.index)
+    assert np.array_equal(loaded.positions, sparse.positions)
+    np.testing.assert_allclose(loaded.values, sparse.values, rtol=1e-12)
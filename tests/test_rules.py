@@ -0,0 +1,133 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+from panel import Panel
+from param_tuner import param_tuner
+from signals import encode_signals
+from strategies.rules import RuleStrategy, parse_rules, supertrend_rsi_rules, advanced_rules
+from strategies.supertrend_rsi_strategies import supertrend_rsi_strategy
+from strategies.advanced_strategies import advanced_strategy
+
+STRATEGY_PARAMS = dict(rsi_period=7, rsi_buy_threshold=45, rsi_sell_threshold=60, supertrend_period=7, supertrend_multiplier=1)
+
+
+def random_ohlc(seed, rows=1500):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    return pd.DataFrame({
+        "Open": close,
+        "High": close * (1 + rng.uniform(0, 0.01, rows)),
+        "Low": close * (1 - rng.uniform(0, 0.01, rows)),
+        "Close": close,
+        "Volume": 1.0,
+    }, index=pd.date_range("2024-01-01", periods=rows, freq='1h', tz='UTC'))
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("rules,strategy,params", [
+    (supertrend_rsi_rules, supertrend_rsi_strategy, STRATEGY_PARAMS),
+    (supertrend_rsi_rules, supertrend_rsi_strategy, {}),
+    (supertrend_rsi_rules, supertrend_rsi_strategy, dict(STRATEGY_PARAMS, rsi_buy_threshold=65, rsi_sell_threshold=40)),
+    (advanced_rules, advanced_strategy, {}),
+    (advanced_rules, advanced_strategy, dict(rsi_window=14, supertrend_period=10, supertrend_multiplier=3)),
+])
+def test_rule_strategies_match_handwritten_strategies(seed, rules, strategy, params):
+    df = random_ohlc(seed)
+
+    result = rules(df, **params)
+    expected = strategy(df, **params)
+
+    assert result["Signal"].tolist() == expected["Signal"].tolist()
+    assert np.array_equal(result["RSI"].to_numpy(), expected["RSI"].to_numpy(), equal_nan=True)
+    assert np.array_equal(result["Supertrend"].to_numpy(), expected["Supertrend"].to_numpy())
+
+
+
+@pytest.mark.parametrize("column,position", [("Close", 1), ("Close", 400), ("High", 400), ("Low", 900), ("Close", 1499)])
+@pytest.mark.parametrize("rules,strategy,params", [
+    (supertrend_rsi_rules, supertrend_rsi_strategy, STRATEGY_PARAMS),
+    (advanced_rules, advanced_strategy, {}),
+])
+def test_rule_strategies_match_handwritten_strategies_with_nan_bar(column, position, rules, strategy, params):
+    df = random_ohlc(0)
+    df.iloc[position, df.columns.get_loc(column)] = np.nan
+
+    result = rules(df, **params)
+    expected = strategy(df, **params)
+
+    # استراتژی‌ها کندل نامعتبر را حذف می‌کنند؛ قوانین آن را با HOLD نگه می‌دارند
+    assert result["Signal"].loc[expected.index].tolist() == expected["Signal"].tolist()
+    assert result["Signal"].drop(expected.index).tolist() == ["hold"]
+    assert np.array_equal(result["RSI"].loc[expected.index].to_numpy(), expected["RSI"].to_numpy(), equal_nan=True)
+
+def test_rule_strategy_on_panel_matches_frames():
+    frames = {f"S{i}": random_ohlc(i, rows=300) for i in range(3)}
+    frames["S1"] = frames["S1"].iloc[50:]  # نمادی که دیرتر شروع شده
+    panel = Panel.from_frames(frames)
+
+    result = supertrend_rsi_rules(panel, **STRATEGY_PARAMS)
+
+    assert result["Signal"].shape == panel.shape
+    for j, symbol in enumerate(panel.symbols):
+        rows = panel.valid[:, j]
+        expected = supertrend_rsi_strategy(frames[symbol], **STRATEGY_PARAMS)
+        assert np.array_equal(result["Signal"][rows, j], encode_signals(expected["Signal"]))
+        assert not result["Signal"][~rows, j].any()
+
+
+def test_operator_precedence_and_expressions():
+    df = random_ohlc(5, rows=400)
+    explicit = RuleStrategy("buy: (RSI(7) < 40) and Supertrend(7, 2); sell: (RSI(7) > 60) or (not Supertrend(7, 2))")
+    compact = RuleStrategy("buy: RSI(7) < 40 & Supertrend(7, 2)\nsell: RSI(7) > 60 | ~Supertrend(7, 2)  # خروج")
+    assert explicit(df)["Signal"].tolist() == compact(df)["Signal"].tolist()
+
+    ranged = RuleStrategy("buy: 20 < RSI(n) < lo & Close > ATR(14) * 10; sell: RSI(n) > 100 - lo", stateful=False, n=7, lo=45)
+    out = ranged(df)
+    rsi, atr = out["RSI"].to_numpy(), out["ATR"].to_numpy()
+    buy = (out["Signal"] == "buy").to_numpy()
+    with np.errstate(invalid='ignore'):
+        expected = (rsi > 20) & (rsi < 45) & (df["Close"].to_numpy() > atr * 10)
+    expected[0] = False
+    assert np.array_equal(buy, expected)
+    assert ranged.params == ["lo", "n"]
+
+    # دو پیکربندی از یک اندیکاتور ستون‌های جدا می‌گیرند
+    two = RuleStrategy("buy: RSI(7) < RSI(14); sell: RSI(7) > RSI(14)", stateful=False)(df)
+    assert {"RSI(7)", "RSI(14)"} <= set(two.columns)
+
+
+def test_param_tuner_sweeps_rule_thresholds():
+    df = random_ohlc(7, rows=1200)
+    grid = {"rsi_period": [7, 14], "rsi_buy_threshold": [30, 45], "rsi_sell_threshold": [60, 70],
+            "supertrend_period": [7], "supertrend_multiplier": [1, 2]}
+    kwargs = dict(initial_capital=1000, stop_loss_pct=0.02, take_profit_pct=0.04, trading_fee_pct=0.001, verbose=False)
+
+    best, results = param_tuner(df, supertrend_rsi_rules, grid, **kwargs)
+    expected_best, expected = param_tuner(df, supertrend_rsi_strategy, grid, **kwargs)
+
+    assert [r["params"] for r in results] == [r["params"] for r in expected]
+    pd.testing.assert_frame_equal(pd.DataFrame([r["metrics"] for r in results]),
+                                  pd.DataFrame([r["metrics"] for r in expected]))
+    assert best["params"] == expected_best["params"]
+
+
+def test_rule_errors_and_pickle():
+    with pytest.raises(ValueError, match="missing rule"):
+        parse_rules("buy: RSI(7) < 30")
+    with pytest.raises(ValueError, match="unknown indicator"):
+        parse_rules("buy: MACD(12) > 0; sell: RSI(7) > 70")
+    with pytest.raises(ValueError, match="argument"):
+        parse_rules("buy: RSI(7, 2) < 30; sell: RSI(7) > 70")
+    with pytest.raises(ValueError, match="unsupported syntax"):
+        parse_rules("buy: Close[0] > 1; sell: RSI(7) > 70")
+    with pytest.raises(ValueError, match="missing rule parameter"):
+        RuleStrategy("buy: RSI(n) < 30; sell: RSI(n) > 70")(random_ohlc(0, rows=50))
+
+    restored = pickle.loads(pickle.dumps(supertrend_rsi_rules))
+    df = random_ohlc(1, rows=300)
+    assert restored(df)["Signal"].tolist() == supertrend_rsi_rules(df)["Signal"].tolist()
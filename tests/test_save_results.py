@@ -52,4 +52,43 @@ def test_save_results_creates_files(sample_data):
     assert not df_csv.empty, "فایل CSV خالی است."
 
     # پاکسازی بعد از تست
-    shutil.rmtree(output_folder)
\ No newline at end of file
+    shutil.rmtree(output_folder)
+
+def latest_walkforward_csv():
+    folders = sorted(f for f in os.listdir("results") if f.startswith("walkforward_"))
+    folder = os.path.join("results", folders[-1])
+    with open(os.path.join(folder, "walkforward_results.csv")) as f:
+        content = f.read()
+    shutil.rmtree(folder)
+    return content
+
+
+def test_parallel_walk_forward_matches_serial():
+    import numpy as np
+    from strategies.supertrend_rsi_strategies import supertrend_rsi_strategy
+
+    rng = np.random.default_rng(3)
+    rows = 900
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    df = pd.DataFrame({
+        "Open": close,
+        "High": close * (1 + rng.uniform(0, 0.01, rows)),
+        "Low": close * (1 - rng.uniform(0, 0.01, rows)),
+        "Close": close,
+        "Volume": 1.0,
+    }, index=pd.date_range(start="2022-01-01", periods=rows, freq='1h'))
+    kwargs = dict(
+        param_grid={"rsi_period": [7, 14], "rsi_buy_threshold": [30, 40], "supertrend_period": [7, 10]},
+        n_splits=4,
+        verbose=False
+    )
+
+    serial = walk_forward_validation(df, supertrend_rsi_strategy, **kwargs)
+    serial_csv = latest_walkforward_csv()
+    parallel = walk_forward_validation(df, supertrend_rsi_strategy, n_jobs=2, **kwargs)
+    parallel_csv = latest_walkforward_csv()
+
+    assert len(serial) == 3
+    assert [r["Split"] for r in parallel] == [r["Split"] for r in serial]
+    assert [r["Best Params"] for r in parallel] == [r["Best Params"] for r in serial]
+    assert parallel_csv == serial_csv
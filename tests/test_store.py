@@ -0,0 +1,144 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import data
+from store import BarStore
+
+
+def make_bars(start, periods, freq='1h', tz='UTC', seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, periods))
+    return pd.DataFrame({
+        "Open": close,
+        "High": close + 1,
+        "Low": close - 1,
+        "Close": close,
+        "Volume": rng.uniform(1, 10, periods),
+    }, index=pd.date_range(start, periods=periods, freq=freq, tz=tz).as_unit('ns'))
+
+
+def test_write_read_roundtrip_and_range(tmp_path):
+    store = BarStore(str(tmp_path))
+    df = make_bars("2024-01-01", 100)
+    assert store.write("BTC-USD", "1h", df) == 100
+
+    pd.testing.assert_frame_equal(store.read("BTC-USD", "1h"), df, check_freq=False)
+    assert store.coverage("BTC-USD", "1h") == (df.index[0], df.index[-1])
+
+    part = store.read("BTC-USD", "1h", start="2024-01-02 05:00", end="2024-01-03 00:00")
+    pd.testing.assert_frame_equal(part, df.loc["2024-01-02 05:00":"2024-01-03 00:00"], check_freq=False)
+
+
+def test_append_overlap_new_data_wins(tmp_path):
+    store = BarStore(str(tmp_path))
+    df = make_bars("2024-01-01", 48)
+    store.write("BTC-USD", "1h", df.iloc[:30])
+
+    update = df.iloc[20:].copy()
+    update["Close"] += 1000
+    store.write("BTC-USD", "1h", update)
+
+    stored = store.read("BTC-USD", "1h")
+    assert len(stored) == 48
+    assert (stored["Close"].iloc[:20] == df["Close"].iloc[:20]).all()
+    assert (stored["Close"].iloc[20:] == update["Close"]).all()
+
+
+def test_import_csv(tmp_path):
+    df = make_bars("2024-03-01", 50, seed=1)
+    csv_path = tmp_path / "btc.csv"
+    df.rename_axis("Datetime").to_csv(csv_path)
+
+    store = BarStore(str(tmp_path / "store"))
+    assert store.import_csv("BTC-USD", "1h", str(csv_path)) == 50
+    pd.testing.assert_frame_equal(store.read("BTC-USD", "1h"), df, check_freq=False)
+
+
+def test_get_data_fetches_only_missing_tail(tmp_path, monkeypatch):
+    now = pd.Timestamp.now(tz="UTC").floor("h")
+    full = make_bars(now - pd.Timedelta(hours=99), 100)
+    store = BarStore(str(tmp_path))
+    store.write("BTC-USD", "1h", full.iloc[:90])
+
+    calls = []
+
+    def fake_download(ticker, interval, **kwargs):
+        calls.append(kwargs)
+        return full.loc[kwargs["start"]:kwargs["end"]]
+
+    monkeypatch.setattr(data, "_download", fake_download)
+    df = data.get_data("BTC-USD", interval="1h", period="3d", store=store)
+
+    assert len(calls) == 1 and calls[0]["start"] == full.index[89]
+    assert df.index[-1] == full.index[-1] and len(df) == 72
+    pd.testing.assert_frame_equal(df, full.iloc[-72:], check_freq=False)
+
+    offline = data.get_data("BTC-USD", interval="1h", period="1d", store=store, offline=True)
+    assert len(calls) == 1
+    assert offline.index[-1] == full.index[-1] and len(offline) == 25
+
+
+def test_get_data_does_not_refetch_requested_ranges(tmp_path, monkeypatch):
+    now = pd.Timestamp.now(tz="UTC").floor("h")
+    # منبع فقط 50 ساعت تاریخچه دارد، کمتر از دوره 3 روزه
+    full = make_bars(now - pd.Timedelta(hours=49), 50)
+    store = BarStore(str(tmp_path))
+    store.write("BTC-USD", "1h", full)
+
+    calls = []
+
+    def fake_download(ticker, interval, **kwargs):
+        calls.append(kwargs)
+        if "period" in kwargs:
+            return full
+        return full.loc[kwargs["start"]:kwargs["end"]]
+
+    monkeypatch.setattr(data, "_download", fake_download)
+
+    data.get_data("BTC-USD", interval="1h", period="3d", store=store)
+    data.get_data("BTC-USD", interval="1h", period="3d", store=store)
+    assert len(calls) == 1 and "start" in calls[0]  # ابتدای دوره فقط یک بار درخواست می‌شود
+
+    data.get_data("BTC-USD", interval="1h", period="max", store=store)
+    df = data.get_data("BTC-USD", interval="1h", period="max", store=store)
+    assert [c.get("period") for c in calls[1:]] == ["max"]
+    pd.testing.assert_frame_equal(df, full, check_freq=False)
+
+    # meta.json بعد از نوشتن دوباره هم بازه درخواست‌شده و منطقه زمانی را نگه می‌دارد
+    store.write("BTC-USD", "1h", full.iloc[-5:])
+    assert store.requested_range("BTC-USD", "1h")[0] == "max"
+    assert store.tz("BTC-USD", "1h") == "UTC"
+
+
+def test_mapped_bars_zero_copy_slices(tmp_path):
+    import pickle
+    from backtest import run_backtest_arrays, run_backtest_fast
+
+    store = BarStore(str(tmp_path))
+    df = make_bars("2024-01-01", 200, seed=2)
+    store.write("BTC-USD", "1h", df.iloc[:150])
+    bars = store.mapped("BTC-USD", "1h")
+    assert len(bars) == 150
+
+    # پارتیشن جدید باعث بازسازی نسخه memory-mapped می‌شود
+    store.write("BTC-USD", "1h", df.iloc[150:])
+    bars = store.mapped("BTC-USD", "1h")
+    assert len(bars) == 200
+    assert not bars.close.flags.writeable
+
+    window = bars.between("2024-01-03", "2024-01-05 23:00")
+    expected = df.loc["2024-01-03":"2024-01-05 23:00"]
+    assert np.shares_memory(window.close, bars.close)
+    pd.testing.assert_frame_equal(window.to_frame(), expected, check_freq=False)
+    assert np.shares_memory(window.to_frame()["Close"].to_numpy(), window.close)
+
+    restored = pickle.loads(pickle.dumps(window))
+    assert len(restored) == len(window) and restored.index.equals(window.index)
+
+    signal = np.tile(np.array([1, 0, 0, 2, 0], dtype=np.int8), len(window) // 5 + 1)[:len(window)]
+    capital, _, _, _ = run_backtest_arrays(window.close, window.high, window.low, signal, window.time)
+    frame = expected.assign(Signal=np.array(['hold', 'buy', 'sell'], dtype=object)[signal])
+    assert capital == run_backtest_fast(frame)[0]
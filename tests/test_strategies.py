@@ -1,3 +1,4 @@
+import io
 import pytest
 import pandas as pd
 import numpy as np
@@ -93,4 +94,64 @@ def test_strategy_handles_empty_df():
     assert 'Signal' in df1.columns
     assert 'Signal' in df2.columns
     assert all(df1['Signal'] == 'hold')
-    assert all(df2['Signal'] == 'hold')
\ No newline at end of file
+    assert all(df2['Signal'] == 'hold')
+
+def reference_supertrend_rsi_signals(rsi_values, supertrend_values, rsi_buy_threshold, rsi_sell_threshold):
+    # حلقه قبلی تولید سیگنال (وضعیت position_open کندل به کندل)
+    signal = ['hold'] * len(rsi_values)
+    position_open = False
+    for i in range(1, len(rsi_values)):
+        rsi, supertrend = rsi_values[i], supertrend_values[i]
+        if pd.isna(rsi) or pd.isna(supertrend):
+            continue
+        if not position_open and rsi < rsi_buy_threshold and supertrend:
+            signal[i] = 'buy'
+            position_open = True
+        elif position_open and (rsi > rsi_sell_threshold or not supertrend):
+            signal[i] = 'sell'
+            position_open = False
+    return signal
+
+
+def reference_advanced_signals(rsi_values, supertrend_values):
+    signal = ['hold'] * len(rsi_values)
+    for i in range(1, len(rsi_values)):
+        if rsi_values[i] < 40 and supertrend_values[i]:
+            signal[i] = 'buy'
+        elif rsi_values[i] > 75 and not supertrend_values[i]:
+            signal[i] = 'sell'
+    return signal
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("thresholds", [(30, 70), (45, 55), (60, 40)])  # (60, 40): کندل‌هایی که هم شرط خرید و هم فروش دارند
+def test_vectorized_signals_match_row_loop(seed, thresholds):
+    from strategies.supertrend_rsi_strategies import supertrend_rsi_signals
+    from strategies.advanced_strategies import advanced_signals
+
+    rng = np.random.default_rng(seed)
+    rows = 2000
+    rsi = rng.uniform(0, 100, rows)
+    rsi[rng.random(rows) < 0.05] = np.nan
+    supertrend = np.repeat(rng.random(rows // 10) > 0.5, 10)
+    for trend in (supertrend, np.where(rng.random(rows) < 0.05, np.nan, supertrend.astype(float))):
+        df = pd.DataFrame({"RSI": rsi, "Supertrend": trend})
+
+        result = supertrend_rsi_signals(df.copy(), *thresholds)['Signal']
+        assert isinstance(result.dtype, pd.CategoricalDtype)
+        assert result.cat.codes.dtype == np.int8
+        assert result.tolist() == reference_supertrend_rsi_signals(rsi.tolist(), trend.tolist(), *thresholds)
+
+        result = advanced_signals(df.copy())['Signal']
+        assert result.tolist() == reference_advanced_signals(rsi.tolist(), trend.tolist())
+
+
+def test_signal_column_works_with_string_consumers(sample_ohlcv_data):
+    from signals import encode_signals
+
+    df = supertrend_rsi_strategy(sample_ohlcv_data, rsi_period=7, rsi_buy_threshold=60, rsi_sell_threshold=40)
+    labels = df['Signal'].astype(object)
+
+    assert ((df['Signal'] == 'buy') == (labels == 'buy')).all()
+    assert np.array_equal(encode_signals(df['Signal']), encode_signals(labels))
+    assert pd.read_csv(io.StringIO(df.to_csv()))['Signal'].tolist() == labels.tolist()
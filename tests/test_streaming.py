@@ -0,0 +1,69 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from indicators import calculate_rsi, compute_atr, compute_supertrend
+from streaming import StreamingRSI, StreamingATR, StreamingSupertrend
+
+
+def random_bars(seed, rows=500):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    if seed % 2:
+        close = np.round(close, 1)  # کندل‌های بدون تغییر (diff == 0)
+    high = close * (1 + rng.uniform(0, 0.01, rows))
+    low = close * (1 - rng.uniform(0, 0.01, rows))
+    return high, low, close
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("window", [2, 14])
+def test_streaming_rsi_matches_batch(seed, window):
+    _, _, close = random_bars(seed)
+    expected = calculate_rsi(pd.DataFrame({"Close": close}), window=window)["RSI"].to_numpy()
+
+    rsi = StreamingRSI(window)
+    streamed = np.array([rsi.update(c) for c in close])
+    assert np.array_equal(streamed, expected, equal_nan=True)
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("period,multiplier", [(7, 2), (10, 3)])
+def test_streaming_atr_and_supertrend_match_batch(seed, period, multiplier):
+    high, low, close = random_bars(seed)
+
+    atr = StreamingATR(period)
+    assert np.array_equal([atr.update(*bar) for bar in zip(high, low, close)], compute_atr(high, low, close, period))
+
+    trend, upper, lower = compute_supertrend(high, low, close, period, multiplier)
+    supertrend = StreamingSupertrend(period, multiplier)
+    streamed = [supertrend.update(*bar) for bar in zip(high, low, close)]
+    assert np.array_equal([s[0] for s in streamed], trend)
+    assert np.array_equal([s[1] for s in streamed], upper)
+    assert np.array_equal([s[2] for s in streamed], lower)
+
+
+@pytest.mark.parametrize("split", [3, 250])
+def test_streaming_state_roundtrip(split):
+    high, low, close = random_bars(1)
+    bars = list(zip(high, low, close))
+
+    rsi, supertrend = StreamingRSI(14), StreamingSupertrend(10, 3)
+    for h, l, c in bars[:split]:
+        rsi.update(c)
+        supertrend.update(h, l, c)
+
+    # ذخیره و بازیابی وضعیت در وسط جریان (مثل راه‌اندازی مجدد ربات)
+    rsi = StreamingRSI.from_state(json.loads(json.dumps(rsi.get_state())))
+    supertrend = StreamingSupertrend.from_state(json.loads(json.dumps(supertrend.get_state())))
+    rest_rsi = [rsi.update(c) for _, _, c in bars[split:]]
+    rest_trend = [supertrend.update(*bar)[0] for bar in bars[split:]]
+
+    expected_rsi = calculate_rsi(pd.DataFrame({"Close": close}), window=14)["RSI"].to_numpy()[split:]
+    expected_trend = compute_supertrend(high, low, close, 10, 3)[0][split:]
+    assert np.array_equal(rest_rsi, expected_rsi, equal_nan=True)
+    assert np.array_equal(rest_trend, expected_trend)
@@ -0,0 +1,25 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from utils.shared import share_frame, attach_frame
+
+def test_share_and_attach_frame_roundtrip():
+    df = pd.DataFrame({
+        "Close": np.linspace(100, 110, 24),
+        "Volume": np.arange(24),
+        "Signal": ['buy', 'hold', 'sell'] * 8,
+    }, index=pd.date_range("2024-01-01", periods=24, freq='1h', tz='UTC', name='Datetime'))
+
+    shm, spec = share_frame(df)
+    try:
+        other, attached = attach_frame(spec)
+        pd.testing.assert_frame_equal(attached, df, check_freq=False)
+        assert not attached['Close'].to_numpy().flags.writeable
+        del attached
+        other.close()
+    finally:
+        shm.close()
+        shm.unlink()
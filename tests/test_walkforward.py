@@ -0,0 +1,84 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import itertools
+import numpy as np
+import pandas as pd
+import pytest
+from backtest import run_backtest
+from metrics import calculate_metrics
+from strategies.supertrend_rsi_strategies import supertrend_rsi_strategy
+from walkforward import walk_forward_validation
+
+PARAM_GRID = {"rsi_period": [7, 14], "rsi_buy_threshold": [30, 40], "supertrend_period": [7, 10]}
+BACKTEST_KWARGS = dict(initial_capital=1000, stop_loss_pct=0.03, take_profit_pct=0.05, trading_fee_pct=0.001)
+
+
+@pytest.fixture
+def random_ohlc():
+    rng = np.random.default_rng(3)
+    rows = 900
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    return pd.DataFrame({
+        "Open": close,
+        "High": close * (1 + rng.uniform(0, 0.01, rows)),
+        "Low": close * (1 - rng.uniform(0, 0.01, rows)),
+        "Close": close,
+        "Volume": 1.0,
+    }, index=pd.date_range(start="2022-01-01", periods=rows, freq='1h'))
+
+
+def reference_splits(df, n_splits, timeframe_minutes=60):
+    """
+    مرجع مستقل reuse_indicators: سیگنال هر ترکیب یک بار روی کل تاریخچه، و هر پنجره
+    با run_backtest و calculate_metrics روی برش همان سیگنال‌ها
+    """
+    combos = [dict(zip(PARAM_GRID, values)) for values in itertools.product(*PARAM_GRID.values())]
+    full = [(params, supertrend_rsi_strategy(df.copy(), **params)) for params in combos]
+    step = len(df) // n_splits
+
+    splits = []
+    for i in range(n_splits):
+        mid, end = step * (i + 1), min(step * (i + 2), len(df))
+        if mid >= len(df) or end - mid < 14:
+            continue
+        capitals = [run_backtest(signals.iloc[:mid], **BACKTEST_KWARGS)[0] for _, signals in full]
+        best = max(range(len(full)), key=lambda j: capitals[j])  # اولین بیشینه، مثل مرتب‌سازی پایدار
+        params, signals = full[best]
+
+        final_capital, trade_log, capital_over_time, _ = run_backtest(signals.iloc[mid:end], **BACKTEST_KWARGS)
+        metrics = calculate_metrics(capital_over_time, trade_log, BACKTEST_KWARGS["initial_capital"], timeframe_minutes)
+        metrics["Final Capital"] = final_capital
+        splits.append((i + 1, params, metrics))
+    return splits
+
+
+def test_reuse_indicators_matches_per_window_reference(random_ohlc):
+    reused = walk_forward_validation(
+        random_ohlc, supertrend_rsi_strategy, PARAM_GRID, n_splits=4, reuse_indicators=True,
+        save_results_to_file=False, verbose=False, **BACKTEST_KWARGS
+    )
+    expected = reference_splits(random_ohlc, n_splits=4)
+
+    assert [r["Split"] for r in reused] == [split for split, _, _ in expected]
+    for result, (_, params, metrics) in zip(reused, expected):
+        assert result["Best Params"] == params
+        for key, value in metrics.items():
+            assert result[key] == pytest.approx(value, rel=1e-9, nan_ok=True), key
+
+
+def test_reuse_indicators_fallbacks(random_ohlc, capsys):
+    kwargs = dict(param_grid=PARAM_GRID, n_splits=4, save_results_to_file=False, **BACKTEST_KWARGS)
+    baseline = walk_forward_validation(random_ohlc, supertrend_rsi_strategy, verbose=False, **kwargs)
+
+    # استراتژی‌ای که ردیف حذف می‌کند به مسیر عادی برمی‌گردد
+    dropped = walk_forward_validation(
+        random_ohlc, lambda d, **p: supertrend_rsi_strategy(d, **p).iloc[1:], reuse_indicators=True,
+        verbose=False, **kwargs
+    )
+    assert [r["Split"] for r in dropped] == [r["Split"] for r in baseline]
+
+    # reuse_indicators ترتیبی اجرا می‌شود و n_jobs را با هشدار نادیده می‌گیرد
+    walk_forward_validation(random_ohlc, supertrend_rsi_strategy, reuse_indicators=True, n_jobs=2, verbose=True, **kwargs)
+    assert "n_jobs/executor are ignored" in capsys.readouterr().out
@@ -3,8 +3,11 @@ import matplotlib.dates as mdates
 import pandas as pd
 import os
 from config import SAVE_PLOTS, SHOW_PLOTS
+from results import EquityCurve, SparseEquityCurve
+from utils.profiling import profiled
 
 
+@profiled("plots")
 def plot_price_chart_with_indicators(df, name="Price & Indicators", save_dir="results", show=False):
     df = df.copy()
     if 'Close' not in df.columns:
@@ -24,7 +27,9 @@ def plot_price_chart_with_indicators(df, name="Price & Indicators", save_dir="re
         ax1.scatter(df.index[df['Signal'] == 'buy'], df['Close'][df['Signal'] == 'buy'], marker='^', color='green', label='Buy Signal')
         ax1.scatter(df.index[df['Signal'] == 'sell'], df['Close'][df['Signal'] == 'sell'], marker='v', color='red', label='Sell Signal')
 
-    if 'Supertrend' in df.columns and df['Supertrend'].dtype != 'bool':
+    if 'Supertrend_Line' in df.columns:
+        ax1.plot(df.index, df['Supertrend_Line'], label='Supertrend', color='orange')
+    elif 'Supertrend' in df.columns and df['Supertrend'].dtype != 'bool':
         ax1.plot(df.index, df['Supertrend'], label='Supertrend', color='orange')
 
     ax1.set_ylabel("Price")
@@ -58,15 +63,24 @@ def plot_price_chart_with_indicators(df, name="Price & Indicators", save_dir="re
     plt.close()
 
 
+@profiled("plots")
 def plot_equity_curve(capital_over_time, name="Equity Curve", save_dir="results", show=False):
     if not capital_over_time:
         print("⚠️ No capital data to plot equity curve.")
         return
 
-    times, capitals = zip(*capital_over_time)
+    drawstyle = 'default'
+    if isinstance(capital_over_time, SparseEquityCurve):
+        # هر نقطه تا نقطه بعدی ثابت می‌ماند
+        times, capitals = capital_over_time.index, capital_over_time.values
+        drawstyle = 'steps-post'
+    elif isinstance(capital_over_time, EquityCurve):
+        times, capitals = capital_over_time.index, capital_over_time.values
+    else:
+        times, capitals = zip(*capital_over_time)
 
     plt.figure(figsize=(16, 5))
-    plt.plot(times, capitals, label='Equity Curve', color='blue', linewidth=2)
+    plt.plot(times, capitals, label='Equity Curve', color='blue', linewidth=2, drawstyle=drawstyle)
     plt.title("📈 Equity Curve")
     plt.xlabel("Time")
     plt.ylabel("Capital")
@@ -0,0 +1,208 @@
+# utils/profiling.py
+
+import contextlib
+import functools
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+# Profiler فعال در این پروسس (None یعنی پروفایل خاموش است و stage/profiled هیچ کاری نمی‌کنند)
+_active = None
+_NULL_STAGE = contextlib.nullcontext()
+
+_MB = 2 ** 20
+
+
+class Profiler:
+    """
+    ثبت زمان و اوج حافظه مراحل یک اجرا (داده، اندیکاتور، سیگنال، بک‌تست، متریک، ذخیره، نمودار)
+
+    هر مرحله یک رکورد {"stage", "parent", "start", "seconds", "peak_mb"} است؛ مراحل تو در تو
+    (مثلاً indicators داخل یک مرحله بزرگ‌تر) با parent مشخص می‌شوند.
+    peak_mb اوج حافظه تخصیص‌یافته بالاتر از حافظه ابتدای مرحله است (فقط با memory=True).
+    """
+
+    def __init__(self, name=None, memory=False):
+        self.name = name
+        self.memory = memory
+        self.records = []
+        self.total_seconds = None
+        self.created = datetime.now().isoformat(timespec="seconds")
+        self._t0 = time.perf_counter()
+        self._stack = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        # frame: [name, t0, حافظه ابتدای مرحله, اوج دیده‌شده]
+        frame = [name, time.perf_counter(), 0, 0]
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # اوج تا این لحظه متعلق به مراحل باز بیرونی است؛ بعد از reset فقط اوج این مرحله شمرده می‌شود
+            for outer in self._stack:
+                outer[3] = max(outer[3], peak)
+            tracemalloc.reset_peak()
+            frame[2] = frame[3] = current
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - frame[1]
+            self._stack.pop()
+            peak_mb = None
+            if self.memory:
+                peak = max(frame[3], tracemalloc.get_traced_memory()[1])
+                peak_mb = (peak - frame[2]) / _MB
+                if self._stack:
+                    self._stack[-1][3] = max(self._stack[-1][3], peak)
+            self.records.append({
+                "stage": name,
+                "parent": self._stack[-1][0] if self._stack else None,
+                "start": frame[1] - self._t0,
+                "seconds": seconds,
+                "peak_mb": peak_mb,
+            })
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "created": self.created,
+            "memory": self.memory,
+            "total_seconds": self.total_seconds if self.total_seconds is not None else time.perf_counter() - self._t0,
+            "stages": sorted(self.records, key=lambda r: r["start"]),
+        }
+
+    def save(self, output_dir, name=None):
+        """ذخیره پروفایل به صورت profile_<name>.json در output_dir و برگرداندن مسیر فایل"""
+        os.makedirs(output_dir, exist_ok=True)
+        safe_name = (name or self.name or "run").replace(' ', '_')
+        path = os.path.join(output_dir, f"profile_{safe_name}.json")
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=4)
+        return path
+
+
+@contextlib.contextmanager
+def profiling(name=None, memory=False):
+    """
+    فعال کردن پروفایل برای کد داخل بلوک with
+
+    پارامترها:
+    - memory: ثبت اوج حافظه هر مرحله با tracemalloc (سربار قابل توجه؛ فقط هنگام بررسی حافظه)
+
+    خروجی:
+    Profiler که بعد از بلوک رکوردهای همه مراحل را دارد
+    """
+    global _active
+    profiler = Profiler(name, memory)
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+    previous, _active = _active, profiler
+    try:
+        yield profiler
+    finally:
+        _active = previous
+        profiler.total_seconds = time.perf_counter() - profiler._t0
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def stage(name):
+    """
+    context manager یک مرحله؛ وقتی پروفایل خاموش است یک nullcontext مشترک برمی‌گرداند.
+    فراخوانی تو در توی مرحله هم‌نام (مثلاً run_backtest ← run_backtest_fast) یک بار ثبت می‌شود.
+    """
+    profiler = _active
+    if profiler is None or (profiler._stack and profiler._stack[-1][0] == name):
+        return _NULL_STAGE
+    return profiler.stage(name)
+
+
+def profiled(name=None):
+    """
+    دکوریتور ثبت هر فراخوانی تابع به عنوان مرحله name (پیش‌فرض نام تابع).
+    وقتی پروفایل خاموش است فقط یک بررسی None به فراخوانی اضافه می‌شود.
+    """
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            with stage(stage_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _profile_dicts(profiles):
+    if isinstance(profiles, (Profiler, dict)):
+        profiles = [profiles]
+    return [p.to_dict() if isinstance(p, Profiler) else p for p in profiles]
+
+
+def summarize_profiles(profiles):
+    """
+    خلاصه تجمیعی مراحل چند اجرا (مثلاً همه ترکیب‌های param_tuner یا splitهای walk-forward)
+
+    پارامترها:
+    - profiles: یک Profiler/دیکشنری پروفایل یا لیستی از آن‌ها (مثل خروجی load_profiles)
+
+    خروجی:
+    DataFrame با ایندکس stage و ستون‌های runs, calls, total_s, mean_s, max_s, share_pct, peak_mb
+    (share_pct سهم مرحله از مجموع زمان کل اجراها؛ مراحل تو در تو در سهم والدشان هم حساب شده‌اند)
+    """
+    profiles = _profile_dicts(profiles)
+    rows = [dict(record, run=i) for i, p in enumerate(profiles) for record in p["stages"]]
+    columns = ["runs", "calls", "total_s", "mean_s", "max_s", "share_pct", "peak_mb"]
+    if not rows:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name="stage"))
+
+    records = pd.DataFrame(rows)
+    grouped = records.groupby("stage", sort=False)
+    wall = sum(p["total_seconds"] for p in profiles)
+    summary = pd.DataFrame({
+        "runs": grouped["run"].nunique(),
+        "calls": grouped.size(),
+        "total_s": grouped["seconds"].sum(),
+        "mean_s": grouped["seconds"].mean(),
+        "max_s": grouped["seconds"].max(),
+    })
+    summary["share_pct"] = summary["total_s"] / wall * 100 if wall > 0 else float("nan")
+    summary["peak_mb"] = grouped["peak_mb"].max()
+    return summary.sort_values("total_s", ascending=False)[columns]
+
+
+def print_profile_summary(profiles, name="Profile"):
+    profiles = _profile_dicts(profiles)
+    summary = summarize_profiles(profiles)
+    wall = sum(p["total_seconds"] for p in profiles)
+    print(f"\n⏱️ Stage Profile ({name}) — {len(profiles)} run(s), {wall:.3f}s total:")
+    if summary.empty:
+        print("No stages recorded.")
+        return summary
+    print(summary.to_string(float_format=lambda v: f"{v:.4f}"))
+    return summary
+
+
+def load_profiles(results_dir="results"):
+    """خواندن همه فایل‌های profile_*.json زیر results_dir"""
+    profiles = []
+    for path in sorted(glob.glob(os.path.join(results_dir, "**", "profile_*.json"), recursive=True)):
+        with open(path) as f:
+            profiles.append(json.load(f))
+    return profiles
+
+
+if __name__ == "__main__":
+    print_profile_summary(load_profiles(sys.argv[1] if len(sys.argv) > 1 else "results"), name="results")
@@ -2,6 +2,9 @@ import os
 import json
 import pandas as pd
 
+from results import TradeLog, EquityCurve, SparseEquityCurve
+from utils.profiling import profiled
+
 
 def format_trade_log(trade_log):
     lines = []
@@ -53,7 +56,8 @@ def print_metrics(metrics, name="Strategy"):
     print("\n" + "=" * 50 + "\n")
 
 
-def save_results(strategy_name, trade_log, metrics, capital_over_time, output_dir="results"):
+@profiled("save_results")
+def save_results(strategy_name, trade_log, metrics, capital_over_time, output_dir="results", config=None):
     os.makedirs(output_dir, exist_ok=True)
     safe_name = strategy_name.replace(' ', '_')
 
@@ -61,7 +65,9 @@ def save_results(strategy_name, trade_log, metrics, capital_over_time, output_di
     metrics_path = os.path.join(output_dir, f"metrics_{safe_name}.json")
     equity_path = os.path.join(output_dir, f"equity_curve_{safe_name}.csv")
 
-    if len(trade_log) > 0 and isinstance(trade_log[0], dict):
+    if isinstance(trade_log, TradeLog):
+        trade_log.to_frame().to_csv(trade_log_path, index=False)
+    elif len(trade_log) > 0 and isinstance(trade_log[0], dict):
         pd.DataFrame(trade_log).to_csv(trade_log_path, index=False)
     else:
         pd.DataFrame({'Log': trade_log}).to_csv(trade_log_path, index=False)
@@ -69,7 +75,16 @@ def save_results(strategy_name, trade_log, metrics, capital_over_time, output_di
     with open(metrics_path, "w") as f:
         json.dump(metrics, f, indent=4)
 
-    capital_df = pd.DataFrame(capital_over_time, columns=['Time', 'Capital'])
+    # تنظیمات اجرا (پارامترها، نماد، هش داده) برای ایندکس دوباره در catalog.backfill
+    if config is not None:
+        with open(os.path.join(output_dir, f"config_{safe_name}.json"), "w") as f:
+            json.dump(config, f, indent=4, default=str)
+
+    if isinstance(capital_over_time, (EquityCurve, SparseEquityCurve)):
+        # SparseEquityCurve فقط نقاط تغییر را با ستون اضافه 'Bar' ذخیره می‌کند
+        capital_df = capital_over_time.to_frame()
+    else:
+        capital_df = pd.DataFrame(capital_over_time, columns=['Time', 'Capital'])
     capital_df.to_csv(equity_path, index=False)
 
     print(f"✅ Results saved to '{output_dir}' folder.")
\ No newline at end of file
@@ -0,0 +1,114 @@
+# utils/shared.py
+
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+
+# هم‌ترازی آفست ستون‌ها داخل بلوک حافظه مشترک (بایت)
+_ALIGN = 64
+
+# DataFrame متصل به حافظه مشترک در این پروسس: (نام بلوک، shm، df)
+_attached = None
+
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def share_frame(df):
+    """
+    انتشار ستون‌های عددی و ایندکس زمانی DataFrame در یک بلوک multiprocessing.shared_memory
+
+    ستون‌های غیرعددی (مثلاً 'Signal' متنی) مستقیم داخل spec قرار می‌گیرند.
+
+    خروجی:
+    (shm, spec)
+    - shm: شیء SharedMemory که سازنده باید در پایان close() و unlink() کند
+    - spec: دیکشنری کوچک و قابل pickle برای attach_frame در پروسس‌های دیگر
+    """
+    arrays = {}
+    extra = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        if isinstance(dtype, np.dtype) and dtype.kind in 'biuf':
+            arrays[col] = np.ascontiguousarray(df[col].to_numpy())
+        else:
+            extra[col] = df[col].to_numpy()
+
+    index = df.index
+    if isinstance(index, pd.DatetimeIndex):
+        arrays[None] = np.ascontiguousarray(index.asi8)
+        index_spec = {"kind": "datetime", "unit": index.unit, "tz": index.tz, "name": index.name}
+    else:
+        index_spec = {"kind": "object", "values": index}
+
+    layout = []
+    offset = 0
+    for key, values in arrays.items():
+        offset = _aligned(offset)
+        layout.append((key, values.dtype.str, offset))
+        offset += values.nbytes
+
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for (key, dtype, start), values in zip(layout, arrays.values()):
+        np.ndarray(values.shape, dtype=dtype, buffer=shm.buf, offset=start)[:] = values
+
+    spec = {
+        "name": shm.name,
+        "rows": len(df),
+        "layout": layout,
+        "index": index_spec,
+        "extra": extra,
+        "columns": list(df.columns),
+    }
+    return shm, spec
+
+
+def attach_frame(spec):
+    """
+    ساخت DataFrame روی بلوک حافظه مشترکی که share_frame منتشر کرده است.
+    ستون‌های عددی view فقط‌خواندنی روی همان حافظه هستند (بدون کپی و بدون pickle).
+
+    خروجی:
+    (shm, df) — تا وقتی df استفاده می‌شود shm باید باز بماند
+    """
+    shm = shared_memory.SharedMemory(name=spec["name"])
+
+    rows = spec["rows"]
+    views = {}
+    for key, dtype, offset in spec["layout"]:
+        view = np.ndarray((rows,), dtype=dtype, buffer=shm.buf, offset=offset)
+        view.flags.writeable = False
+        views[key] = view
+
+    index_spec = spec["index"]
+    if index_spec["kind"] == "datetime":
+        index = pd.DatetimeIndex(views.pop(None).view(f"M8[{index_spec['unit']}]"), name=index_spec["name"])
+        if index_spec["tz"] is not None:
+            index = index.tz_localize("UTC").tz_convert(index_spec["tz"])
+    else:
+        index = index_spec["values"]
+
+    data = {col: views[col] if col in views else spec["extra"][col] for col in spec["columns"]}
+    df = pd.DataFrame(data, index=index, copy=False)
+    return shm, df
+
+
+def cached_attach(spec):
+    """
+    مثل attach_frame ولی هر پروسس (worker) فقط یک بار به هر بلوک وصل می‌شود
+    و اتصال قبلی را هنگام رسیدن بلوک جدید می‌بندد.
+
+    خروجی:
+    DataFrame متصل به حافظه مشترک
+    """
+    global _attached
+    if _attached is None or _attached[0] != spec["name"]:
+        if _attached is not None:
+            _, old_shm, old_df = _attached
+            _attached = None
+            del old_df
+            old_shm.close()
+        shm, df = attach_frame(spec)
+        _attached = (spec["name"], shm, df)
+    return _attached[2]
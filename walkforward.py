@@ -1,10 +1,15 @@
+import itertools
+import os
+import pickle
 import pandas as pd
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from utils.split import split_data_for_out_of_sample
-from param_tuner import param_tuner
+from param_tuner import param_tuner, full_history_signals, score_signals
 from backtest import run_backtest
 from metrics import calculate_metrics
 from utils.file import create_output_folder, get_filepath
+from utils.shared import share_frame, cached_attach
 
 def summarize_results(results, verbose=True):
     """
@@ -49,6 +54,118 @@ def summarize_results(results, verbose=True):
         "most_common_params": [(dict(p[0]), p[1]) for p in most_common_params]
     }
 
+def _run_split(
+    df,
+    split,
+    n_splits,
+    window,
+    strategy_func,
+    param_grid,
+    min_period_needed,
+    backtest_kwargs,
+    timeframe_minutes
+):
+    """
+    اجرای یک split: تیون پارامترها روی in-sample و بک‌تست بهترین پارامترها روی out-of-sample
+
+    پارامترها:
+    - window: (start, mid, end) ایندکس‌های مکانی پنجره در df
+
+    خروجی:
+    (metrics یا None، لیست پیام‌ها برای چاپ در پروسس اصلی)
+    """
+    start, mid, end = window
+    df_in = df.iloc[start:mid].copy()
+    df_out = df.iloc[mid:end].copy()
+    messages = [f"\n🧪 Split {split + 1}/{n_splits} → in: {df_in.shape[0]} rows | out: {df_out.shape[0]} rows"]
+
+    if len(df_out) < min_period_needed:
+        messages.append(f"⚠️ Split {split + 1} skipped: داده‌ی out-of-sample کمتر از حداقل دوره لازم ({min_period_needed}) است.")
+        return None, messages
+
+    best_result, _ = param_tuner(
+        df_in,
+        strategy_func,
+        param_grid,
+        timeframe_minutes=timeframe_minutes,
+        verbose=False,
+        **backtest_kwargs
+    )
+
+    if best_result is None:
+        messages.append("⛔ No best parameters found in this split.")
+        return None, messages
+
+    best_params = best_result["params"]
+    messages.append(f"✅ Best Params: {best_params}")
+
+    df_out_with_signals = strategy_func(df_out.copy(), **best_params)
+
+    final_capital, trade_log, capital_over_time, _ = run_backtest(df_out_with_signals, **backtest_kwargs)
+
+    metrics = calculate_metrics(
+        capital_over_time,
+        trade_log,
+        initial_capital=backtest_kwargs["initial_capital"],
+        timeframe_minutes=timeframe_minutes
+    )
+    metrics["Final Capital"] = final_capital
+    metrics["Split"] = split + 1
+    metrics["Best Params"] = best_params
+
+    return metrics, messages
+
+
+def _run_split_reused(
+    df,
+    split,
+    n_splits,
+    window,
+    signals,
+    min_period_needed,
+    backtest_kwargs,
+    timeframe_minutes
+):
+    """
+    اجرای یک split با سیگنال‌هایی که یک بار روی کل تاریخچه محاسبه شده‌اند.
+    in-sample و out-of-sample فقط برش آرایه‌ای از همان سیگنال‌ها هستند، پس
+    اندیکاتورهای out-of-sample گرم‌شده (بدون NaN ابتدای پنجره) شروع می‌شوند.
+
+    پارامترها:
+    - signals: خروجی full_history_signals
+
+    خروجی:
+    (metrics یا None، لیست پیام‌ها)
+    """
+    start, mid, end = window
+    messages = [f"\n🧪 Split {split + 1}/{n_splits} → in: {mid - start} rows | out: {end - mid} rows"]
+
+    if end - mid < min_period_needed:
+        messages.append(f"⚠️ Split {split + 1} skipped: داده‌ی out-of-sample کمتر از حداقل دوره لازم ({min_period_needed}) است.")
+        return None, messages
+
+    valid = [(params, codes) for params, codes in signals if not isinstance(codes, Exception)]
+    if not valid:
+        messages.append("⛔ No best parameters found in this split.")
+        return None, messages
+
+    scored = score_signals(df, [codes for _, codes in valid], backtest_kwargs, timeframe_minutes, start, mid)
+    # مثل param_tuner: مرتب‌سازی پایدار نزولی و انتخاب اولین
+    order = sorted(range(len(valid)), key=lambda i: scored[i]["Final Capital"], reverse=True)
+    best_params, best_codes = valid[order[0]]
+    messages.append(f"✅ Best Params: {best_params}")
+
+    metrics = score_signals(df, [best_codes], backtest_kwargs, timeframe_minutes, mid, end)[0]
+    metrics["Split"] = split + 1
+    metrics["Best Params"] = best_params
+
+    return metrics, messages
+
+
+def _run_split_task(spec, *args):
+    return _run_split(cached_attach(spec), *args)
+
+
 def walk_forward_validation(
     df,
     strategy_func,
@@ -60,8 +177,28 @@ def walk_forward_validation(
     trading_fee_pct=0.001,
     timeframe_minutes=60,
     verbose=True,
-    save_results_to_file=True
+    save_results_to_file=True,
+    n_jobs=1,
+    executor=None,
+    reuse_indicators=False
 ):
+    """
+    اعتبارسنجی Walk-Forward با پنجره in-sample رو به رشد
+
+    پارامترها:
+    - n_jobs: تعداد پروسس‌ها برای اجرای هم‌زمان splitها (1 یعنی ترتیبی، -1 یعنی همه هسته‌ها)
+    - executor: یک concurrent.futures.Executor آماده (اختیاری)
+
+    splitها به هم وابسته نیستند؛ در حالت موازی داده یک بار در حافظه مشترک منتشر می‌شود،
+    نتایج و پیام‌ها به ترتیب split جمع می‌شوند و فایل‌های خروجی با اجرای ترتیبی یکی هستند.
+    strategy_func باید قابل pickle باشد، وگرنه اجرا ترتیبی انجام می‌شود.
+
+    - reuse_indicators: اگر True باشد اندیکاتورها و سیگنال هر ترکیب پارامتر یک بار روی
+      کل تاریخچه محاسبه می‌شوند و هر پنجره in/out فقط یک برش O(1) از آن‌هاست
+      (out-of-sample با اندیکاتورهای گرم‌شده شروع می‌شود). اگر خروجی استراتژی با ردیف‌های
+      df هم‌تراز نباشد، به روش عادی برمی‌گردد. splitهای این حالت همیشه ترتیبی اجرا می‌شوند
+      (سیگنال‌های کل تاریخچه در همین پروسس هستند)، پس n_jobs و executor نادیده گرفته می‌شوند.
+    """
     if not isinstance(df.index, pd.DatetimeIndex):
         df.index = pd.to_datetime(df.index)
 
@@ -75,67 +212,83 @@ def walk_forward_validation(
     min_rsi_period = 14
     min_period_needed = max(min_supertrend_period, min_rsi_period)
 
+    windows = []
     for i in range(n_splits):
         start = 0
         mid = start + step_size * (i + 1)
         end = mid + step_size
 
-        df_in = df.iloc[start:mid].copy()
-        df_out = df.iloc[mid:end].copy()
-
-        if df_out.empty or df_in.empty:
+        if mid >= total_len or mid <= start:
             break
+        windows.append((start, mid, min(end, total_len)))
 
-        if verbose:
-            print(f"\n🧪 Split {i + 1}/{n_splits} → in: {df_in.shape[0]} rows | out: {df_out.shape[0]} rows")
+    backtest_kwargs = dict(
+        initial_capital=initial_capital,
+        stop_loss_pct=stop_loss_pct,
+        take_profit_pct=take_profit_pct,
+        trading_fee_pct=trading_fee_pct
+    )
+    split_args = [
+        (i, n_splits, window, strategy_func, param_grid, min_period_needed, backtest_kwargs, timeframe_minutes)
+        for i, window in enumerate(windows)
+    ]
 
-        if len(df_out) < min_period_needed:
-            if verbose:
-                print(f"⚠️ Split {i + 1} skipped: داده‌ی out-of-sample کمتر از حداقل دوره لازم ({min_period_needed}) است.")
-            continue
-
-        best_result, _ = param_tuner(
-            df_in,
-            strategy_func,
-            param_grid,
-            initial_capital=initial_capital,
-            stop_loss_pct=stop_loss_pct,
-            take_profit_pct=take_profit_pct,
-            trading_fee_pct=trading_fee_pct,
-            timeframe_minutes=timeframe_minutes,
-            verbose=False
-        )
-
-        if best_result is None:
-            if verbose:
-                print("⛔ No best parameters found in this split.")
-            continue
+    signals = None
+    if reuse_indicators:
+        keys = list(param_grid.keys())
+        combos = [dict(zip(keys, combo)) for combo in itertools.product(*param_grid.values())]
+        signals = full_history_signals(df, strategy_func, combos)
+        if signals is None and verbose:
+            print("⚠️ strategy output is not aligned with df; recomputing indicators per split.")
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
 
-        best_params = best_result["params"]
+    parallel = (n_jobs > 1 or executor is not None) and len(windows) > 1
+    if parallel and signals is not None:
+        parallel = False
         if verbose:
-            print(f"✅ Best Params: {best_params}")
-
-        df_out_with_signals = strategy_func(df_out.copy(), **best_params)
-
-        final_capital, trade_log, capital_over_time, _ = run_backtest(
-            df_out_with_signals,
-            initial_capital=initial_capital,
-            stop_loss_pct=stop_loss_pct,
-            take_profit_pct=take_profit_pct,
-            trading_fee_pct=trading_fee_pct
-        )
-
-        metrics = calculate_metrics(
-            capital_over_time,
-            trade_log,
-            initial_capital=initial_capital,
-            timeframe_minutes=timeframe_minutes
-        )
-        metrics["Final Capital"] = final_capital
-        metrics["Split"] = i + 1
-        metrics["Best Params"] = best_params
-
-        results.append(metrics)
+            print("⚠️ reuse_indicators runs walk-forward splits serially; n_jobs/executor are ignored.")
+    if parallel:
+        try:
+            pickle.dumps(strategy_func)
+        except Exception:
+            parallel = False
+            if verbose:
+                print("⚠️ strategy_func is not picklable; running walk-forward splits serially.")
+
+    if parallel:
+        shm, spec = share_frame(df)
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=min(n_jobs, len(windows)))
+        try:
+            futures = [executor.submit(_run_split_task, spec, *args) for args in split_args]
+            outcomes = (future.result() for future in futures)
+            for metrics, messages in outcomes:
+                if verbose:
+                    for message in messages:
+                        print(message)
+                if metrics is not None:
+                    results.append(metrics)
+        finally:
+            if own_executor:
+                executor.shutdown()
+            shm.close()
+            shm.unlink()
+    else:
+        for i, window in enumerate(windows):
+            if signals is not None:
+                metrics, messages = _run_split_reused(
+                    df, i, n_splits, window, signals, min_period_needed, backtest_kwargs, timeframe_minutes
+                )
+            else:
+                metrics, messages = _run_split(df, *split_args[i])
+            if verbose:
+                for message in messages:
+                    print(message)
+            if metrics is not None:
+                results.append(metrics)
 
     if save_results_to_file and results:
         output_folder = create_output_folder(strategy_name="walkforward")
@@ -153,4 +306,4 @@ def walk_forward_validation(
     # نمایش خلاصه نتایج
     summarize_results(results, verbose=verbose)
 
-    return results
\ No newline at end of file
+    return results